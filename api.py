@@ -0,0 +1,293 @@
+import argparse
+import contextlib
+import io
+import json
+import threading
+import zlib
+from collections import OrderedDict
+from urllib.parse import quote
+
+import pandas as pd
+from starlette.applications import Starlette
+from starlette.concurrency import run_in_threadpool
+from starlette.responses import JSONResponse, Response, StreamingResponse
+from starlette.routing import Route
+
+from const import ADMIN_PASSWORD, API_ADMIN_HEADER, API_BODY_CACHE_SIZE, API_HOST, API_PORT, KEY_BONUS_TIME, KEY_BONUS_TIME_MS, KEY_CLASS, KEY_DIFF_TIME_MS, KEY_LAP_COUNT, KEY_LAP_NUMBER, KEY_LAP_TIME, KEY_LAP_TIME_MS, KEY_NAME, KEY_PENALTY_TIME, KEY_PENALTY_TIME_MS, KEY_RANKING, KEY_TOTAL_TIME_MS
+from exporters import EXPORT_FORMATS, stream_export
+from ingest import ingest_csv, ingest_frames, validate_chunk
+from metrics import get_metrics
+from model import format_ms
+from storage import read_title
+from store import get_store
+
+# 요청 JSON 필드 → 리더보드 컬럼 (값은 CSV 와 같은 문자열 형식: 시간 "분:초:밀리초", 가산초/패널티초는 초)
+LAP_FIELDS = {'name': KEY_NAME, 'class': KEY_CLASS, 'lap': KEY_LAP_NUMBER, 'lap_time': KEY_LAP_TIME, 'bonus': KEY_BONUS_TIME, 'penalty': KEY_PENALTY_TIME}
+LAP_DEFAULTS = {'lap': "1", 'bonus': "", 'penalty': ""}
+LAP_TEXT_FIELDS = {'name', 'class'}
+
+# 응답 JSON 필드 ← 순위가 계산된 모델 컬럼
+STANDING_FIELDS = {'rank': KEY_RANKING, 'name': KEY_NAME, 'class': KEY_CLASS, 'lap': KEY_LAP_NUMBER, 'lap_ms': KEY_LAP_TIME_MS,
+                   'bonus_ms': KEY_BONUS_TIME_MS, 'penalty_ms': KEY_PENALTY_TIME_MS, 'total_ms': KEY_TOTAL_TIME_MS, 'gap_ms': KEY_DIFF_TIME_MS}
+# 응답 JSON 필드 ← 개인 최고 기록 컬럼
+BEST_FIELDS = {'name': KEY_NAME, 'class': KEY_CLASS, 'lap': KEY_LAP_NUMBER, 'total_ms': KEY_TOTAL_TIME_MS, 'laps': KEY_LAP_COUNT}
+
+
+# JSON 기록 목록을 문자열 컬럼 DataFrame 으로 변환 (가져오기와 같은 검증 사용)
+# 이름/클래스는 문자열, 나머지 값은 문자열 또는 숫자만 허용 (목록/객체 등은 ValueError)
+def laps_frame(items):
+    columns = {}
+    for field, column in LAP_FIELDS.items():
+        default = LAP_DEFAULTS.get(field, "")
+        types = (str,) if field in LAP_TEXT_FIELDS else (str, int, float)
+        values = []
+        for index, item in enumerate(items):
+            value = item.get(field)
+            if value is None:
+                value = default
+            elif not isinstance(value, types) or isinstance(value, bool):
+                raise ValueError(f"{index}번 기록의 '{field}' 값 형식이 올바르지 않습니다.")
+            values.append(str(value))
+        columns[column] = values
+    return pd.DataFrame(columns, dtype=object)
+
+
+# 표를 JSON 직렬화할 수 있는 행 목록으로 변환 (합계 시간은 "분:초:밀리초" 문자열도 함께)
+def table_rows(frame, fields=STANDING_FIELDS):
+    values = {field: frame[column].tolist() for field, column in fields.items()}
+    values['total_time'] = format_ms(frame[KEY_TOTAL_TIME_MS]).tolist()
+    return [dict(zip(values, row)) for row in zip(*values.values())]
+
+
+# 요청별 마지막 응답 본문 (ETag 가 같으면 다시 조회/직렬화하지 않음)
+# 키에 요청 값(클래스, limit)이 들어가므로 최근 API_BODY_CACHE_SIZE 개만 보관하는 LRU
+_body_cache = OrderedDict()
+_body_lock = threading.Lock()
+
+
+# etag_class 의 ETag 로 캐시한 응답 본문, build 는 본문 dict 를 만드는 함수 (저장소 잠금 안에서 호출)
+def cached_body(store, key, etag_class, build):
+    with store.lock:
+        etag = store.etag(etag_class)
+        with _body_lock:
+            cached = _body_cache.get(key)
+            if cached is not None:
+                _body_cache.move_to_end(key)
+        if cached is not None and cached[0] == etag:
+            return etag, cached[1]
+        body = json.dumps(build(), ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+    with _body_lock:
+        _body_cache[key] = (etag, body)
+        _body_cache.move_to_end(key)
+        while len(_body_cache) > API_BODY_CACHE_SIZE:
+            _body_cache.popitem(last=False)
+    return etag, body
+
+
+# 클래스별 순위에 limit 이 있으면 상위 limit 위까지(같은 시간은 같은 순위라 더 많을 수 있음)를 저장소에서 조회
+# (SQLite 저장소는 (class, total_ms) 인덱스를 쓰는 SQL, CSV 저장소는 메모리 순위표)
+# 전체 순위의 limit 은 앞에서부터 limit 건, per_class 는 클래스마다 상위 per_class 위
+def standings_body(store, class_name, limit, per_class=None):
+    def build():
+        if per_class is not None:
+            ranked = store.top_n_per_class(per_class)
+            return {'class': None, 'per_class': per_class, 'version': store.version, 'count': len(ranked), 'rows': table_rows(ranked)}
+        if class_name is not None and limit is not None:
+            ranked = store.top_n_per_class(limit, class_name)
+            total = store.engine.count(class_name)
+        else:
+            ranked = store.ranked(class_name)
+            total = len(ranked)
+            if limit is not None:
+                ranked = ranked.head(limit)
+        return {'class': class_name, 'version': store.version, 'total': total, 'count': len(ranked), 'rows': table_rows(ranked)}
+
+    return cached_body(store, ('standings', class_name, limit, per_class), class_name, build)
+
+
+# 선수별 최고 기록 (SQLite 저장소는 SQL 로 조회)
+def bests_body(store, class_name):
+    def build():
+        bests = store.personal_bests(class_name)
+        return {'class': class_name, 'version': store.version, 'count': len(bests), 'rows': table_rows(bests, BEST_FIELDS)}
+
+    return cached_body(store, ('bests', class_name), class_name, build)
+
+
+def not_modified(request, etag):
+    return etag in (tag.strip() for tag in request.headers.get('if-none-match', '').split(','))
+
+
+def error(status_code, message, **extra):
+    return JSONResponse(dict(error=message, **extra), status_code=status_code)
+
+
+async def health(request):
+    store = get_store()
+    return JSONResponse({'status': 'ok', 'version': store.version, 'rows': len(store)})
+
+
+# 측정 지표 (기본은 Prometheus 텍스트, ?format=json 이면 JSON)
+async def metrics(request):
+    store = get_store()
+    if request.query_params.get('format') == 'json':
+        return JSONResponse(dict(get_metrics().snapshot(), store=store.stats()))
+    return Response(get_metrics().to_prometheus(store.stats()), media_type='text/plain; version=0.0.4')
+
+
+def parse_count(request, name):
+    value = request.query_params.get(name)
+    return None if value is None else max(int(value), 0)
+
+
+def json_response(body, etag):
+    return Response(body, media_type='application/json', headers={'ETag': etag, 'Cache-Control': 'no-cache'})
+
+
+# 전체 또는 클래스별 순위 (?limit=N 으로 상위 N 건만, 전체 순위는 ?per_class=N 으로 클래스마다 상위 N 위)
+# 표가 바뀌지 않았으면 If-None-Match 에 304 로 응답 (저장소 갱신은 변경 피드의 감시 스레드가 담당)
+async def standings(request):
+    store = get_store()
+    class_name = request.path_params.get('class_name')
+    try:
+        limit = parse_count(request, 'limit')
+        per_class = None if class_name is not None else parse_count(request, 'per_class')
+    except ValueError:
+        return error(400, "limit, per_class 는 정수여야 합니다.")
+
+    etag = store.etag(class_name)
+    if not_modified(request, etag):
+        return Response(status_code=304, headers={'ETag': etag})
+    etag, body = await run_in_threadpool(standings_body, store, class_name, limit, per_class)
+    return json_response(body, etag)
+
+
+# 전체 또는 클래스별 선수 최고 기록과 주행 수
+async def bests(request):
+    store = get_store()
+    class_name = request.path_params.get('class_name')
+    etag = store.etag(class_name)
+    if not_modified(request, etag):
+        return Response(status_code=304, headers={'ETag': etag})
+    etag, body = await run_in_threadpool(bests_body, store, class_name)
+    return json_response(body, etag)
+
+
+async def read_json(request):
+    try:
+        return await request.json()
+    except ValueError:
+        return None
+
+
+def _submit_lap(store, item):
+    try:
+        frame = laps_frame([item])
+    except ValueError as e:
+        return 400, {'error': str(e)}
+    rows, rejected, _ = validate_chunk(frame, 0)
+    if rejected:
+        return 400, {'error': rejected[0][0]}
+    name, class_name, lap_number, lap_ms, bonus_ms, penalty_ms = rows[0]
+    with store.lock:
+        if not store.submit(name, class_name, lap_number, lap_ms, bonus_ms, penalty_ms):
+            return 409, {'error': "이미 존재하는 이름과 주행 차수입니다."}
+        rank, gap_ms = store.engine.rank_and_gap(class_name, name, lap_number)
+        overall_rank, _ = store.engine.rank_and_gap(class_name, name, lap_number, overall=True)
+        version = store.version
+    return 201, {'name': name, 'class': class_name, 'lap': lap_number, 'total_ms': lap_ms + bonus_ms + penalty_ms,
+                 'rank': rank, 'gap_ms': gap_ms, 'overall_rank': overall_rank, 'version': version}
+
+
+# 기록 하나 제출 {"name", "class", "lap", "lap_time": "M:SS:mmm", "bonus", "penalty"}
+async def submit_lap(request):
+    item = await read_json(request)
+    if not isinstance(item, dict):
+        return error(400, "JSON 객체가 필요합니다.")
+    status_code, body = await run_in_threadpool(_submit_lap, get_store(), item)
+    return JSONResponse(body, status_code=status_code)
+
+
+# 여러 기록 제출 (JSON 배열 또는 CSV 본문), 가져오기 보고서 반환
+async def submit_bulk(request):
+    store = get_store()
+    if request.headers.get('content-type', '').startswith('text/csv'):
+        source = io.BytesIO(await request.body())
+        report_task = lambda: ingest_csv(source, store)
+    else:
+        items = await read_json(request)
+        if not isinstance(items, list) or not all(isinstance(item, dict) for item in items):
+            return error(400, "JSON 객체 배열이 필요합니다.")
+        report_task = lambda: ingest_frames([laps_frame(items)], store, first_row_number=0)
+    try:
+        report = await run_in_threadpool(report_task)
+    except ValueError as e:
+        return error(400, str(e))
+    body = report.summary()
+    body['samples'] = [{'row': row_number, 'reason': reason} for row_number, reason in report.samples]
+    body['version'] = store.version
+    return JSONResponse(body)
+
+
+# 기록 삭제 (관리자 비밀번호 헤더 필요)
+async def delete_lap(request):
+    if request.headers.get(API_ADMIN_HEADER) != ADMIN_PASSWORD:
+        return error(403, "관리자 비밀번호가 필요합니다.")
+    params = request.path_params
+    deleted = await run_in_threadpool(get_store().delete, params['class_name'], params['name'], params['lap'])
+    if not deleted:
+        return error(404, "기록이 없습니다.")
+    return Response(status_code=204)
+
+
+# 내보내기 (csv/html/pdf/md), 같은 version/제목이면 내보내기 캐시 사용, 아니면 만들면서 스트리밍
+async def export(request):
+    store = get_store()
+    fmt = request.path_params['fmt']
+    if fmt not in EXPORT_FORMATS:
+        return error(404, f"지원하지 않는 형식입니다: {fmt}")
+    _, _, extension, mime = EXPORT_FORMATS[fmt]
+    title = await run_in_threadpool(read_title)
+    etag = store.etag()[:-1] + f"-{fmt}-{zlib.crc32(title.encode('utf-8')):x}\""
+    if not_modified(request, etag):
+        return Response(status_code=304, headers={'ETag': etag})
+    # CSV/HTML/Markdown 은 EXPORT_CHUNK_ROWS 행씩 만드는 대로 전송 (조각 생성은 스레드 풀에서 실행됨)
+    chunks = await run_in_threadpool(stream_export, store, fmt, title)
+    disposition = f"attachment; filename*=UTF-8''{quote(f'{title}.{extension}')}"
+    return StreamingResponse(chunks, media_type=mime, headers={'ETag': etag, 'Content-Disposition': disposition})
+
+
+@contextlib.asynccontextmanager
+async def lifespan(app):
+    store = get_store()
+    await run_in_threadpool(store.refresh)
+    yield
+    await run_in_threadpool(store.storage.sync)
+
+
+app = Starlette(routes=[
+    Route('/api/health', health),
+    Route('/api/metrics', metrics),
+    Route('/api/standings', standings),
+    Route('/api/standings/{class_name}', standings),
+    Route('/api/bests', bests),
+    Route('/api/bests/{class_name}', bests),
+    Route('/api/laps', submit_lap, methods=['POST']),
+    Route('/api/laps/bulk', submit_bulk, methods=['POST']),
+    Route('/api/laps/{class_name}/{name}/{lap:int}', delete_lap, methods=['DELETE']),
+    Route('/api/export/{fmt}', export),
+], lifespan=lifespan)
+
+
+def main():
+    import uvicorn
+
+    parser = argparse.ArgumentParser(description="리더보드 HTTP API 서버")
+    parser.add_argument('--host', default=API_HOST)
+    parser.add_argument('--port', type=int, default=API_PORT)
+    args = parser.parse_args()
+    uvicorn.run(app, host=args.host, port=args.port)
+
+
+if __name__ == '__main__':
+    main()
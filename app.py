@@ -1,36 +1,51 @@
+import json
 import time
 import streamlit as st
 import pandas as pd
-import io
 import os
-from reportlab.lib.pagesizes import letter
-from reportlab.pdfbase.ttfonts import TTFont
-from reportlab.pdfbase import pdfmetrics
 
 
-from const import ADMIN_PASSWORD, BACKUP_FILE, COLUMN_NAMES, DATA_FILE, DEFAULT_TITLE, KEY_BONUS_TIME, KEY_CLASS, KEY_DIFF_TIME, KEY_LAP_NUMBER, KEY_LAP_TIME, KEY_MM, KEY_MS, KEY_NAME, KEY_PENALTY_TIME, KEY_RANKING, KEY_SS, KEY_TOTAL_TIME, KEY_TOTAL_TIME_MS, TITLE_FILE
-from utils import calculate_time_difference, create_pdf, format_time, load_bonus_times, load_data, time_str_to_ms
-
-# 클래스 목록
-CAR_CLASSES = ["A", "B", "ND", "86", "M", "N"]
-
-# 한글 폰트 등록
-pdfmetrics.registerFont(TTFont('NotoSansKR', 'NotoSansKR-Regular.ttf'))
+from const import ADMIN_PASSWORD, BACKUP_FILE, CAR_CLASSES, DEFAULT_TITLE, DISPLAY_COLUMNS, KEY_BONUS_TIME, KEY_CLASS, KEY_LAP_NUMBER, KEY_MM, KEY_MS, KEY_NAME, KEY_PENALTY_TIME, KEY_SS, LIVE_HEARTBEAT_SECONDS, RENDER_POLL_SECONDS, STATS_DISPLAY_COLUMNS, TABLE_PAGE_SIZE, TITLE_FILE
+from changefeed import merge_batches
+from events import get_event, list_events
+from exporters import EXPORT_FORMATS, export_bytes, get_export_cache, ordered_classes
+from fileutils import atomic_write, atomic_write_csv
+from ingest import ingest_csv
+from metrics import get_metrics, profile_call
+from model import from_csv_frame, to_csv_frame
+from render_worker import BACKGROUND_FORMATS, get_render_pool
+from stats import stats_display
+from storage import read_title
+from store import get_store
+from utils import current_session_id, load_bonus_times, load_data
 
 # 초기화
 def initialize_session_state():
     if 'title' not in st.session_state:
-        if os.path.exists(TITLE_FILE):
-            with open(TITLE_FILE, 'r', encoding='utf-8') as f:
-                st.session_state.title = f.read().strip()
-        else:
-            st.session_state.title = DEFAULT_TITLE
-    if 'leaderboard' not in st.session_state:
-        st.session_state.leaderboard = pd.DataFrame(columns=COLUMN_NAMES)
+        st.session_state.title = read_title()
+    # 리더보드 데이터는 프로세스 공유 저장소에 있고 세션은 version 번호만 보관
+    if 'data_version' not in st.session_state:
+        st.session_state.data_version = 0
+    # 백그라운드에서 생성 중인 내보내기 작업 (형식 → 캐시 키)
+    if 'render_jobs' not in st.session_state:
+        st.session_state.render_jobs = {}
     if 'admin' not in st.session_state:
         st.session_state.admin = False
     if 'show_admin' not in st.session_state:
         st.session_state.show_admin = False
+    # 다음 재실행 한 번만 프로파일링 (관리자 성능 패널에서 켬)
+    if 'profile_next' not in st.session_state:
+        st.session_state.profile_next = False
+
+
+# 이벤트 선택 (None 이면 현재 진행 중인 이벤트, 보관된 이벤트는 선택했을 때만 읽음)
+def select_event():
+    events = {meta['id']: meta for meta in list_events()}
+    if not events:
+        return None
+    event_id = st.sidebar.selectbox("이벤트", [None] + list(events), key="event_id",
+                                    format_func=lambda event_id: "현재 이벤트" if event_id is None else f"{events[event_id]['title']} ({events[event_id]['archived_at']})")
+    return None if event_id is None else get_event(event_id)
 
 
 def input_form(classes):
@@ -71,135 +86,186 @@ def input_form(classes):
     # 합계 시간 계산
     input_time = (minutes * 60 + seconds) * 1000 + milliseconds
 
-    # 자동 가산초 입력 기능 추가
-    if bonus_time == 0.0 and name in st.session_state.bonus_times[KEY_NAME].values:
-        bonus_time = st.session_state.bonus_times.loc[st.session_state.bonus_times[KEY_NAME] == name, KEY_BONUS_TIME].values[0]
-        bonus_time = float(bonus_time) if isinstance(bonus_time, str) else bonus_time
+    # 밀리초 단위로 변환
+    bonus_ms = int(round(bonus_time * 1000))
+    penalty_ms = int(round(penalty_time * 1000))
 
-    total_time = input_time + int(bonus_time * 1000) + int(penalty_time * 1000)
-
-    formatted_time = format_time(input_time)
-    formatted_total_time = format_time(total_time)
     submit_button = st.button(label='제출')
     submit_message = st.empty()
 
-    return name, lap_number, selected_class, formatted_time, bonus_time, penalty_time, formatted_total_time, submit_button, submit_message
-
-def submit_update(data, name, lap_number, selected_class, formatted_time, bonus_time, penalty_time, formatted_total_time, submit_message):
-    if not st.session_state.leaderboard.empty:
-        # 클래스, 이름, 주행 차수 중복 확인
-        if ((st.session_state.leaderboard[KEY_NAME] == name) &
-            (st.session_state.leaderboard[KEY_LAP_NUMBER] == lap_number) &
-            (st.session_state.leaderboard[KEY_CLASS] == selected_class)).any():
-            submit_message.warning("이미 존재하는 이름과 주행 차수입니다. 다른 값을 입력하세요.")
-            time.sleep(1)
-            submit_message.empty()
-            return
-        else:
-            new_entry = pd.DataFrame([[name, selected_class, lap_number, formatted_time, f"{bonus_time:.3f}", f"{penalty_time:.3f}", formatted_total_time]], columns=COLUMN_NAMES)
-            st.session_state.leaderboard = pd.concat([st.session_state.leaderboard, new_entry], ignore_index=True)
-    else:
-        new_entry = pd.DataFrame([[name, selected_class, lap_number, formatted_time, f"{bonus_time:.3f}", f"{penalty_time:.3f}", formatted_total_time]], columns=COLUMN_NAMES)
-        st.session_state.leaderboard = new_entry
+    return name, lap_number, selected_class, input_time, bonus_ms, penalty_ms, submit_button, submit_message
+
+def submit_update(store, name, lap_number, selected_class, lap_ms, bonus_ms, penalty_ms, submit_message):
+    # 클래스, 이름, 주행 차수 중복 확인 (해시 조회) 후 정렬 위치에 삽입, 저널에 이벤트 추가
+    if not store.submit(name, selected_class, lap_number, lap_ms, bonus_ms, penalty_ms):
+        submit_message.warning("이미 존재하는 이름과 주행 차수입니다. 다른 값을 입력하세요.")
+        time.sleep(1)
+        submit_message.empty()
+        return
 
-    st.session_state.leaderboard = st.session_state.leaderboard.sort_values(by=KEY_TOTAL_TIME).reset_index(drop=True)
-    st.session_state.leaderboard.to_csv(DATA_FILE, index=False, encoding='utf-8')
+    st.session_state.data_version = store.version
     submit_message.success("기록이 성공적으로 저장되었습니다!")
     time.sleep(1)  # 1초 대기
     submit_message.empty()  # 메시지를 지움
 
 
-def process_leaderboard(leaderboard):
-    # 리더보드 정렬 및 시간 차이 계산
-    leaderboard = leaderboard.sort_values(by=KEY_TOTAL_TIME).reset_index(drop=True)
+# "더 보기" 버튼 콜백 (스크립트 실행 전에 표시 행 수를 늘림)
+def show_more_rows(state_key):
+    st.session_state[state_key] = st.session_state.get(state_key, TABLE_PAGE_SIZE) + TABLE_PAGE_SIZE
 
-    # 합계 시간 차이 열 추가
-    leaderboard[KEY_DIFF_TIME] = calculate_time_difference(leaderboard)
 
-    # 합계 시간을 밀리초로 변환하여 정렬하기
-    if not leaderboard.empty:
-        leaderboard[KEY_TOTAL_TIME_MS] = leaderboard[KEY_TOTAL_TIME].apply(time_str_to_ms)
-        leaderboard = leaderboard.sort_values(by=KEY_TOTAL_TIME_MS).reset_index(drop=True)
-        leaderboard.drop(columns=[KEY_TOTAL_TIME_MS], inplace=True)  # 정렬 후 필요 없는 열 삭제
+def display_table(display_data, total, table_key):
+    # 상위 N개만 표시하고 나머지는 "더 보기"로 펼침
+    with get_metrics().span('render_table'):
+        st.table(display_data[DISPLAY_COLUMNS])
+    if total > len(display_data):
+        st.button(f"더 보기 ({len(display_data)}/{total})", key=f"more_{table_key}", on_click=show_more_rows, args=(f"rows_{table_key}",))
 
-    # 가산초 및 패널티초 포맷 변경
-    leaderboard[KEY_BONUS_TIME] = leaderboard[KEY_BONUS_TIME].map(lambda x: f"{float(x):.3f}" if x != "" else "0.000")
-    leaderboard[KEY_PENALTY_TIME] = leaderboard[KEY_PENALTY_TIME].map(lambda x: f"{float(x):.3f}" if x != "" else "0.000")
 
-    # 리더보드 정렬 및 시간 차이 계산
-    leaderboard = leaderboard.sort_values(by=KEY_TOTAL_TIME).reset_index(drop=True)
+# best_only 이면 선수별 최고 기록만의 순위표, 아니면 모든 주행의 순위표
+# 화면에 보이는 행 수만큼만 만들어 (표, 전체 행 수) 로 반환
+def leaderboard_table(store, class_name, best_only, table_key):
+    limit = st.session_state.get(f"rows_{table_key}", TABLE_PAGE_SIZE)
+    return store.display_page(class_name, limit, best_only)
 
-    # 합계 시간 차이 열 추가
-    leaderboard[KEY_DIFF_TIME] = calculate_time_difference(leaderboard)
 
-    return leaderboard
-
-
-def display_leaderboard_by_class(classes, leaderboard):
+def display_leaderboard_by_class(classes, store, best_only=False):
     # 각 클래스에 대해 리더보드 표시
     for class_name in classes:
-        if not leaderboard.empty and leaderboard[KEY_CLASS].isin([class_name]).any():
+        # 클래스별 표는 해당 클래스가 바뀐 경우에만 다시 계산 (순위, 시간 차이, 문자열 변환 포함)
+        display_data, total = leaderboard_table(store, class_name, best_only, class_name)
+        if total:
             st.subheader(f"리더보드 {class_name}")
-            display_data = leaderboard.copy()
-            
-            # 클래스 필터링
-            display_data = display_data[display_data[KEY_CLASS] == class_name]
-            
-            # 순위 계산 (동일한 시간은 같은 순위로 표시)
-            display_data = display_data.sort_values(by=KEY_TOTAL_TIME).reset_index(drop=True)
-            display_data[KEY_RANKING] = display_data[KEY_TOTAL_TIME].rank(method='min').astype(int)
-            # 셀 번호를 1부터 시작하도록 설정
-            display_data.index = display_data.index + 1
-            st.table(display_data[[KEY_RANKING, KEY_CLASS, KEY_NAME, KEY_LAP_NUMBER, KEY_LAP_TIME, KEY_BONUS_TIME, KEY_PENALTY_TIME, KEY_TOTAL_TIME, KEY_DIFF_TIME]])
-
-def display_overall_leaderboard(leaderboard):
+            display_table(display_data, total, class_name)
+
+def display_overall_leaderboard(store, best_only=False):
     # 리더보드 전체 표시
     st.subheader("리더보드 All")
-    if not leaderboard.empty:
-        display_data = leaderboard.copy()
-        # 순위 계산 (동일한 시간은 같은 순위로 표시)
-        display_data = display_data.sort_values(by=KEY_TOTAL_TIME).reset_index(drop=True)
-        display_data[KEY_RANKING] = display_data[KEY_TOTAL_TIME].rank(method='min').astype(int)
-        # 셀 번호를 1부터 시작하도록 설정
-        display_data.index = display_data.index + 1
-        st.table(display_data[[KEY_RANKING, KEY_CLASS, KEY_NAME, KEY_LAP_NUMBER, KEY_LAP_TIME, KEY_BONUS_TIME, KEY_PENALTY_TIME, KEY_TOTAL_TIME, KEY_DIFF_TIME]])
-
-def download_features(leaderboard, title):
-    if st.button("리더보드 CSV 다운로드"):
-        if not leaderboard.empty:
-            display_data = leaderboard.copy()
-            display_data[KEY_RANKING] = display_data.index + 1
-            csv = display_data.to_csv(index=False, encoding='utf-8-sig').encode('utf-8-sig')
-            st.download_button("Download CSV", csv, file_name=f"{title}.csv", mime='text/csv')
-        else:
-            st.warning("리더보드에 데이터가 없습니다.")
-
-    if st.button("리더보드 HTML 다운로드"):
-        if not leaderboard.empty:
-            display_data = leaderboard.copy()
-            display_data[KEY_RANKING] = display_data.index + 1
-            html = display_data.to_html(index=False, escape=False)
-            html_with_title = f"<h1 style='text-align: center;'>{title}</h1>\n" + html
-            st.download_button("Download HTML", html_with_title.encode('utf-8'), file_name=f"{title}.html", mime='text/html')
-        else:
-            st.warning("리더보드에 데이터가 없습니다.")
-
-    if st.button("리더보드 PDF 다운로드"):
-        if not leaderboard.empty:
-            pdf_buffer = create_pdf(leaderboard)
-            st.download_button("Download PDF", pdf_buffer, file_name=f"{title}.pdf", mime='application/pdf')
-        else:
-            st.warning("리더보드에 데이터가 없습니다.")
-
-    # Markdown 저장 기능
-    if st.button("리더보드 Markdown 다운로드"):
-        if not leaderboard.empty:
-            display_data = leaderboard.copy()
-            display_data[KEY_RANKING] = display_data.index + 1
-            markdown = display_data.to_markdown(index=False)
-            st.download_button("Download Markdown", markdown.encode('utf-8'), file_name=f"{title}.md", mime='text/markdown')
-        else:
-            st.warning("리더보드에 데이터가 없습니다.")
+    display_data, total = leaderboard_table(store, None, best_only, "all")
+    if total:
+        display_table(display_data, total, "all")
+
+
+# 선수별 통계와 클래스 기록 (현재 이벤트 저장소 또는 보관된 이벤트)
+def driver_stats_panel(store, classes):
+    with st.expander("선수 통계"):
+        records = store.class_records()
+        if records.empty:
+            st.info("기록이 없습니다.")
+            return
+        st.caption("클래스 기록")
+        st.table(stats_display(records)[STATS_DISPLAY_COLUMNS])
+        class_name = st.selectbox("클래스", [None] + list(classes), key="stats_class",
+                                  format_func=lambda class_name: "전체" if class_name is None else class_name)
+        display_data = stats_display(store.driver_stats(class_name))[STATS_DISPLAY_COLUMNS]
+        st.dataframe(display_data)
+        st.download_button("선수 통계 CSV 다운로드", display_data.to_csv(index=False).encode('utf-8-sig'),
+                           file_name='driver_stats.csv', mime='text/csv')
+
+# 변경 묶음 요약 (새 기록의 클래스 순위 포함)
+def describe_change(store, change):
+    if change is None or change.classes is None:
+        return "리더보드가 다시 로드되었습니다."
+    parts = []
+    with store.lock:
+        for class_name, name, lap_number in change.added[-3:]:
+            if store.engine.exists(class_name, name, lap_number):
+                rank, _ = store.engine.rank_and_gap(class_name, name, lap_number)
+                parts.append(f"{name} ({class_name}, {lap_number}차) {rank}위")
+    summary = f"새 기록 {change.added_count}건, 삭제 {change.removed_count}건"
+    return summary + (": " + ", ".join(parts) if parts else "")
+
+
+# 실시간(관전) 화면: 변경 피드를 구독하여 바뀐 클래스의 표만 다시 그림
+# 스크립트를 다시 실행하지 않고 이 함수 안에서 변경을 기다리며, 화면 연결이 끊기면 heartbeat 에서 종료됨
+def live_board(store, classes):
+    class_slots = {class_name: st.empty() for class_name in classes}
+    overall_slot = st.empty()
+    status = st.empty()
+
+    def draw(class_name, slot, title):
+        display_data, total = store.display_page(class_name)
+        with slot.container():
+            if total:
+                st.subheader(title)
+                st.table(display_data[DISPLAY_COLUMNS])
+
+    seq = store.feed.seq
+    for class_name, slot in class_slots.items():
+        draw(class_name, slot, f"리더보드 {class_name}")
+    draw(None, overall_slot, "리더보드 All")
+    message = "실시간 갱신 중"
+    status.caption(message)
+    while True:
+        batches = store.feed.wait(seq, timeout=LIVE_HEARTBEAT_SECONDS)
+        if batches == []:
+            status.caption(message)
+            continue
+        # 너무 뒤처진 경우(None) 전체를 다시 그림
+        change = None if batches is None else merge_batches(batches)
+        seq = store.feed.seq if change is None else change.seq
+        for class_name, slot in class_slots.items():
+            if change is None or change.changed(class_name):
+                draw(class_name, slot, f"리더보드 {class_name}")
+        draw(None, overall_slot, "리더보드 All")
+        st.session_state.data_version = store.version
+        message = describe_change(store, change)
+        status.caption(message)
+
+
+# 백그라운드 생성 진행률 (이 부분만 주기적으로 다시 실행)
+@st.fragment(run_every=RENDER_POLL_SECONDS)
+def render_progress(fmt, key):
+    job = get_render_pool().get(key)
+    if job is None or job.done():
+        # 완료되면 전체를 다시 실행하여 다운로드 버튼 표시
+        st.rerun()
+    st.progress(job.progress(), text=f"{fmt.upper()} 생성 중... ({job.elapsed():.0f}초)")
+
+
+def display_render_job(fmt, job_key, key, download_label, file_name, mime):
+    data = get_export_cache().get(key)
+    if data is not None:
+        st.download_button(download_label, data, file_name=file_name, mime=mime, key=f"download_{fmt}")
+        return
+
+    render_pool = get_render_pool()
+    job = render_pool.get(key)
+    if job is None:
+        # 캐시에서 밀려난 경우 다시 요청해야 함
+        del st.session_state.render_jobs[job_key]
+    elif job.error() is not None:
+        st.error(f"파일 생성 중 오류가 발생했습니다: {job.error()}")
+        render_pool.discard(key)
+        del st.session_state.render_jobs[job_key]
+    else:
+        render_progress(fmt, key)
+
+
+def download_features(store, title, event_id=None):
+    # CSV, HTML, PDF, Markdown 저장 기능 (같은 데이터 version/제목이면 캐시된 결과 사용)
+    # 생성 요청은 (보관된 이벤트 id, 형식) 별로 기억 (현재 이벤트는 None)
+    for fmt, (label, download_label, extension, mime) in EXPORT_FORMATS.items():
+        file_name = f"{title}.{extension}"
+        job_key = (event_id, fmt)
+        if st.button(label):
+            if len(store) > 0:
+                if fmt in BACKGROUND_FORMATS:
+                    # PDF/HTML 은 작업 프로세스에서 생성 (같은 요청은 하나로 합쳐짐)
+                    st.session_state.render_jobs[job_key] = get_render_pool().request(store, fmt, title)[0]
+                else:
+                    data = export_bytes(store, fmt, title)
+                    st.download_button(download_label, data, file_name=file_name, mime=mime)
+            else:
+                st.warning("리더보드에 데이터가 없습니다.")
+
+        key = st.session_state.render_jobs.get(job_key)
+        # 요청 후 기록이나 제목이 바뀌었으면 이전 데이터로 만든 결과는 버림 (다시 요청해야 함)
+        if key is not None and key[:2] != (store.version, title):
+            del st.session_state.render_jobs[job_key]
+            key = None
+        if key is not None:
+            display_render_job(fmt, job_key, key, download_label, file_name, mime)
 
 
 def admin_features():
@@ -225,49 +291,72 @@ def admin_features():
 
             if st.button("타이틀 변경"):
                 st.session_state.title = new_title
-                with open(TITLE_FILE, 'w', encoding='utf-8') as f:
-                    f.write(new_title)
+                atomic_write(TITLE_FILE, new_title)
                 st.success("타이틀이 변경되었습니다.")
 
             # 데이터 삭제 및 초기화
-            if len(st.session_state.leaderboard) > 0:
-                delete_index = st.number_input("삭제할 데이터의 순위", min_value=1, max_value=len(st.session_state.leaderboard), step=1)
+            store = get_store()
+            if len(store) > 0:
+                delete_index = st.number_input("삭제할 데이터의 순위", min_value=1, max_value=len(store), step=1)
                 if st.button("해당 데이터 삭제"):
-                    if delete_index > 0 and delete_index <= len(st.session_state.leaderboard):
-                        st.session_state.leaderboard = st.session_state.leaderboard.drop(delete_index - 1).reset_index(drop=True)
-                        st.session_state.leaderboard.to_csv(DATA_FILE, index=False, encoding='utf-8')
+                    if store.delete_at(delete_index - 1):
+                        st.session_state.data_version = store.version
                         st.success("데이터가 삭제되었습니다.")
                     else:
                         st.warning("유효한 순번을 입력하세요.")
 
+            # 현재 리더보드를 보관된 이벤트로 저장한 뒤 새 이벤트 시작
+            if st.button("이벤트 보관 후 새 이벤트 시작"):
+                if store.archive_and_reset(st.session_state.title) is not None:
+                    st.session_state.data_version = store.version
+                    st.session_state.title = DEFAULT_TITLE
+                    atomic_write(TITLE_FILE, st.session_state.title)
+                    st.success("이벤트가 보관되었습니다.")
+                else:
+                    st.warning("리더보드에 데이터가 없습니다.")
+
             if st.button("리더보드 초기화"):
-                st.session_state.leaderboard = pd.DataFrame(columns=COLUMN_NAMES)
-                if os.path.exists(DATA_FILE):
-                    os.remove(DATA_FILE)  # 데이터 파일 삭제
+                # 초기화 이벤트 기록 후 빈 스냅샷으로 압축
+                store.reset()
+                st.session_state.data_version = store.version
                 if os.path.exists(BACKUP_FILE):
                     os.remove(BACKUP_FILE)  # 백업 파일 삭제
                 st.session_state.title = DEFAULT_TITLE
-                with open(TITLE_FILE, 'w', encoding='utf-8') as f:
-                    f.write(st.session_state.title)
+                atomic_write(TITLE_FILE, st.session_state.title)
                 st.success("리더보드가 초기화되었습니다.")
 
             if st.button("리더보드 갱신"):
-                load_data()
+                load_data(force=True)
                 st.success("리더보드가 갱신되었습니다.")
 
             # 파일 업로드 기능
             uploaded_file = st.file_uploader("리더보드 CSV 파일 업로드")
             if uploaded_file is not None:
                 try:
-                    st.session_state.leaderboard = pd.read_csv(uploaded_file, encoding='utf-8')
-                    st.session_state.leaderboard.to_csv(DATA_FILE, index=False, encoding='utf-8')
+                    uploaded = pd.read_csv(uploaded_file, encoding='utf-8', dtype={KEY_NAME: str, KEY_CLASS: str})
+                    # 전체 교체이므로 새 스냅샷을 원자적으로 저장하고 저널을 비움
+                    store.replace(from_csv_frame(uploaded))
+                    st.session_state.data_version = store.version
                     st.success("리더보드가 갱신되었습니다.")
                 except Exception as e:
                     st.error(f"파일 처리 중 오류가 발생했습니다: {e}")
 
+            # 타이밍 데이터 가져오기 (기존 리더보드에 새 기록만 병합)
+            timing_file = st.file_uploader("타이밍 데이터 CSV 가져오기 (병합)", key="ingest_file")
+            if timing_file is not None and st.button("가져오기"):
+                try:
+                    report = ingest_csv(timing_file, store)
+                    st.session_state.data_version = store.version
+                    st.success(f"{report.accepted}건 추가, {report.rejected}건 제외 (총 {report.rows_read}행, {report.rows_per_sec:.0f}행/초)")
+                    if report.errors:
+                        st.table(report.error_frame())
+                        st.table(report.sample_frame())
+                except Exception as e:
+                    st.error(f"파일 처리 중 오류가 발생했습니다: {e}")
+
             # 리더보드 백업 저장 기능
             if st.button("리더보드 백업 저장"):
-                st.session_state.leaderboard.to_csv(BACKUP_FILE, index=False, encoding='utf-8')
+                atomic_write_csv(to_csv_frame(store.ranked()), BACKUP_FILE)
                 st.success("리더보드 백업이 저장되었습니다.")
 
             # 백업 파일 다운로드 기능
@@ -278,35 +367,103 @@ def admin_features():
                 else:
                     st.warning("백업 파일이 존재하지 않습니다.")
 
+            # 공유 저장소 측정 지표 (접속 세션 수, 세션당 메모리, 초당 재실행 수)
+            with st.expander("서버 상태"):
+                st.json(store.stats())
+
+            performance_panel(store)
+
+
+# 구간별 소요 시간/카운터 표시 및 내보내기, 다음 재실행 프로파일링
+def performance_panel(store):
+    with st.expander("성능"):
+        metrics = get_metrics()
+        snapshot = metrics.snapshot()
+        if snapshot['spans']:
+            st.dataframe(pd.DataFrame.from_dict(snapshot['spans'], orient='index').round(2))
+        st.json(snapshot['counters'])
+
+        col1, col2, col3 = st.columns(3)
+        with col1:
+            st.download_button("Prometheus", metrics.to_prometheus(store.stats()), file_name='metrics.txt', mime='text/plain')
+        with col2:
+            st.download_button("JSON", json.dumps(dict(snapshot, store=store.stats()), ensure_ascii=False, indent=2),
+                               file_name='metrics.json', mime='application/json')
+        with col3:
+            if st.button("측정 초기화"):
+                metrics.reset()
+                st.rerun()
+
+        if st.button("다음 재실행 프로파일링"):
+            st.session_state.profile_next = True
+            st.rerun()
+        if 'profile_report' in st.session_state:
+            st.caption("마지막 프로파일 (누적 시간 순)")
+            st.code(st.session_state.profile_report, language=None)
+
 
 def main():
     initialize_session_state()
+    store = get_store()
+    store.record_rerun(current_session_id())
 
-    load_bonus_times()  # 가산초 데이터 로드
     load_data()
+    load_bonus_times()  # 가산초 데이터 로드 오류 표시
+
+    # 보관된 이벤트는 읽기 전용으로 표시하고 다운로드만 제공
+    event = select_event()
+    if event is not None:
+        st.title(event.title)
+        st.caption(f"보관된 이벤트 ({event.meta['archived_at']})")
+        best_only = st.sidebar.toggle("최고 기록만 보기", key="best_only")
+        classes = ordered_classes(event.classes())
+        display_leaderboard_by_class(classes, event, best_only)
+        display_overall_leaderboard(event, best_only)
+        driver_stats_panel(event, classes)
+        st.markdown("---")
+        st.subheader("다운로드 기능")
+        download_features(event, event.title, event.id)
+        return
 
     st.title(st.session_state.title)
 
+    # 관전 화면용 실시간 모드 (주소에 ?live=1 을 붙이면 켜진 상태로 시작)
+    if st.sidebar.toggle("실시간 모드", value=st.query_params.get('live') == '1', key="live_mode"):
+        live_board(store, CAR_CLASSES)
+        return
+
     # Call the function
-    name, lap_number, selected_class, formatted_time, bonus_time, penalty_time, formatted_total_time, submit_button, submit_message = input_form(CAR_CLASSES)
+    name, lap_number, selected_class, lap_ms, bonus_ms, penalty_ms, submit_button, submit_message = input_form(CAR_CLASSES)
 
     # 제출 시 데이터 업데이트
     if submit_button and name:
-        submit_update(st.session_state.leaderboard, name, lap_number, selected_class, formatted_time, bonus_time, penalty_time, formatted_total_time, submit_message)
+        submit_update(store, name, lap_number, selected_class, lap_ms, bonus_ms, penalty_ms, submit_message)
 
-    # Process the leaderboard
-    st.session_state.leaderboard = process_leaderboard(st.session_state.leaderboard)
-
-    display_leaderboard_by_class(CAR_CLASSES, st.session_state.leaderboard)
-    display_overall_leaderboard(st.session_state.leaderboard)
+    # 선수별 최고 기록 한 건씩만 순위를 매긴 표
+    best_only = st.sidebar.toggle("최고 기록만 보기", key="best_only")
+    display_leaderboard_by_class(CAR_CLASSES, store, best_only)
+    display_overall_leaderboard(store, best_only)
+    driver_stats_panel(store, ordered_classes(store.classes()))
 
     # 다운로드 기능
     st.markdown("---")
     st.subheader("다운로드 기능")
-    download_features(st.session_state.leaderboard, st.session_state.title)
+    download_features(store, st.session_state.title)
 
     st.markdown("---")
     admin_features()
 
+# 프로파일링을 요청한 세션은 이번 재실행만 cProfile 로 실행하고 보고서를 세션에 보관
+def run():
+    if st.session_state.get('profile_next'):
+        st.session_state.profile_next = False
+
+        def save_report(report):
+            st.session_state.profile_report = report
+
+        profile_call(main, save_report)
+    else:
+        main()
+
 if __name__ == "__main__":
-    main()
+    run()
@@ -0,0 +1,103 @@
+# 가산초 적용 벤치마크: 기존 행 단위(iterrows) 방식 vs 해시 인덱스 + map 방식
+# 사용법: python benchmarks/bench_bonus_join.py [--laps 10000] [--drivers 1000] [--repeat 3]
+import argparse
+import io
+import os
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from const import COLUMN_NAMES, KEY_BONUS_TIME, KEY_BONUS_TIME_MS, KEY_CLASS, KEY_LAP_NUMBER, KEY_NAME, KEY_TOTAL_TIME  # noqa: E402
+from model import apply_bonus_index, build_bonus_index, format_ms, format_secs, from_csv_frame, parse_secs  # noqa: E402
+
+
+def make_data(laps, drivers, seed=0):
+    rng = np.random.default_rng(seed)
+    names = np.array([f"driver{i:05d}" for i in range(drivers)], dtype=object)
+    driver_ids = rng.integers(0, drivers, laps)
+    lap_ms = rng.integers(55_000, 95_000, laps)
+    frame = pd.DataFrame({
+        KEY_NAME: names[driver_ids],
+        KEY_CLASS: rng.choice(["A", "B", "ND", "86", "M", "N"], laps),
+        KEY_LAP_NUMBER: np.arange(laps) // drivers + 1,
+        "시간": format_ms(lap_ms),
+        KEY_BONUS_TIME: format_secs(np.zeros(laps, dtype=np.int64)),
+        "패널티초": format_secs(rng.choice([0, 0, 0, 5000], laps)),
+        KEY_TOTAL_TIME: format_ms(lap_ms),
+    }, columns=COLUMN_NAMES)
+    # 실제 파일과 같은 dtype 이 되도록 CSV 로 한 번 왕복
+    frame = pd.read_csv(io.StringIO(frame.to_csv(index=False)), dtype={KEY_NAME: str, KEY_CLASS: str})
+    bonus_times = pd.DataFrame({
+        KEY_NAME: names[rng.permutation(drivers)],
+        KEY_BONUS_TIME: rng.integers(0, 5000, drivers) / 1000,
+    })
+    return frame, bonus_times
+
+
+# 기존 utils.py 의 행 단위 변환 함수
+def time_str_to_ms(time_str):
+    minutes, seconds, milliseconds = map(int, time_str.split(':'))
+    return (minutes * 60 + seconds) * 1000 + milliseconds
+
+
+def format_time(ms):
+    total_seconds = int(ms) // 1000
+    minutes, seconds = divmod(total_seconds, 60)
+    return f"{minutes}:{seconds:02}:{int(ms) % 1000:03}"
+
+
+# 기존 load_data 와 같은 행 단위 방식
+def rowwise(frame, bonus_times):
+    frame = frame.copy()
+    for i, row in frame.iterrows():
+        name = row[KEY_NAME]
+        bonus = float(row[KEY_BONUS_TIME])
+        penalty = float(row["패널티초"])
+        if name in bonus_times[KEY_NAME].values:
+            bonus = bonus_times.loc[bonus_times[KEY_NAME] == name, KEY_BONUS_TIME].values[0]
+            frame.at[i, KEY_BONUS_TIME] = bonus
+        total_ms = time_str_to_ms(row["시간"]) + (bonus * 1000) + (penalty * 1000)
+        frame.at[i, KEY_TOTAL_TIME] = format_time(total_ms)
+    return frame
+
+
+def vectorized(frame, bonus_times):
+    return apply_bonus_index(from_csv_frame(frame), build_bonus_index(bonus_times))
+
+
+def best_of(func, repeat, *args):
+    best = float('inf')
+    result = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = func(*args)
+        best = min(best, time.perf_counter() - start)
+    return best, result
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--laps', type=int, default=10_000)
+    parser.add_argument('--drivers', type=int, default=1_000)
+    parser.add_argument('--repeat', type=int, default=3)
+    args = parser.parse_args()
+
+    frame, bonus_times = make_data(args.laps, args.drivers)
+    rowwise_sec, expected = best_of(rowwise, 1, frame, bonus_times)
+    vectorized_sec, model = best_of(vectorized, args.repeat, frame, bonus_times)
+
+    # 두 방식의 가산초 결과가 같은지 확인
+    assert np.array_equal(parse_secs(expected[KEY_BONUS_TIME]), model[KEY_BONUS_TIME_MS].to_numpy())
+
+    print(f"laps={args.laps} drivers={args.drivers}")
+    print(f"rowwise    : {rowwise_sec * 1000:10.1f} ms")
+    print(f"vectorized : {vectorized_sec * 1000:10.1f} ms")
+    print(f"speedup    : {rowwise_sec / vectorized_sec:10.1f}x")
+
+
+if __name__ == '__main__':
+    main()
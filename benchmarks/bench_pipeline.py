@@ -0,0 +1,250 @@
+# 리더보드 처리 단계별 벤치마크
+# - 합성 이벤트(1k/10k/100k 기록, CAR_CLASSES 전체, 가산초 표 포함)를 임시 디렉터리에 만들고
+#   로드(load_data), 순위 계산(process_leaderboard), 클래스별 표(display_leaderboard_by_class),
+#   선수별 통계/최고 기록 순위표, 기록 제출, 형식별 내보내기(create_pdf 포함) 시간과 tracemalloc 최대 메모리를 측정
+# - 결과는 JSON 으로 저장하고, --baseline 을 주면 기준 결과보다 느려지거나 메모리를 더 쓴 단계를 보고 (종료 코드 1)
+# 사용법:
+#   python benchmarks/bench_pipeline.py --output baseline.json
+#   python benchmarks/bench_pipeline.py --baseline baseline.json [--tolerance 0.5]
+#   python benchmarks/bench_pipeline.py --sizes 1k,10k --formats csv,md --storage sqlite
+import argparse
+import gc
+import json
+import os
+import platform
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+
+import numpy as np
+import pandas as pd
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from const import BONUS_TIME_FILE, CAR_CLASSES, COLUMN_NAMES, DATA_FILE, FONT_FILE, KEY_BONUS_TIME, KEY_CLASS, KEY_LAP_NUMBER, KEY_NAME, KEY_PENALTY_TIME, KEY_TOTAL_TIME  # noqa: E402
+from exporters import EXPORT_FORMATS, ordered_classes, render_export  # noqa: E402
+from journal import Journal  # noqa: E402
+from model import format_ms, format_secs, to_display  # noqa: E402
+from storage import CsvStorage, SqliteStorage  # noqa: E402
+from store import LeaderboardStore  # noqa: E402
+
+TITLE = "Benchmark"
+# 기록 제출 단계에서 한 번에 제출하는 기록 수
+SUBMIT_LAPS = 100
+# 준비 실행이 이보다 오래 걸린 단계(대용량 PDF 등)는 반복하지 않고 한 번만 측정
+LONG_STAGE_SECONDS = 2.0
+
+
+def parse_size(value):
+    value = value.strip().lower()
+    if value.endswith('k'):
+        return int(float(value[:-1]) * 1000)
+    return int(value)
+
+
+def size_label(laps):
+    return f"{laps // 1000}k" if laps % 1000 == 0 else str(laps)
+
+
+# 합성 이벤트 생성: 선수당 평균 5회 주행, 선수의 20% 는 가산초 표에 등록
+def make_event(laps, seed=0):
+    rng = np.random.default_rng(seed)
+    drivers = max(laps // 5, 1)
+    names = np.array([f"driver{i:06d}" for i in range(drivers)], dtype=object)
+    driver_classes = rng.choice(CAR_CLASSES, drivers)
+    driver_ids = np.arange(laps) % drivers
+    lap_ms = rng.integers(55_000, 95_000, laps)
+    bonus_ms = rng.choice([0, 0, 1000, 2000], laps)
+    penalty_ms = rng.choice([0, 0, 0, 5000], laps)
+    board = pd.DataFrame({
+        KEY_NAME: names[driver_ids],
+        KEY_CLASS: driver_classes[driver_ids],
+        KEY_LAP_NUMBER: np.arange(laps) // drivers + 1,
+        "시간": format_ms(lap_ms),
+        KEY_BONUS_TIME: format_secs(bonus_ms),
+        KEY_PENALTY_TIME: format_secs(penalty_ms),
+        KEY_TOTAL_TIME: format_ms(lap_ms + bonus_ms + penalty_ms),
+    }, columns=COLUMN_NAMES)
+    bonus_drivers = rng.choice(drivers, max(drivers // 5, 1), replace=False)
+    bonus_times = pd.DataFrame({KEY_NAME: names[bonus_drivers], KEY_BONUS_TIME: rng.integers(0, 5000, len(bonus_drivers)) / 1000})
+    return board, bonus_times
+
+
+def write_event(workdir, laps, seed):
+    board, bonus_times = make_event(laps, seed)
+    board.to_csv(os.path.join(workdir, DATA_FILE), index=False, encoding='utf-8')
+    bonus_times.to_csv(os.path.join(workdir, BONUS_TIME_FILE), index=False, encoding='utf-8')
+
+
+def open_store(storage):
+    if storage == 'sqlite':
+        return LeaderboardStore(SqliteStorage())
+    return LeaderboardStore(CsvStorage(journal=Journal()))
+
+
+# 측정 단계 (이름, 함수), 함수는 매 실행마다 처음부터 다시 계산
+def stages(state, storage, formats):
+    def load():
+        if state.get('store') is not None:
+            state['store'].storage.close()
+        store = open_store(storage)
+        store.refresh(force=True)
+        state['store'] = store
+
+    def rank():
+        state['store'].engine.to_model()
+
+    def display_by_class():
+        engine = state['store'].engine
+        state['class_tables'] = [(class_name, to_display(engine.to_model(class_name))) for class_name in ordered_classes(engine.classes())]
+
+    def driver_stats():
+        engine = state['store'].engine
+        engine.stats.to_frame()
+        engine.best_model()
+
+    def submit():
+        store = state['store']
+        run = state['submit_runs'] = state.get('submit_runs', 0) + 1
+        for i in range(SUBMIT_LAPS):
+            store.submit(f"bench{run:03d}-{i:03d}", CAR_CLASSES[i % len(CAR_CLASSES)], 1, 60_000 + i, 0, 0)
+        store.storage.sync()
+
+    result = [('load', load), ('rank', rank), ('display_by_class', display_by_class), ('driver_stats', driver_stats),
+              ('submit', submit)]
+
+    def exporter(fmt):
+        def export():
+            store = state['store']
+            render_export(fmt, TITLE, to_display(store.engine.to_model()), state['class_tables'])
+        return export
+
+    for fmt in formats:
+        result.append((f"export_{fmt}", exporter(fmt)))
+    return result
+
+
+def _timed(fn):
+    gc.collect()
+    gc.disable()
+    try:
+        start = time.perf_counter()
+        fn()
+        return time.perf_counter() - start
+    finally:
+        gc.enable()
+
+
+# timeit 과 같이 측정 중에는 GC 를 끄고, 준비 실행 후 repeat 번 측정한 최솟값 사용
+# 최대 메모리는 tracemalloc 을 켠 별도 실행에서 측정 (tracemalloc 은 실행 시간을 늘림)
+def measure(fn, repeat):
+    warmup = _timed(fn)  # 준비 실행 (import, 캐시, SQLite 이전 등은 측정에서 제외)
+    seconds = [_timed(fn) for _ in range(repeat if warmup < LONG_STAGE_SECONDS else 1)]
+    tracemalloc.start()
+    try:
+        fn()
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return {'seconds': min(seconds), 'median_seconds': float(np.median(seconds)), 'runs': len(seconds), 'peak_mb': peak / 1024 / 1024}
+
+
+def run_size(laps, args, formats):
+    results = {}
+    with tempfile.TemporaryDirectory() as workdir:
+        write_event(workdir, laps, args.seed)
+        if args.font:
+            shutil.copy(args.font, os.path.join(workdir, FONT_FILE))
+        os.chdir(workdir)
+        state = {}
+        try:
+            for name, fn in stages(state, args.storage, formats):
+                if name == 'export_pdf' and not os.path.exists(FONT_FILE):
+                    results[name] = {'skipped': f"폰트 파일 없음 ({FONT_FILE}, --font 로 지정)"}
+                    continue
+                results[name] = measure(fn, args.repeat)
+                print(f"  {size_label(laps):>5} {name:<18} {results[name]['seconds'] * 1000:10.1f} ms  {results[name]['peak_mb']:8.1f} MB", file=sys.stderr)
+        finally:
+            if state.get('store') is not None:
+                state['store'].storage.close()
+            os.chdir(ROOT)
+    return results
+
+
+def git_commit():
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=ROOT, capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+# 기준 결과와 비교하여 느려진(또는 메모리를 더 쓴) 단계 목록 반환
+# 짧은 단계의 측정 오차를 무시하도록 시간은 min_delta_ms 이상 차이날 때만 비교
+def compare(results, baseline, tolerance, min_delta_ms):
+    regressions = []
+    for size, stage_results in results['results'].items():
+        for stage, current in stage_results.items():
+            base = baseline.get('results', {}).get(size, {}).get(stage)
+            if base is None or 'seconds' not in base or 'seconds' not in current:
+                continue
+            delta_ms = (current['seconds'] - base['seconds']) * 1000
+            if delta_ms > min_delta_ms and current['seconds'] > base['seconds'] * (1 + tolerance):
+                regressions.append(f"{size} {stage}: {base['seconds'] * 1000:.1f} ms -> {current['seconds'] * 1000:.1f} ms")
+            if current['peak_mb'] > max(base['peak_mb'] * (1 + tolerance), base['peak_mb'] + 1):
+                regressions.append(f"{size} {stage}: peak {base['peak_mb']:.1f} MB -> {current['peak_mb']:.1f} MB")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="리더보드 처리 단계별 벤치마크")
+    parser.add_argument('--sizes', default='1k,10k,100k', help="기록 수 목록 (예: 1k,10k,100k)")
+    parser.add_argument('--formats', default=','.join(EXPORT_FORMATS), help="측정할 내보내기 형식")
+    parser.add_argument('--storage', choices=['csv', 'sqlite'], default='csv')
+    parser.add_argument('--repeat', type=int, default=5, help="단계별 반복 횟수 (최솟값 사용)")
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--font', help=f"PDF 측정에 사용할 TTF 파일 (기본: 저장소의 {FONT_FILE})")
+    parser.add_argument('--output', help="결과 JSON 파일 (없으면 표준 출력)")
+    parser.add_argument('--baseline', help="비교할 기준 결과 JSON 파일")
+    parser.add_argument('--tolerance', type=float, default=0.5, help="허용하는 증가 비율 (공유 장비의 측정 오차를 고려해 넉넉하게)")
+    parser.add_argument('--min-delta-ms', type=float, default=5.0, help="이보다 작은 시간 차이는 무시")
+    args = parser.parse_args()
+
+    formats = [fmt.strip() for fmt in args.formats.split(',') if fmt.strip()]
+    unknown = [fmt for fmt in formats if fmt not in EXPORT_FORMATS]
+    if unknown:
+        parser.error(f"지원하지 않는 형식입니다: {', '.join(unknown)}")
+    if args.font is None and os.path.exists(os.path.join(ROOT, FONT_FILE)):
+        args.font = os.path.join(ROOT, FONT_FILE)
+
+    results = {
+        'meta': {'commit': git_commit(), 'storage': args.storage, 'repeat': args.repeat, 'seed': args.seed,
+                 'python': platform.python_version(), 'pandas': pd.__version__, 'numpy': np.__version__,
+                 'platform': platform.platform(), 'created_at': time.strftime('%Y-%m-%d %H:%M:%S')},
+        'results': {},
+    }
+    for laps in (parse_size(size) for size in args.sizes.split(',')):
+        results['results'][size_label(laps)] = run_size(laps, args, formats)
+
+    text = json.dumps(results, ensure_ascii=False, indent=2)
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            f.write(text + '\n')
+    else:
+        print(text)
+
+    if args.baseline:
+        with open(args.baseline, encoding='utf-8') as f:
+            baseline = json.load(f)
+        regressions = compare(results, baseline, args.tolerance, args.min_delta_ms)
+        if regressions:
+            print("REGRESSION:\n  " + "\n  ".join(regressions), file=sys.stderr)
+            sys.exit(1)
+        print(f"OK (기준: {baseline['meta'].get('commit')}, 허용 {args.tolerance:.0%})", file=sys.stderr)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,120 @@
+# 시작 시간 벤치마크: 새 Python 프로세스에서 모듈을 import 하는 데 걸리는 시간
+# - 모듈마다 새 프로세스를 --repeat 번 띄워 import 시간(최솟값/중앙값)을 측정하고,
+#   -X importtime 으로 누적 시간이 큰 하위 모듈과 시작 시 불러오지 않아야 할 모듈(reportlab 등)이 있는지 확인
+# - 첫 내보내기(PDF 포함)까지의 시간도 따로 측정하여 지연 로딩 비용이 어디로 옮겨졌는지 확인
+# 사용법: python benchmarks/bench_startup.py [--modules app,api,ingest] [--repeat 5] [--output startup.json]
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+
+import numpy as np
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from const import FONT_FILE  # noqa: E402
+
+# 시작 시 불러오지 않아야 하는 모듈 (첫 내보내기 때 불러옴)
+LAZY_MODULES = ('reportlab', 'tabulate')
+
+IMPORT_SCRIPT = """
+import json, sys, time
+start = time.perf_counter()
+import {module}
+seconds = time.perf_counter() - start
+print(json.dumps([seconds, sorted({{name.split('.')[0] for name in sys.modules if name.startswith({lazy!r})}})]))
+"""
+
+FIRST_EXPORT_SCRIPT = """
+import json, time
+start = time.perf_counter()
+from exporters import render_export
+from engine import LeaderboardEngine
+from model import to_display
+imported = time.perf_counter() - start
+render_export('{fmt}', 'startup', to_display(LeaderboardEngine().to_model()), [])
+print(json.dumps([imported, time.perf_counter() - start]))
+"""
+
+
+def run_python(code, cwd, *options):
+    return subprocess.run([sys.executable, *options, '-c', code], cwd=cwd, capture_output=True, text=True, check=True,
+                          env=dict(os.environ, PYTHONPATH=ROOT))
+
+
+# -X importtime 출력에서 누적 시간이 큰 모듈 상위 n 개 (ms)
+def top_imports(module, cwd, n):
+    stderr = run_python(f"import {module}", cwd, '-X', 'importtime').stderr
+    imports = []
+    for line in stderr.splitlines():
+        if not line.startswith('import time:') or 'cumulative' in line:
+            continue
+        _, cumulative, name = line[len('import time:'):].split('|')
+        imports.append((name.strip(), int(cumulative) / 1000))
+    return sorted(imports, key=lambda item: item[1], reverse=True)[:n]
+
+
+def measure_import(module, cwd, repeat):
+    seconds, loaded = [], set()
+    for _ in range(repeat):
+        value, lazy_loaded = json.loads(run_python(IMPORT_SCRIPT.format(module=module, lazy=LAZY_MODULES), cwd).stdout)
+        seconds.append(value)
+        loaded.update(lazy_loaded)
+    return {'import_ms': min(seconds) * 1000, 'median_ms': float(np.median(seconds)) * 1000, 'lazy_loaded': sorted(loaded)}
+
+
+def measure_first_export(fmt, cwd, repeat):
+    imported, total = [], []
+    for _ in range(repeat):
+        value = json.loads(run_python(FIRST_EXPORT_SCRIPT.format(fmt=fmt), cwd).stdout)
+        imported.append(value[0])
+        total.append(value[1])
+    return {'import_ms': min(imported) * 1000, 'first_export_ms': min(total) * 1000}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="모듈 import(시작) 시간 벤치마크")
+    parser.add_argument('--modules', default='app,api,ingest,store')
+    parser.add_argument('--formats', default='csv,pdf', help="첫 내보내기 시간을 측정할 형식 (PDF 는 폰트 파일 필요)")
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--top', type=int, default=10, help="표시할 누적 import 시간 상위 모듈 수")
+    parser.add_argument('--output', help="결과 JSON 파일")
+    args = parser.parse_args()
+
+    results = {'python': sys.version.split()[0], 'modules': {}, 'first_export': {}}
+    failed = False
+    # 저장소 파일을 건드리지 않도록 빈 임시 디렉터리에서 실행 (PDF 폰트는 저장소 것을 사용)
+    with tempfile.TemporaryDirectory() as cwd:
+        for module in args.modules.split(','):
+            result = measure_import(module, cwd, args.repeat)
+            result['top_imports'] = top_imports(module, cwd, args.top)
+            results['modules'][module] = result
+            print(f"{module:<10} import {result['import_ms']:8.1f} ms (median {result['median_ms']:.1f})"
+                  + (f"  시작 시 불러온 모듈: {', '.join(result['lazy_loaded'])}" if result['lazy_loaded'] else ""))
+            for name, ms in result['top_imports'][1:]:
+                print(f"    {name:<40} {ms:8.1f} ms")
+            failed = failed or bool(result['lazy_loaded'])
+
+        if os.path.exists(os.path.join(ROOT, FONT_FILE)):
+            os.symlink(os.path.join(ROOT, FONT_FILE), os.path.join(cwd, FONT_FILE))
+        for fmt in args.formats.split(','):
+            if fmt == 'pdf' and not os.path.exists(os.path.join(cwd, FONT_FILE)):
+                results['first_export'][fmt] = {'skipped': f"폰트 파일 없음 ({FONT_FILE})"}
+                print(f"first export {fmt}: 건너뜀 (폰트 파일 없음)")
+                continue
+            result = results['first_export'][fmt] = measure_first_export(fmt, cwd, args.repeat)
+            print(f"first export {fmt:<4} import {result['import_ms']:8.1f} ms, total {result['first_export_ms']:8.1f} ms")
+
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(results, f, ensure_ascii=False, indent=2)
+    if failed:
+        print(f"FAIL: 시작 시 {', '.join(LAZY_MODULES)} 중 일부를 불러옴")
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,108 @@
+# 동시 제출 부하 테스트: 여러 프로세스가 같은 저장소에 동시에 기록을 제출
+# - 각 제출자는 자신의 기록과 모든 제출자가 함께 노리는 공유 기록(중복 경쟁)을 번갈아 제출
+# - 끝난 뒤 새로 읽은 리더보드에 성공한 기록이 모두 있는지, 공유 기록은 정확히 한 명만 성공했는지,
+#   쓰기 지연 시간(p99)이 기준 이하인지 확인 (실패 시 종료 코드 1)
+# 사용법: python benchmarks/stress_submit.py [--submitters 20] [--laps 200] [--storage csv|sqlite] [--max-p99-ms 500]
+import argparse
+import multiprocessing
+import os
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from const import KEY_CLASS, KEY_LAP_NUMBER, KEY_NAME  # noqa: E402
+from storage import create_storage  # noqa: E402
+from store import LeaderboardStore  # noqa: E402
+
+
+def submitter(index, laps, shared_every, storage, workdir, barrier, results):
+    os.chdir(workdir)
+    store = LeaderboardStore(create_storage(storage))
+    store.refresh()
+    accepted, conflicts, latencies = [], 0, []
+    barrier.wait()
+    for lap_number in range(1, laps + 1):
+        if lap_number % shared_every == 0:
+            name = "shared"
+        else:
+            name = f"driver{index:02d}"
+        lap_ms = 60_000 + index * 1000 + lap_number
+        start = time.perf_counter()
+        ok = store.submit(name, "A", lap_number, lap_ms, 0, 0)
+        latencies.append(time.perf_counter() - start)
+        if ok:
+            accepted.append(("A", name, lap_number))
+        else:
+            conflicts += 1
+    store.storage.sync()
+    results.put((index, accepted, conflicts, latencies))
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--submitters', type=int, default=20)
+    parser.add_argument('--laps', type=int, default=200)
+    parser.add_argument('--shared-every', type=int, default=5, help="이 주행 차수마다 공유 기록을 제출")
+    parser.add_argument('--storage', choices=['csv', 'sqlite'], default='csv')
+    parser.add_argument('--max-p99-ms', type=float, default=500.0)
+    args = parser.parse_args()
+
+    ctx = multiprocessing.get_context('spawn')
+    with tempfile.TemporaryDirectory() as workdir:
+        barrier = ctx.Barrier(args.submitters)
+        results = ctx.Queue()
+        processes = [ctx.Process(target=submitter, args=(i, args.laps, args.shared_every, args.storage, workdir, barrier, results))
+                     for i in range(args.submitters)]
+        start = time.perf_counter()
+        for process in processes:
+            process.start()
+        collected = [results.get() for _ in processes]
+        for process in processes:
+            process.join()
+        elapsed = time.perf_counter() - start
+
+        # 처음부터 다시 읽은 리더보드로 확인
+        os.chdir(workdir)
+        store = LeaderboardStore(create_storage(args.storage))
+        store.refresh()
+        stored = set(store.ranked()[[KEY_CLASS, KEY_NAME, KEY_LAP_NUMBER]].itertuples(index=False, name=None))
+        store.storage.close()
+        os.chdir(ROOT)
+
+    accepted = [key for _, keys, _, _ in collected for key in keys]
+    conflicts = sum(count for _, _, count, _ in collected)
+    latencies = np.array([value for _, _, _, values in collected for value in values]) * 1000
+    shared_laps = {lap for lap in range(1, args.laps + 1) if lap % args.shared_every == 0}
+    shared_accepted = [key for key in accepted if key[1] == "shared"]
+
+    failures = []
+    missing = set(accepted) - stored
+    if missing:
+        failures.append(f"유실된 기록 {len(missing)}건")
+    if len(accepted) != len(set(accepted)):
+        failures.append(f"두 번 이상 성공한 기록 {len(accepted) - len(set(accepted))}건")
+    if len(stored) != len(set(accepted)):
+        failures.append(f"저장된 기록 수 {len(stored)} != 성공한 기록 수 {len(set(accepted))}")
+    if sorted(key[2] for key in shared_accepted) != sorted(shared_laps):
+        failures.append("공유 기록이 정확히 한 번씩 성공하지 않음")
+    p99 = float(np.percentile(latencies, 99))
+    if p99 > args.max_p99_ms:
+        failures.append(f"p99 {p99:.1f} ms > {args.max_p99_ms} ms")
+
+    print(f"storage={args.storage} submitters={args.submitters} laps={args.laps}")
+    print(f"submissions : {len(latencies)} ({len(latencies) / elapsed:.0f}/s), accepted {len(accepted)}, conflicts {conflicts}")
+    print(f"latency ms  : p50 {np.percentile(latencies, 50):.2f}  p99 {p99:.2f}  max {latencies.max():.2f}")
+    print(f"stored      : {len(stored)}")
+    if failures:
+        print("FAIL: " + "; ".join(failures))
+        sys.exit(1)
+    print("OK")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,135 @@
+import threading
+import time
+from collections import deque
+
+from const import LIVE_DEBOUNCE_SECONDS, LIVE_DELTA_ROWS, LIVE_HISTORY, LIVE_WATCH_SECONDS
+
+
+# 하나 이상의 변경을 합친 묶음
+# - classes 가 None 이면 전체 변경 (초기화, 다시 읽기 등), 아니면 바뀐 클래스 집합
+# - added / removed 는 (클래스, 이름, 주행 차수) 키 목록 (LIVE_DELTA_ROWS 건까지만 보관, 건수는 전체)
+class ChangeBatch:
+    def __init__(self, seq, version, classes, added, removed, added_count, removed_count):
+        self.seq = seq
+        self.version = version
+        self.classes = classes
+        self.added = added
+        self.removed = removed
+        self.added_count = added_count
+        self.removed_count = removed_count
+
+    def changed(self, class_name):
+        return self.classes is None or class_name in self.classes
+
+
+# 여러 묶음을 하나로 합침 (화면이 여러 묶음을 한 번에 받은 경우)
+def merge_batches(batches):
+    classes = set()
+    added, removed = [], []
+    added_count = removed_count = 0
+    for batch in batches:
+        if batch.classes is None:
+            classes = None
+            # 전체 변경 이전의 증감은 의미가 없음
+            added, removed = [], []
+            added_count = removed_count = 0
+        elif classes is not None:
+            classes.update(batch.classes)
+        added.extend(batch.added)
+        removed.extend(batch.removed)
+        added_count += batch.added_count
+        removed_count += batch.removed_count
+    last = batches[-1]
+    return ChangeBatch(last.seq, last.version, classes, added[-LIVE_DELTA_ROWS:], removed[-LIVE_DELTA_ROWS:], added_count, removed_count)
+
+
+# 저장소 변경을 구독자(관전 화면)에게 전달하는 프로세스 내 pub/sub
+# - publish 된 변경은 바로 전달하지 않고 처음 변경 후 LIVE_DEBOUNCE_SECONDS 동안 모아 한 묶음으로 전달
+#   (연속 제출이 몰려도 화면은 한 번만 갱신되고, 지연은 debounce 시간을 넘지 않음)
+# - 구독자는 wait 에서 조건 변수로 잠들어 있으므로 화면 수가 늘어도 변경이 없으면 CPU 를 쓰지 않음
+# - watch 가 주어지면 LIVE_WATCH_SECONDS 마다 호출하여 다른 프로세스가 쓴 변경도 감지
+class ChangeFeed:
+    def __init__(self, debounce=LIVE_DEBOUNCE_SECONDS, history=LIVE_HISTORY, watch_interval=LIVE_WATCH_SECONDS):
+        self.debounce = debounce
+        self.watch_interval = watch_interval
+        self._lock = threading.Lock()
+        self._pending_cond = threading.Condition(self._lock)
+        self._batch_cond = threading.Condition(self._lock)
+        self._pending = []
+        self._first_pending = None
+        self._batches = deque(maxlen=history)
+        self._thread = None
+        self._watch = None
+        self.seq = 0
+        self.published = 0
+
+    # 변경 알림 (저장소 lock 안에서 호출되므로 가볍게 유지)
+    def publish(self, version, class_name=None, added=(), removed=()):
+        with self._lock:
+            added, removed = list(added), list(removed)
+            self._pending.append((version, class_name, added[-LIVE_DELTA_ROWS:], removed[-LIVE_DELTA_ROWS:], len(added), len(removed)))
+            self.published += 1
+            if self._first_pending is None:
+                self._first_pending = time.monotonic()
+                self._pending_cond.notify()
+
+    def start(self, watch=None):
+        with self._lock:
+            self._watch = watch
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="leaderboard-change-feed", daemon=True)
+                self._thread.start()
+
+    def _run(self):
+        next_watch = time.monotonic() + self.watch_interval
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                if self._first_pending is not None and now >= self._first_pending + self.debounce:
+                    self._flush()
+                    continue
+                deadline = next_watch
+                if self._first_pending is not None:
+                    deadline = min(deadline, self._first_pending + self.debounce)
+                if deadline > now:
+                    self._pending_cond.wait(deadline - now)
+                watch = self._watch
+            if watch is not None and time.monotonic() >= next_watch:
+                try:
+                    watch()
+                except Exception:
+                    pass
+                next_watch = time.monotonic() + self.watch_interval
+
+    def _flush(self):
+        classes = set()
+        added, removed = [], []
+        added_count = removed_count = 0
+        for version, class_name, change_added, change_removed, change_added_count, change_removed_count in self._pending:
+            if class_name is None:
+                classes = None
+                added, removed = [], []
+                added_count = removed_count = 0
+            elif classes is not None:
+                classes.add(class_name)
+            added.extend(change_added)
+            removed.extend(change_removed)
+            added_count += change_added_count
+            removed_count += change_removed_count
+        self.seq += 1
+        self._batches.append(ChangeBatch(self.seq, self._pending[-1][0], classes, added[-LIVE_DELTA_ROWS:], removed[-LIVE_DELTA_ROWS:],
+                                         added_count, removed_count))
+        self._pending = []
+        self._first_pending = None
+        self._batch_cond.notify_all()
+
+    # since 이후의 묶음 목록 (timeout 동안 없으면 빈 목록, 보관 범위를 벗어났으면 None → 전체 다시 그리기)
+    def wait(self, since, timeout=None):
+        with self._lock:
+            if self.seq <= since:
+                self._batch_cond.wait_for(lambda: self.seq > since, timeout)
+            if self.seq <= since:
+                return []
+            if not self._batches or self._batches[0].seq > since + 1:
+                return None
+            return [batch for batch in self._batches if batch.seq > since]
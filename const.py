@@ -1,11 +1,70 @@
+import os
+
 # 파일 경로
 DATA_FILE = 'leaderboard.csv'
 TITLE_FILE = 'title.txt'
 BACKUP_FILE = 'leaderboard_backup.csv'
 BONUS_TIME_FILE = 'bonus_times.csv'
+JOURNAL_FILE = 'leaderboard.journal'
+FONT_FILE = 'NotoSansKR-Regular.ttf'
+SQLITE_FILE = 'leaderboard.db'
+EVENTS_DIR = 'events'  # 보관된 이벤트 디렉터리
+
+# 저장소 종류 ('csv': CSV 스냅샷 + 저널, 'sqlite': SQLite)
+STORAGE_BACKEND = os.getenv('LEADERBOARD_STORAGE', 'csv')
+
+# 저널 설정
+JOURNAL_FSYNC_BATCH = 8  # 이 건수마다 fsync
+JOURNAL_FSYNC_INTERVAL = 1.0  # 마지막 fsync 이후 이 시간(초)이 지나면 fsync (추가할 때 또는 변경 감시 스레드가 확인할 때)
+JOURNAL_COMPACT_EVENTS = 500  # 이 건수가 쌓이면 스냅샷으로 압축
+
+# 표에 처음 표시할 행 수 ("더 보기" 마다 이만큼 추가)
+TABLE_PAGE_SIZE = 50
+
+# 내보내기 설정
+EXPORT_CACHE_SIZE = 16  # (version, 제목, 형식) 별로 보관할 최대 결과 수
+EXPORT_CHUNK_ROWS = 1000  # CSV/HTML/Markdown 생성 시 한 번에 처리할 행 수
+PDF_NAME_WRAP_CHARS = 10  # 이보다 긴 이름만 줄바꿈 가능한 셀로 생성
+
+# 백그라운드 렌더링 설정
+RENDER_WORKERS = 2  # PDF/HTML 생성 프로세스 수
+RENDER_POLL_SECONDS = 1  # 진행률 표시 갱신 간격(초)
+
+# 타이밍 데이터 가져오기 설정
+INGEST_CHUNK_ROWS = 5000  # 한 번에 읽어 검증할 행 수
+INGEST_ERROR_SAMPLES = 20  # 보고서에 보관할 거부 행 예시 수
+
+# HTTP API 설정
+API_HOST = '0.0.0.0'
+API_PORT = 8502
+API_ADMIN_HEADER = 'X-Admin-Password'  # 삭제 요청에 필요한 관리자 비밀번호 헤더
+API_BODY_CACHE_SIZE = 256  # (클래스, limit 등) 요청별로 보관할 최대 응답 본문 수
+
+# 보관된 이벤트 중 메모리에 열어 둘 최대 수 (나머지는 볼 때 다시 읽음)
+EVENT_CACHE_SIZE = 2
+
+# 실시간(관전) 화면 설정
+LIVE_DEBOUNCE_SECONDS = 0.3  # 처음 변경 후 이 시간 동안의 변경을 모아 한 번에 전달
+LIVE_WATCH_SECONDS = 1.0  # 다른 프로세스가 쓴 변경을 확인하는 간격(초)
+LIVE_HEARTBEAT_SECONDS = 2.0  # 변경이 없을 때 화면 연결을 확인하는 간격(초)
+LIVE_HISTORY = 100  # 보관할 변경 묶음 수 (이보다 뒤처진 화면은 전체를 다시 그림)
+LIVE_DELTA_ROWS = 20  # 변경 묶음에 보관할 추가/삭제 기록 수
+
+# 초당 재실행 수 및 접속 세션 수 측정 구간(초)
+RERUN_WINDOW_SECONDS = 60
+COMMIT_LATENCY_SAMPLES = 1000  # 쓰기 지연 시간 통계에 사용할 최근 쓰기 수
+
+# 성능 측정 설정
+METRICS_SAMPLES = 1000  # 구간별 p50/p99 계산에 사용할 최근 측정 수
+METRICS_PREFIX = 'leaderboard'  # Prometheus 지표 이름 접두어
+PROFILE_TOP_FUNCTIONS = 30  # 프로파일 보고서에 표시할 함수 수 (누적 시간 순)
+
+# 클래스 목록
+CAR_CLASSES = ["A", "B", "ND", "86", "M", "N"]
 
 # 전역 변수
 DEFAULT_TITLE = "🏆 GCK Lap time board"
+FONT_NAME = "NotoSansKR"
 KEY_NAME = "이름"
 KEY_CLASS = "클래스"
 KEY_LAP_NUMBER = "주행 차수"
@@ -14,11 +73,31 @@ KEY_BONUS_TIME = "가산초"
 KEY_PENALTY_TIME = "패널티초"
 KEY_TOTAL_TIME = "합계 시간"
 KEY_TOTAL_TIME_MS = "합계 시간(ms)"
+KEY_LAP_TIME_MS = "시간(ms)"
+KEY_BONUS_TIME_MS = "가산초(ms)"
+KEY_PENALTY_TIME_MS = "패널티초(ms)"
 KEY_DIFF_TIME = "시간 차이"
+KEY_DIFF_TIME_MS = "시간 차이(ms)"
 KEY_RANKING = "순위"
+KEY_LAP_COUNT = "주행 수"
+KEY_BEST_LAP_NUMBER = "최고 기록 주행 차수"
+KEY_BEST_TIME = "최고 기록"
+KEY_BEST_TIME_MS = "최고 기록(ms)"
+KEY_AVERAGE_TIME = "평균"
+KEY_AVERAGE_TIME_MS = "평균(ms)"
+KEY_STD_TIME = "표준편차"
+KEY_STD_TIME_MS = "표준편차(ms)"
+KEY_FIRST_TIME = "첫 주행"
+KEY_FIRST_TIME_MS = "첫 주행(ms)"
+KEY_LAST_TIME = "마지막 주행"
+KEY_LAST_TIME_MS = "마지막 주행(ms)"
+KEY_IMPROVEMENT = "향상"
+KEY_IMPROVEMENT_MS = "향상(ms)"
 KEY_MM = "분"
 KEY_SS = "초"
 KEY_MS = "밀리초"
 COLUMN_NAMES = [KEY_NAME, KEY_CLASS, KEY_LAP_NUMBER, KEY_LAP_TIME, KEY_BONUS_TIME, KEY_PENALTY_TIME, KEY_TOTAL_TIME]
+DISPLAY_COLUMNS = [KEY_RANKING, KEY_CLASS, KEY_NAME, KEY_LAP_NUMBER, KEY_LAP_TIME, KEY_BONUS_TIME, KEY_PENALTY_TIME, KEY_TOTAL_TIME, KEY_DIFF_TIME]
+STATS_DISPLAY_COLUMNS = [KEY_CLASS, KEY_NAME, KEY_LAP_COUNT, KEY_BEST_TIME, KEY_BEST_LAP_NUMBER, KEY_AVERAGE_TIME, KEY_STD_TIME, KEY_FIRST_TIME, KEY_LAST_TIME, KEY_IMPROVEMENT]
 ADMIN_PASSWORD = "gck@admin" #os.getenv("ADMIN_PASSWORD")  # 환경 변수로부터 비밀번호 불러오기
 
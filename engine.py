@@ -0,0 +1,188 @@
+from bisect import bisect_left, insort
+
+import numpy as np
+import pandas as pd
+
+from const import KEY_BONUS_TIME_MS, KEY_CLASS, KEY_DIFF_TIME_MS, KEY_LAP_NUMBER, KEY_LAP_TIME_MS, KEY_NAME, KEY_PENALTY_TIME_MS, KEY_RANKING, KEY_TOTAL_TIME_MS
+from model import empty_model, rank_and_gap
+from stats import DriverStats
+
+
+# 증분 리더보드 엔진
+# - (클래스, 이름, 주행 차수) 키로 기록을 해시에 보관하여 중복 확인은 O(1)
+# - 전체/클래스별 순서는 (합계 시간, 입력 순번, 키) 정렬 리스트로 유지하여 위치 탐색은 O(log n)
+# - 순위와 시간 차이는 정렬 위치에서 바로 계산되므로 삽입/삭제 시 바뀌는 값은 이웃 기록뿐
+# - 선수별 통계(최고 기록, 평균, 표준편차 등)도 삽입/삭제 시 해당 선수만 갱신
+class LeaderboardEngine:
+    def __init__(self):
+        self._entries = {}
+        self._overall = []
+        self._by_class = {}
+        self._seq = 0
+        self.stats = DriverStats()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def __contains__(self, key):
+        return key in self._entries
+
+    # 클래스, 이름, 주행 차수 중복 확인
+    def exists(self, class_name, name, lap_number):
+        return (class_name, name, int(lap_number)) in self._entries
+
+    # 기록 추가 (이미 존재하면 False 반환)
+    def insert(self, name, class_name, lap_number, lap_ms, bonus_ms, penalty_ms):
+        key = (class_name, name, int(lap_number))
+        if key in self._entries:
+            return False
+        lap_ms, bonus_ms, penalty_ms = int(lap_ms), int(bonus_ms), int(penalty_ms)
+        total_ms = lap_ms + bonus_ms + penalty_ms
+        item = (total_ms, self._seq, key)
+        self._seq += 1
+        self._entries[key] = (lap_ms, bonus_ms, penalty_ms, item)
+        insort(self._overall, item)
+        insort(self._by_class.setdefault(class_name, []), item)
+        self.stats.add(item)
+        return True
+
+    # 여러 기록을 한 번에 추가 (정렬은 마지막에 한 번만)
+    # rows: (이름, 클래스, 주행 차수, 랩타임 ms, 가산초 ms, 패널티초 ms) 목록, 추가된 행만 반환
+    def insert_many(self, rows):
+        inserted = []
+        touched = set()
+        for row in rows:
+            name, class_name, lap_number, lap_ms, bonus_ms, penalty_ms = row
+            key = (class_name, name, int(lap_number))
+            if key in self._entries:
+                continue
+            lap_ms, bonus_ms, penalty_ms = int(lap_ms), int(bonus_ms), int(penalty_ms)
+            item = (lap_ms + bonus_ms + penalty_ms, self._seq, key)
+            self._seq += 1
+            self._entries[key] = (lap_ms, bonus_ms, penalty_ms, item)
+            self._overall.append(item)
+            self._by_class.setdefault(class_name, []).append(item)
+            touched.add(class_name)
+            inserted.append(row)
+        if inserted:
+            self._overall.sort()
+            for class_name in touched:
+                self._by_class[class_name].sort()
+            self.stats.add_many(self._entries[(row[1], row[0], int(row[2]))][3] for row in inserted)
+        return inserted
+
+    # 기록 삭제 (없으면 False 반환)
+    def delete(self, class_name, name, lap_number):
+        key = (class_name, name, int(lap_number))
+        entry = self._entries.pop(key, None)
+        if entry is None:
+            return False
+        item = entry[3]
+        self._remove(self._overall, item)
+        class_items = self._by_class[class_name]
+        self._remove(class_items, item)
+        if not class_items:
+            del self._by_class[class_name]
+        self.stats.remove(item)
+        return True
+
+    # 전체 순위 기준 위치(0부터)의 기록 키 (클래스, 이름, 주행 차수)
+    def key_at(self, position):
+        if position < 0 or position >= len(self._overall):
+            return None
+        return self._overall[position][2]
+
+    # 전체 순위 기준 위치(0부터)의 기록 삭제
+    def delete_at(self, position):
+        key = self.key_at(position)
+        if key is None:
+            return False
+        return self.delete(*key)
+
+    def clear(self):
+        self._entries.clear()
+        self._overall.clear()
+        self._by_class.clear()
+        self.stats.clear()
+
+    def classes(self):
+        return list(self._by_class)
+
+    # 클래스의 기록 수
+    def count(self, class_name):
+        return len(self._by_class.get(class_name, ()))
+
+    @staticmethod
+    def _remove(items, item):
+        index = bisect_left(items, item)
+        del items[index]
+
+    def _items(self, class_name=None):
+        if class_name is None:
+            return self._overall
+        return self._by_class.get(class_name, [])
+
+    # 기록의 순위(동일한 시간은 같은 순위)와 앞 기록과의 시간 차이
+    def rank_and_gap(self, class_name, name, lap_number, overall=False):
+        key = (class_name, name, int(lap_number))
+        item = self._entries[key][3]
+        items = self._items(None if overall else class_name)
+        index = bisect_left(items, item)
+        rank = bisect_left(items, (item[0],)) + 1
+        gap = item[0] - items[index - 1][0] if index > 0 else 0
+        return rank, gap
+
+    # 순위가 계산된 모델(전체 또는 클래스별)로 변환
+    # limit 이 주어지면 앞에서부터 limit 건만 (순위와 시간 차이는 앞 기록에만 의존하므로 앞부분만으로도 정확함)
+    def to_model(self, class_name=None, limit=None):
+        return self._model(self._items(class_name)[:limit])
+
+    # 선수별 최고 기록만의 순위 모델 (전체 또는 클래스별, limit 은 to_model 과 같음)
+    def best_model(self, class_name=None, limit=None):
+        return self._model(self.stats.best_items(class_name, limit))
+
+    def _model(self, items):
+        if not items:
+            model = empty_model()
+            model[KEY_RANKING] = pd.Series(dtype=np.int64)
+            model[KEY_DIFF_TIME_MS] = pd.Series(dtype=np.int64)
+            return model
+        entries = [self._entries[item[2]] for item in items]
+        totals = np.fromiter((item[0] for item in items), dtype=np.int64, count=len(items))
+        ranks, gaps = rank_and_gap(totals)
+        return pd.DataFrame({
+            KEY_NAME: [item[2][1] for item in items],
+            KEY_CLASS: [item[2][0] for item in items],
+            KEY_LAP_NUMBER: np.fromiter((item[2][2] for item in items), dtype=np.int64, count=len(items)),
+            KEY_LAP_TIME_MS: np.fromiter((entry[0] for entry in entries), dtype=np.int64, count=len(items)),
+            KEY_BONUS_TIME_MS: np.fromiter((entry[1] for entry in entries), dtype=np.int64, count=len(items)),
+            KEY_PENALTY_TIME_MS: np.fromiter((entry[2] for entry in entries), dtype=np.int64, count=len(items)),
+            KEY_TOTAL_TIME_MS: totals,
+            KEY_RANKING: ranks,
+            KEY_DIFF_TIME_MS: gaps,
+        })
+
+    # 모델로부터 엔진 생성 (중복 키는 먼저 나온 기록만 유지)
+    @classmethod
+    def from_model(cls, model):
+        engine = cls()
+        if model.empty:
+            return engine
+        rows = zip(model[KEY_NAME], model[KEY_CLASS], model[KEY_LAP_NUMBER],
+                   model[KEY_LAP_TIME_MS], model[KEY_BONUS_TIME_MS], model[KEY_PENALTY_TIME_MS])
+        for name, class_name, lap_number, lap_ms, bonus_ms, penalty_ms in rows:
+            key = (class_name, name, int(lap_number))
+            if key in engine._entries:
+                continue
+            total_ms = int(lap_ms) + int(bonus_ms) + int(penalty_ms)
+            item = (total_ms, engine._seq, key)
+            engine._seq += 1
+            engine._entries[key] = (int(lap_ms), int(bonus_ms), int(penalty_ms), item)
+            engine._overall.append(item)
+            engine._by_class.setdefault(class_name, []).append(item)
+        # 일괄 생성 시에는 한 번만 정렬
+        engine._overall.sort()
+        for items in engine._by_class.values():
+            items.sort()
+        engine.stats.add_many(engine._overall)
+        return engine
@@ -0,0 +1,230 @@
+import json
+import os
+import shutil
+import threading
+import time
+from collections import OrderedDict
+
+import numpy as np
+import pandas as pd
+
+from const import EVENT_CACHE_SIZE, EVENTS_DIR, KEY_BONUS_TIME_MS, KEY_CLASS, KEY_DIFF_TIME_MS, KEY_LAP_NUMBER, KEY_LAP_TIME_MS, KEY_NAME, KEY_PENALTY_TIME_MS, KEY_RANKING, KEY_TOTAL_TIME_MS, TABLE_PAGE_SIZE
+from fileutils import fsync_dir
+from model import MODEL_COLUMNS, empty_model, rank_and_gap, to_display
+from stats import aggregate_stats, best_laps_model, class_records
+
+META_FILE = 'meta.json'
+
+# 이벤트 디렉터리 → (디렉터리 수정 시각, 이벤트 목록)
+_listings = {}
+_listings_lock = threading.Lock()
+
+# 문자열 컬럼은 사전 인코딩 (값 목록 .json + 코드 배열 .npy)
+CODE_COLUMNS = {KEY_NAME: 'name', KEY_CLASS: 'class'}
+# 숫자 컬럼 (컬럼별 .npy)
+INT_COLUMNS = {KEY_LAP_NUMBER: ('lap', np.int32), KEY_LAP_TIME_MS: ('lap_ms', np.int64), KEY_BONUS_TIME_MS: ('bonus_ms', np.int64),
+               KEY_PENALTY_TIME_MS: ('penalty_ms', np.int64), KEY_TOTAL_TIME_MS: ('total_ms', np.int64)}
+
+
+def _save_array(path, array):
+    with open(path, 'wb') as f:
+        np.save(f, array)
+        f.flush()
+        os.fsync(f.fileno())
+
+
+def _save_json(path, value):
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(value, f, ensure_ascii=False)
+        f.flush()
+        os.fsync(f.fileno())
+
+
+def _new_event_id(events_dir):
+    base = time.strftime('%Y%m%d-%H%M%S')
+    event_id, suffix = base, 1
+    while os.path.exists(os.path.join(events_dir, event_id)):
+        suffix += 1
+        event_id = f"{base}-{suffix}"
+    return event_id
+
+
+# 순위가 계산된 전체 리더보드(store.ranked())를 읽기 전용 컬럼 파일로 보관하고 이벤트 ID 반환
+# 임시 디렉터리에 모두 쓴 뒤 rename 하므로 중간에 종료되어도 반쯤 쓰인 이벤트가 남지 않음
+def archive_event(ranked, title, events_dir=EVENTS_DIR):
+    os.makedirs(events_dir, exist_ok=True)
+    event_id = _new_event_id(events_dir)
+    tmp_dir = os.path.join(events_dir, f".{event_id}.tmp")
+    os.makedirs(tmp_dir)
+    try:
+        for column, stem in CODE_COLUMNS.items():
+            codes, values = pd.factorize(ranked[column].to_numpy(dtype=object))
+            _save_array(os.path.join(tmp_dir, f"{stem}.npy"), codes.astype(np.int32))
+            _save_json(os.path.join(tmp_dir, f"{stem}.json"), values.tolist())
+        for column, (stem, dtype) in INT_COLUMNS.items():
+            _save_array(os.path.join(tmp_dir, f"{stem}.npy"), ranked[column].to_numpy(dtype=dtype))
+        classes = list(dict.fromkeys(ranked[KEY_CLASS].tolist()))
+        _save_json(os.path.join(tmp_dir, META_FILE), {'id': event_id, 'title': title, 'archived_at': time.strftime('%Y-%m-%d %H:%M:%S'),
+                                                       'rows': len(ranked), 'classes': classes})
+        fsync_dir(tmp_dir)
+        os.replace(tmp_dir, os.path.join(events_dir, event_id))
+    except BaseException:
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+        raise
+    fsync_dir(events_dir)
+    # 수정 시각 해상도 안에서 연달아 보관해도 목록에 바로 보이도록 캐시를 버림
+    with _listings_lock:
+        _listings.pop(events_dir, None)
+    return event_id
+
+
+# 보관된 이벤트 목록 (최근 순, 메타데이터만 읽음)
+# 이벤트 디렉터리의 수정 시각이 바뀌었을 때(이벤트 추가/삭제)만 meta.json 을 다시 읽음
+def list_events(events_dir=EVENTS_DIR):
+    try:
+        mtime = os.stat(events_dir).st_mtime_ns
+    except FileNotFoundError:
+        return []
+    with _listings_lock:
+        cached = _listings.get(events_dir)
+    if cached is not None and cached[0] == mtime:
+        return list(cached[1])
+    events = _read_events(events_dir)
+    with _listings_lock:
+        _listings[events_dir] = (mtime, events)
+    return list(events)
+
+
+def _read_events(events_dir):
+    events = []
+    for entry in os.scandir(events_dir):
+        if entry.is_dir() and not entry.name.startswith('.'):
+            try:
+                with open(os.path.join(entry.path, META_FILE), encoding='utf-8') as f:
+                    events.append(json.load(f))
+            except (OSError, ValueError):
+                continue
+    return sorted(events, key=lambda meta: meta['id'], reverse=True)
+
+
+# 보관된 이벤트 (읽기 전용)
+# - 컬럼 파일은 mmap 으로 열어 필요한 부분만 읽음
+# - LeaderboardStore 와 같은 방식(lock, version, display, display_best, driver_stats, classes)으로 화면 표시/내보내기에 사용
+class ArchivedEvent:
+    def __init__(self, event_id, events_dir=EVENTS_DIR):
+        self.path = os.path.join(events_dir, event_id)
+        with open(os.path.join(self.path, META_FILE), encoding='utf-8') as f:
+            self.meta = json.load(f)
+        self.id = event_id
+        self.title = self.meta['title']
+        # 내보내기 캐시 키 (현재 이벤트의 정수 version 과 겹치지 않음)
+        self.version = ('event', event_id)
+        self._lock = threading.RLock()
+        self._arrays = {}
+        self._values = {}
+        self._ranked = {}
+        self._display = {}
+        self._best_ranked = {}
+        self._best_display = {}
+        self._driver_stats = {}
+
+    @property
+    def lock(self):
+        return self._lock
+
+    def __len__(self):
+        return self.meta['rows']
+
+    def classes(self):
+        return list(self.meta['classes'])
+
+    def _array(self, stem):
+        if stem not in self._arrays:
+            self._arrays[stem] = np.load(os.path.join(self.path, f"{stem}.npy"), mmap_mode='r')
+        return self._arrays[stem]
+
+    def _strings(self, stem, codes):
+        if stem not in self._values:
+            with open(os.path.join(self.path, f"{stem}.json"), encoding='utf-8') as f:
+                self._values[stem] = np.asarray(json.load(f), dtype=object)
+        return self._values[stem][codes]
+
+    # 보관 시 전체 순위 순서로 저장되어 있으므로 클래스별 표는 해당 행만 골라 순위/시간 차이 재계산
+    def ranked(self, class_name=None):
+        with self._lock:
+            if class_name in self._ranked:
+                return self._ranked[class_name]
+            if class_name is None:
+                rows = slice(None)
+            elif class_name in self.meta['classes']:
+                rows = np.flatnonzero(self._array('class') == self.meta['classes'].index(class_name))
+            else:
+                rows = np.empty(0, dtype=np.int64)
+
+            if len(self) == 0 or (class_name is not None and len(rows) == 0):
+                ranked = empty_model()
+                ranked[KEY_RANKING] = pd.Series(dtype=np.int64)
+                ranked[KEY_DIFF_TIME_MS] = pd.Series(dtype=np.int64)
+            else:
+                columns = {column: self._strings(stem, self._array(stem)[rows]) for column, stem in CODE_COLUMNS.items()}
+                for column, (stem, _) in INT_COLUMNS.items():
+                    columns[column] = np.asarray(self._array(stem)[rows], dtype=np.int64)
+                ranked = pd.DataFrame(columns, columns=MODEL_COLUMNS)
+                ranked[KEY_RANKING], ranked[KEY_DIFF_TIME_MS] = rank_and_gap(columns[KEY_TOTAL_TIME_MS])
+            self._ranked[class_name] = ranked
+            return ranked
+
+    def display(self, class_name=None):
+        with self._lock:
+            if class_name not in self._display:
+                display_data = to_display(self.ranked(class_name))
+                display_data.index = display_data.index + 1
+                self._display[class_name] = display_data
+            return self._display[class_name]
+
+    # 보관된 이벤트는 바뀌지 않으므로 최고 기록 순위표와 선수별 통계를 순위표에서 한 번만 그룹 집계
+    def best_laps(self, class_name=None):
+        with self._lock:
+            if class_name not in self._best_ranked:
+                self._best_ranked[class_name] = best_laps_model(self.ranked(class_name))
+            return self._best_ranked[class_name]
+
+    def display_best(self, class_name=None):
+        with self._lock:
+            if class_name not in self._best_display:
+                display_data = to_display(self.best_laps(class_name))
+                display_data.index = display_data.index + 1
+                self._best_display[class_name] = display_data
+            return self._best_display[class_name]
+
+    # 보관된 이벤트는 전체 표를 한 번만 만들어 두므로 앞부분만 잘라 반환
+    def display_page(self, class_name=None, limit=TABLE_PAGE_SIZE, best_only=False):
+        display_data = self.display_best(class_name) if best_only else self.display(class_name)
+        return display_data.head(limit), len(display_data)
+
+    def driver_stats(self, class_name=None):
+        with self._lock:
+            if class_name not in self._driver_stats:
+                self._driver_stats[class_name] = aggregate_stats(self.ranked(class_name))
+            return self._driver_stats[class_name]
+
+    def class_records(self):
+        return class_records(self.driver_stats())
+
+
+# 최근에 본 EVENT_CACHE_SIZE 개 이벤트만 열어 두어 보관된 이벤트 수와 관계없이 메모리 사용량 유지
+_events = OrderedDict()
+_events_lock = threading.Lock()
+
+
+def get_event(event_id, events_dir=EVENTS_DIR):
+    key = (events_dir, event_id)
+    with _events_lock:
+        event = _events.get(key)
+        if event is None:
+            event = ArchivedEvent(event_id, events_dir)
+            _events[key] = event
+        _events.move_to_end(key)
+        while len(_events) > EVENT_CACHE_SIZE:
+            _events.popitem(last=False)
+        return event
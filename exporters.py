@@ -0,0 +1,272 @@
+import io
+import threading
+import time
+from collections import OrderedDict
+from html import escape
+
+from const import CAR_CLASSES, COLUMN_NAMES, EXPORT_CACHE_SIZE, EXPORT_CHUNK_ROWS, FONT_FILE, FONT_NAME, KEY_BONUS_TIME, KEY_DIFF_TIME, KEY_LAP_NUMBER, KEY_LAP_TIME, KEY_NAME, KEY_PENALTY_TIME, KEY_RANKING, KEY_TOTAL_TIME, PDF_NAME_WRAP_CHARS
+from metrics import get_metrics
+
+# 내보내기 파일 컬럼 순서
+EXPORT_COLUMNS = COLUMN_NAMES + [KEY_DIFF_TIME, KEY_RANKING]
+
+# PDF 표 컬럼 및 너비
+PDF_COLUMNS = [KEY_RANKING, KEY_NAME, KEY_LAP_NUMBER, KEY_LAP_TIME, KEY_BONUS_TIME, KEY_PENALTY_TIME, KEY_TOTAL_TIME, KEY_DIFF_TIME]
+PDF_COL_WIDTHS = [35, 85, 45, 65, 50, 50, 65, 65]
+
+# 형식별 (버튼 이름, 다운로드 버튼 이름, 확장자, MIME)
+EXPORT_FORMATS = {
+    'csv': ("리더보드 CSV 다운로드", "Download CSV", 'csv', 'text/csv'),
+    'html': ("리더보드 HTML 다운로드", "Download HTML", 'html', 'text/html'),
+    'pdf': ("리더보드 PDF 다운로드", "Download PDF", 'pdf', 'application/pdf'),
+    'md': ("리더보드 Markdown 다운로드", "Download Markdown", 'md', 'text/markdown'),
+}
+
+
+_fonts_registered = False
+_fonts_lock = threading.Lock()
+
+
+# 한글 폰트 등록 (프로세스당 한 번만)
+# reportlab 은 import 에만 수백 ms 가 걸리므로 모듈 첫 import 가 아니라 첫 PDF 생성 시점에 불러옴
+def register_fonts():
+    global _fonts_registered
+    with _fonts_lock:
+        if not _fonts_registered:
+            from reportlab.pdfbase import pdfmetrics
+            from reportlab.pdfbase.ttfonts import TTFont
+
+            pdfmetrics.registerFont(TTFont(FONT_NAME, FONT_FILE))
+            _fonts_registered = True
+
+
+def _chunks(display_data, chunk_rows):
+    for start in range(0, len(display_data), chunk_rows):
+        yield display_data.iloc[start:start + chunk_rows]
+
+
+# CSV 를 chunk_rows 행씩 나누어 생성 (엑셀 호환을 위해 BOM 포함)
+def iter_csv(display_data, chunk_rows=EXPORT_CHUNK_ROWS):
+    display_data = display_data[EXPORT_COLUMNS]
+    yield display_data.head(0).to_csv(index=False).encode('utf-8-sig')
+    for chunk in _chunks(display_data, chunk_rows):
+        yield chunk.to_csv(index=False, header=False).encode('utf-8')
+
+
+# HTML 표를 chunk_rows 행씩 나누어 생성
+def iter_html(display_data, title, chunk_rows=EXPORT_CHUNK_ROWS):
+    display_data = display_data[EXPORT_COLUMNS]
+    header = ''.join(f"      <th>{escape(column)}</th>\n" for column in EXPORT_COLUMNS)
+    yield (f"<h1 style='text-align: center;'>{escape(title)}</h1>\n"
+           "<table border=\"1\" class=\"dataframe\">\n  <thead>\n    <tr style=\"text-align: right;\">\n"
+           f"{header}    </tr>\n  </thead>\n  <tbody>\n").encode('utf-8')
+    for chunk in _chunks(display_data, chunk_rows):
+        rows = []
+        for row in chunk.itertuples(index=False, name=None):
+            cells = ''.join(f"      <td>{escape(str(value))}</td>\n" for value in row)
+            rows.append(f"    <tr>\n{cells}    </tr>\n")
+        yield ''.join(rows).encode('utf-8')
+    yield "  </tbody>\n</table>".encode('utf-8')
+
+
+# Markdown(pipe) 표를 chunk_rows 행씩 나누어 생성
+def iter_markdown(display_data, chunk_rows=EXPORT_CHUNK_ROWS):
+    display_data = display_data[EXPORT_COLUMNS]
+    yield ("| " + " | ".join(EXPORT_COLUMNS) + " |\n"
+           + "|" + "|".join(":---" for _ in EXPORT_COLUMNS) + "|\n").encode('utf-8')
+    for chunk in _chunks(display_data, chunk_rows):
+        rows = ("| " + " | ".join(str(value).replace('|', '\\|') for value in row) + " |\n"
+                for row in chunk.itertuples(index=False, name=None))
+        yield ''.join(rows).encode('utf-8')
+
+
+def _pdf_table(display_data, header_style, name_style):
+    from reportlab.lib import colors
+    from reportlab.platypus import LongTable, Paragraph, TableStyle
+
+    data = [[Paragraph(column, header_style) for column in PDF_COLUMNS]]
+    for rank, name, lap_number, lap_time, bonus, penalty, total, diff in display_data[PDF_COLUMNS].itertuples(index=False, name=None):
+        # 줄바꿈이 필요한 긴 이름만 Paragraph 로 만들고 나머지는 일반 문자열 셀 사용
+        name = Paragraph(escape(name), name_style) if len(name) > PDF_NAME_WRAP_CHARS else name
+        data.append([str(rank), name, str(lap_number), lap_time, bonus, penalty, total, diff])
+
+    # LongTable 은 긴 표를 페이지 단위로 나누고 머리글 행을 매 페이지 반복
+    table = LongTable(data, colWidths=PDF_COL_WIDTHS, repeatRows=1)
+    table.setStyle(TableStyle([('BACKGROUND', (0, 0), (-1, 0), colors.grey),
+                               ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
+                               ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
+                               ('VALIGN', (0, 0), (-1, -1), 'MIDDLE'),
+                               ('FONTNAME', (0, 0), (-1, -1), FONT_NAME),
+                               ('FONTSIZE', (0, 1), (-1, -1), 10),
+                               ('BOTTOMPADDING', (0, 0), (-1, 0), 12),
+                               ('BACKGROUND', (0, 1), (-1, -1), colors.beige),
+                               ('GRID', (0, 0), (-1, -1), 1, colors.black)]))
+    return table
+
+
+# PDF 생성 (전체 리더보드 + 클래스별 섹션)
+# progress 가 주어지면 레이아웃 진행률(0.0~1.0)을 전달
+def build_pdf(title, display_data, class_tables, progress=None):
+    from reportlab.lib import colors
+    from reportlab.lib.pagesizes import letter
+    from reportlab.lib.styles import ParagraphStyle
+    from reportlab.platypus import Paragraph, SimpleDocTemplate, Spacer
+
+    register_fonts()
+    buffer = io.BytesIO()
+    pdf = SimpleDocTemplate(buffer, pagesize=letter, title=title)
+    if progress is not None:
+        size_estimate = [0]
+
+        def on_progress(kind, value):
+            if kind == 'SIZE_EST':
+                size_estimate[0] = value
+            elif kind == 'PROGRESS' and size_estimate[0]:
+                progress(min(value / size_estimate[0], 1.0))
+
+        pdf.setProgressCallBack(on_progress)
+    title_style = ParagraphStyle(name='TitleStyle', fontName=FONT_NAME, fontSize=18, alignment=1)
+    section_style = ParagraphStyle(name='SectionStyle', fontName=FONT_NAME, fontSize=14, keepWithNext=1)
+    header_style = ParagraphStyle(name='HeaderStyle', fontName=FONT_NAME, fontSize=10, alignment=1, textColor=colors.whitesmoke)
+    name_style = ParagraphStyle(name='NameStyle', fontName=FONT_NAME, fontSize=10, alignment=1)
+
+    elements = [Paragraph(escape(title), title_style), Spacer(1, 40)]
+    elements.append(_pdf_table(display_data, header_style, name_style))
+
+    for class_name, class_data in class_tables:
+        elements.append(Spacer(1, 30))
+        elements.append(Paragraph(f"리더보드 {escape(class_name)}", section_style))
+        elements.append(Spacer(1, 10))
+        elements.append(_pdf_table(class_data, header_style, name_style))
+
+    pdf.build(elements)
+    return buffer.getvalue()
+
+
+# CAR_CLASSES 순서로 정렬한 클래스 목록 (목록에 없는 클래스는 뒤에)
+def ordered_classes(classes):
+    classes = list(classes)
+    return [c for c in CAR_CLASSES if c in classes] + sorted(c for c in classes if c not in CAR_CLASSES)
+
+
+# 형식별 바이트 생성 (소요 시간과 행 수를 측정 지표에 기록)
+def render_export(fmt, title, display_data, class_tables, progress=None):
+    start = time.perf_counter()
+    data = render_bytes(fmt, title, display_data, class_tables, progress)
+    record_export(fmt, time.perf_counter() - start, len(display_data))
+    return data
+
+
+# 측정 없이 형식별 바이트 생성 (렌더링 작업 프로세스는 측정값을 돌려주고 부모 프로세스가 record_export 로 기록)
+def render_bytes(fmt, title, display_data, class_tables, progress=None):
+    if fmt not in EXPORT_FORMATS:
+        raise ValueError(f"지원하지 않는 형식입니다: {fmt}")
+    return b''.join(iter_export(fmt, title, display_data, class_tables, progress))
+
+
+# 형식별 바이트 조각 생성 (CSV/HTML/Markdown 은 EXPORT_CHUNK_ROWS 행씩, PDF 는 전체를 한 번에)
+def iter_export(fmt, title, display_data, class_tables, progress=None):
+    if fmt == 'csv':
+        yield from iter_csv(display_data)
+    elif fmt == 'html':
+        yield from iter_html(display_data, title)
+    elif fmt == 'md':
+        yield from iter_markdown(display_data)
+    elif fmt == 'pdf':
+        yield build_pdf(title, display_data, class_tables, progress)
+    else:
+        raise ValueError(f"지원하지 않는 형식입니다: {fmt}")
+
+
+def record_export(fmt, seconds, rows):
+    metrics = get_metrics()
+    metrics.observe(f"export_{fmt}", seconds)
+    metrics.count('rows_exported', rows)
+
+
+# (데이터 version, 제목, 형식) 별로 내보내기 결과를 보관하는 LRU 캐시
+class ExportCache:
+    def __init__(self, max_size=EXPORT_CACHE_SIZE):
+        self.max_size = max_size
+        self._items = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key):
+        with self._lock:
+            if key in self._items:
+                self._items.move_to_end(key)
+                self.hits += 1
+                get_metrics().count('export_cache_hits')
+                return self._items[key]
+            self.misses += 1
+            get_metrics().count('export_cache_misses')
+            return None
+
+    # 통계에 포함하지 않는 조회
+    def peek(self, key):
+        with self._lock:
+            return self._items.get(key)
+
+    def put(self, key, value):
+        with self._lock:
+            self._items[key] = value
+            self._items.move_to_end(key)
+            while len(self._items) > self.max_size:
+                self._items.popitem(last=False)
+
+
+_cache = ExportCache()
+
+
+def get_export_cache():
+    return _cache
+
+
+# 저장소의 현재 데이터로 내보내기 (같은 version/제목/형식이면 캐시 사용)
+def export_bytes(store, fmt, title):
+    version, display_data, class_tables = export_source(store)
+    key = (version, title, fmt)
+    data = _cache.get(key)
+    if data is None:
+        data = render_export(fmt, title, display_data, class_tables)
+        _cache.put(key, data)
+    return data
+
+
+# 저장소의 현재 데이터로 내보내기를 조각 단위로 생성 (HTTP 응답 스트리밍용)
+# 캐시에 있으면 그 결과를 한 번에, 없으면 만드는 대로 내보내고 끝까지 만든 결과만 캐시에 보관
+def stream_export(store, fmt, title):
+    version, display_data, class_tables = export_source(store)
+    key = (version, title, fmt)
+    data = _cache.get(key)
+    if data is not None:
+        return iter([data])
+    return _stream_and_cache(key, fmt, title, display_data, class_tables)
+
+
+def _stream_and_cache(key, fmt, title, display_data, class_tables):
+    chunks = []
+    seconds = 0.0
+    iterator = iter_export(fmt, title, display_data, class_tables)
+    while True:
+        # 소요 시간에는 조각을 만드는 시간만 포함 (보내는 동안 기다린 시간 제외)
+        start = time.perf_counter()
+        chunk = next(iterator, None)
+        seconds += time.perf_counter() - start
+        if chunk is None:
+            break
+        chunks.append(chunk)
+        yield chunk
+    record_export(fmt, seconds, len(display_data))
+    _cache.put(key, b''.join(chunks))
+
+
+# 같은 version 의 전체/클래스별 표를 한 번에 가져옴 (현재 이벤트 저장소 또는 보관된 이벤트)
+def export_source(store):
+    with store.lock:
+        version = store.version
+        display_data = store.display()
+        class_tables = [(class_name, store.display(class_name)) for class_name in ordered_classes(store.classes())]
+    return version, display_data, class_tables
@@ -0,0 +1,67 @@
+import contextlib
+import os
+import tempfile
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+
+from metrics import get_metrics
+
+
+# 임시 파일에 쓴 뒤 rename 하여 파일을 원자적으로 교체
+# (쓰기 도중 프로세스가 종료되어도 기존 파일이 깨지지 않음)
+def atomic_write(path, data):
+    if isinstance(data, str):
+        data = data.encode('utf-8')
+    directory = os.path.dirname(os.path.abspath(path))
+    fd, tmp_path = tempfile.mkstemp(prefix=f".{os.path.basename(path)}.", suffix='.tmp', dir=directory)
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            f.write(data)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+    fsync_dir(directory)
+
+
+# rename 결과가 디스크에 반영되도록 디렉터리 fsync (지원하지 않는 OS는 무시)
+def fsync_dir(directory):
+    try:
+        fd = os.open(directory, os.O_RDONLY)
+    except OSError:
+        return
+    try:
+        os.fsync(fd)
+    except OSError:
+        pass
+    finally:
+        os.close(fd)
+
+
+# DataFrame을 CSV로 원자적 저장
+def atomic_write_csv(frame, path, encoding='utf-8'):
+    metrics = get_metrics()
+    with metrics.span('csv_write'):
+        atomic_write(path, frame.to_csv(index=False).encode(encoding))
+    metrics.count('rows_written', len(frame))
+
+
+# 프로세스 간 배타 잠금 (같은 파일을 쓰는 Streamlit 앱, API 서버, 가져오기 CLI 사이의 쓰기 직렬화)
+# fcntl 이 없는 OS 에서는 잠금 없이 진행
+@contextlib.contextmanager
+def file_lock(path):
+    if fcntl is None:
+        yield
+        return
+    with open(path, 'a+b') as f:
+        fcntl.flock(f.fileno(), fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(f.fileno(), fcntl.LOCK_UN)
@@ -0,0 +1,185 @@
+import argparse
+import time
+from collections import Counter
+
+import numpy as np
+import pandas as pd
+
+from const import CAR_CLASSES, INGEST_CHUNK_ROWS, INGEST_ERROR_SAMPLES, KEY_BONUS_TIME, KEY_CLASS, KEY_LAP_NUMBER, KEY_LAP_TIME, KEY_NAME, KEY_PENALTY_TIME
+from metrics import get_metrics
+from model import parse_time_strs
+
+# 반드시 있어야 하는 컬럼 (가산초, 패널티초가 없으면 0, 합계 시간은 다시 계산)
+REQUIRED_COLUMNS = [KEY_NAME, KEY_CLASS, KEY_LAP_NUMBER, KEY_LAP_TIME]
+
+# 거부 사유
+REASON_EMPTY_NAME = "이름 없음"
+REASON_UNKNOWN_CLASS = "알 수 없는 클래스"
+REASON_BAD_LAP_NUMBER = "잘못된 주행 차수"
+REASON_BAD_LAP_TIME = "잘못된 시간 형식"
+REASON_BAD_BONUS = "잘못된 가산초"
+REASON_BAD_PENALTY = "잘못된 패널티초"
+REASON_DUPLICATE = "중복 기록"
+
+
+# 가져오기 결과 보고서
+class IngestReport:
+    def __init__(self):
+        self.rows_read = 0
+        self.accepted = 0
+        self.rejected = 0
+        self.errors = Counter()
+        self.samples = []
+        self.seconds = 0.0
+
+    @property
+    def rows_per_sec(self):
+        return self.rows_read / self.seconds if self.seconds > 0 else 0.0
+
+    def reject(self, reason, row_numbers):
+        count = len(row_numbers)
+        if not count:
+            return
+        self.rejected += count
+        self.errors[reason] += count
+        for row_number in row_numbers[:max(INGEST_ERROR_SAMPLES - len(self.samples), 0)]:
+            self.samples.append((int(row_number), reason))
+
+    def summary(self):
+        return {
+            'rows_read': self.rows_read,
+            'accepted': self.accepted,
+            'rejected': self.rejected,
+            'seconds': round(self.seconds, 3),
+            'rows_per_sec': round(self.rows_per_sec, 1),
+            'errors': dict(self.errors),
+        }
+
+    # 사유별 건수 표
+    def error_frame(self):
+        return pd.DataFrame(self.errors.most_common(), columns=["사유", "건수"])
+
+    # 거부된 행 예시 (파일 기준 행 번호, 머리글은 1행)
+    def sample_frame(self):
+        return pd.DataFrame(self.samples, columns=["행", "사유"])
+
+
+# 초 단위 문자열 컬럼을 밀리초로 변환 (빈 값은 0, 변환 실패는 -1)
+def _parse_secs_column(chunk, column):
+    if column not in chunk.columns:
+        return np.zeros(len(chunk), dtype=np.int64)
+    values = chunk[column].str.strip()
+    secs = pd.to_numeric(values.where(values != "", "0"), errors='coerce')
+    ms = np.rint(secs.to_numpy(dtype=np.float64) * 1000)
+    invalid = np.isnan(ms) | (ms < 0)
+    return np.where(invalid, -1, ms).astype(np.int64)
+
+
+# 한 chunk 를 검증하여 (정상 행 목록, 거부 사유별 행 번호, 정상 행 번호) 반환
+def validate_chunk(chunk, first_row_number, classes=CAR_CLASSES):
+    row_numbers = np.arange(first_row_number, first_row_number + len(chunk))
+    names = chunk[KEY_NAME].str.strip()
+    class_names = chunk[KEY_CLASS].str.strip()
+    lap_numbers = pd.to_numeric(chunk[KEY_LAP_NUMBER].str.strip(), errors='coerce').to_numpy(dtype=np.float64)
+    lap_ms = parse_time_strs(chunk[KEY_LAP_TIME], errors='coerce')
+    bonus_ms = _parse_secs_column(chunk, KEY_BONUS_TIME)
+    penalty_ms = _parse_secs_column(chunk, KEY_PENALTY_TIME)
+
+    # 앞의 검사에서 이미 거부된 행은 다음 사유로 중복 집계하지 않음
+    checks = [
+        (REASON_EMPTY_NAME, (names == "").to_numpy()),
+        (REASON_UNKNOWN_CLASS, ~class_names.isin(classes).to_numpy()),
+        (REASON_BAD_LAP_NUMBER, np.isnan(lap_numbers) | (lap_numbers < 1) | (lap_numbers != np.floor(lap_numbers))),
+        (REASON_BAD_LAP_TIME, lap_ms < 0),
+        (REASON_BAD_BONUS, bonus_ms < 0),
+        (REASON_BAD_PENALTY, penalty_ms < 0),
+    ]
+    valid = np.ones(len(chunk), dtype=bool)
+    rejected = []
+    for reason, invalid in checks:
+        invalid = invalid & valid
+        if invalid.any():
+            rejected.append((reason, row_numbers[invalid]))
+            valid &= ~invalid
+
+    rows = list(zip(names.to_numpy(dtype=object)[valid].tolist(),
+                    class_names.to_numpy(dtype=object)[valid].tolist(),
+                    lap_numbers[valid].astype(np.int64).tolist(),
+                    lap_ms[valid].tolist(),
+                    bonus_ms[valid].tolist(),
+                    penalty_ms[valid].tolist()))
+    return rows, rejected, row_numbers[valid]
+
+
+# 문자열 컬럼 DataFrame chunk 들을 검증하여 저장소에 병합
+# first_row_number 는 첫 행의 보고서상 번호 (CSV 는 머리글 다음인 2행, JSON 배열은 0번)
+def ingest_frames(chunks, store, first_row_number=2):
+    report = IngestReport()
+    start = time.perf_counter()
+    seen = set()
+
+    for chunk in chunks:
+        missing = [column for column in REQUIRED_COLUMNS if column not in chunk.columns]
+        if missing:
+            raise ValueError(f"필수 컬럼이 없습니다: {', '.join(missing)}")
+
+        report.rows_read += len(chunk)
+        rows, rejected, row_numbers = validate_chunk(chunk, first_row_number)
+        first_row_number += len(chunk)
+        for reason, numbers in rejected:
+            report.reject(reason, numbers)
+
+        # 파일 안에서 (이름, 클래스, 주행 차수) 중복 제거
+        unique_rows = []
+        duplicate_numbers = []
+        for row, row_number in zip(rows, row_numbers):
+            key = (row[1], row[0], row[2])
+            if key in seen:
+                duplicate_numbers.append(row_number)
+            else:
+                seen.add(key)
+                unique_rows.append((row, row_number))
+
+        # 기존 리더보드와 중복된 기록은 건너뛰고 나머지를 한 번에 병합
+        inserted = store.submit_many([row for row, _ in unique_rows], compact=False)
+        if len(inserted) != len(unique_rows):
+            inserted_keys = {(row[1], row[0], row[2]) for row in inserted}
+            duplicate_numbers.extend(row_number for row, row_number in unique_rows if (row[1], row[0], row[2]) not in inserted_keys)
+        report.accepted += len(inserted)
+        report.reject(REASON_DUPLICATE, sorted(duplicate_numbers))
+
+    # 스냅샷 압축은 chunk 마다가 아니라 마지막에 한 번만
+    store.maybe_compact()
+    report.seconds = time.perf_counter() - start
+    metrics = get_metrics()
+    metrics.observe('ingest', report.seconds)
+    metrics.count('rows_ingested', report.rows_read)
+    return report
+
+
+# CSV 파일(경로 또는 파일 객체)을 chunk 단위로 읽어 저장소에 병합
+def ingest_csv(source, store, chunk_rows=INGEST_CHUNK_ROWS, encoding='utf-8'):
+    reader = pd.read_csv(source, encoding=encoding, dtype=str, keep_default_na=False, chunksize=chunk_rows)
+    return ingest_frames(reader, store)
+
+
+def main():
+    from store import get_store
+
+    parser = argparse.ArgumentParser(description="타이밍 데이터 CSV 를 리더보드에 병합합니다.")
+    parser.add_argument('files', nargs='+')
+    parser.add_argument('--chunk-rows', type=int, default=INGEST_CHUNK_ROWS)
+    args = parser.parse_args()
+
+    store = get_store()
+    store.refresh()
+    for path in args.files:
+        report = ingest_csv(path, store, chunk_rows=args.chunk_rows)
+        print(path, report.summary())
+        for row_number, reason in report.samples:
+            print(f"  {row_number}행: {reason}")
+    store.storage.sync()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,292 @@
+import json
+import os
+import threading
+import time
+import uuid
+
+from const import DATA_FILE, JOURNAL_COMPACT_EVENTS, JOURNAL_FILE, JOURNAL_FSYNC_BATCH, JOURNAL_FSYNC_INTERVAL
+from fileutils import atomic_write, atomic_write_csv
+from metrics import get_metrics
+from model import to_csv_frame
+
+# 저널 이벤트 종류
+OP_SUBMIT = 'submit'
+OP_DELETE = 'delete'
+OP_RESET = 'reset'
+OP_HEADER = 'journal'  # 저널 첫 줄: 저널 id 와 이어지는 이전 저널 id (prev)
+
+
+# 제출/삭제/초기화 이벤트를 한 줄씩 추가하는 저널 (write-ahead log)
+# - 매 이벤트는 write + flush 되므로 프로세스가 죽어도 유실되지 않음
+# - fsync는 JOURNAL_FSYNC_BATCH 건 또는 JOURNAL_FSYNC_INTERVAL 초마다 묶어서 수행
+#   (추가가 멈춰도 변경 감시 스레드가 sync_if_due 를 주기적으로 호출하여 남은 이벤트를 fsync)
+# - JOURNAL_COMPACT_EVENTS 건이 쌓이면 스냅샷(DATA_FILE)으로 압축하고 저널을 비움
+#
+# 여러 프로세스가 쓸 때는 저장소 쓰기 잠금으로 직렬화하고, 각 프로세스는 읽은 위치 이후의 이벤트만 이어 읽음
+# - 저널은 id 가 담긴 머리글 줄로 시작하며, 압축 시 기존 저널은 .prev 로 남기고
+#   새 저널 머리글의 prev 에 기존 저널 id 를 기록하여 다른 프로세스가 나머지를 이어 읽을 수 있게 함
+#
+# 스냅샷 저장 후 저널을 비우기 전에 종료되더라도 이벤트 재적용은 멱등
+# (중복 제출은 무시, 없는 기록 삭제는 무시, 초기화 이후 이벤트만 남음)이므로 상태가 어긋나지 않음
+class Journal:
+    def __init__(self, journal_file=JOURNAL_FILE, snapshot_file=DATA_FILE):
+        self.journal_file = journal_file
+        self.prev_file = f"{journal_file}.prev"
+        self.snapshot_file = snapshot_file
+        self._lock = threading.RLock()
+        self._file = None
+        self._unsynced = 0
+        self._last_sync = time.monotonic()
+        self.pending_events = 0
+        # 읽었거나 직접 쓴 위치 (다른 프로세스가 이어 쓴 이벤트만 읽기 위해 사용)
+        self._offset = 0
+        self._journal_id = None
+        self.rotations = 0
+
+    # 추가용으로 열기 (쓰기 잠금 안에서만 호출), 새 파일이면 머리글을 씀
+    def _open(self):
+        if self._file is None:
+            self._file = open(self.journal_file, 'a+b')
+            if self._file.tell() == 0:
+                header = _header_line(None)
+                self._file.write(header)
+                self._file.flush()
+                self._journal_id = json.loads(header)['id']
+                self._offset = len(header)
+        self._truncate_torn_tail()
+        return self._file
+
+    # 다른 프로세스가 쓰다가 끊긴 마지막 줄(줄바꿈 없음)이 있으면 잘라내어 다음 이벤트가 그 줄에 이어 붙지 않게 함
+    # 핸들을 열어 둔 채 오래 실행되는 프로세스도 있으므로 여는 시점이 아니라 추가할 때마다 확인 (쓰기 잠금 안에서 호출)
+    def _truncate_torn_tail(self):
+        fd = self._file.fileno()
+        size = os.fstat(fd).st_size
+        if size == 0 or os.pread(fd, 1, size - 1) == b'\n':
+            return
+        start = max(size - 65536, 0)
+        tail = os.pread(fd, size - start, start)
+        self._file.truncate(start + tail.rfind(b'\n') + 1)
+        get_metrics().count('journal_torn_tails')
+
+    # 이벤트 추가
+    def append(self, event, sync=False):
+        line = json.dumps(event, ensure_ascii=False, separators=(',', ':')) + '\n'
+        with self._lock:
+            f = self._open()
+            data = line.encode('utf-8')
+            f.write(data)
+            f.flush()
+            self._offset += len(data)
+            self._unsynced += 1
+            self.pending_events += 1
+            if sync or self._unsynced >= JOURNAL_FSYNC_BATCH or time.monotonic() - self._last_sync >= JOURNAL_FSYNC_INTERVAL:
+                self._sync()
+
+    # 여러 이벤트를 한 번에 추가하고 한 번만 fsync
+    def append_many(self, events):
+        if not events:
+            return
+        data = ''.join(json.dumps(event, ensure_ascii=False, separators=(',', ':')) + '\n' for event in events).encode('utf-8')
+        with self._lock:
+            f = self._open()
+            f.write(data)
+            f.flush()
+            self._offset += len(data)
+            self._unsynced += len(events)
+            self.pending_events += len(events)
+            self._sync()
+
+    def _sync(self):
+        if self._file is not None and self._unsynced:
+            os.fsync(self._file.fileno())
+        self._unsynced = 0
+        self._last_sync = time.monotonic()
+
+    def sync(self):
+        with self._lock:
+            self._sync()
+
+    # fsync 하지 않은 이벤트가 있고 마지막 fsync 후 JOURNAL_FSYNC_INTERVAL 초가 지났으면 fsync
+    def sync_if_due(self):
+        with self._lock:
+            if self._unsynced and time.monotonic() - self._last_sync >= JOURNAL_FSYNC_INTERVAL:
+                self._sync()
+
+    # 파일의 offset 위치부터 완전한 줄의 이벤트 읽기 (쓰는 중이거나 끊긴 마지막 줄은 제외)
+    # 줄바꿈까지 있지만 읽을 수 없는 줄은 건너뛰고 개수만 집계 (뒤의 이벤트는 그대로 읽음)
+    # (머리글, 이벤트 목록, 읽은 위치) 반환, 머리글은 offset 이 0 일 때만 읽음
+    @staticmethod
+    def _read_lines(path, offset=0):
+        header = None
+        events = []
+        with open(path, 'rb') as f:
+            f.seek(offset)
+            for line in f:
+                if not line.endswith(b'\n'):
+                    break
+                offset += len(line)
+                try:
+                    event = json.loads(line)
+                except ValueError:
+                    event = None
+                if not isinstance(event, dict):
+                    get_metrics().count('journal_corrupt_lines')
+                    continue
+                if event.get('op') == OP_HEADER:
+                    header = event
+                else:
+                    events.append(event)
+        return header, events, offset
+
+    @staticmethod
+    def _read_header(path):
+        with open(path, 'rb') as f:
+            line = f.readline()
+        try:
+            event = json.loads(line) if line.endswith(b'\n') else None
+        except ValueError:
+            return None
+        return event if event is not None and event.get('op') == OP_HEADER else None
+
+    # 저널 이벤트 전체 읽기
+    def read_events(self):
+        with self._lock:
+            try:
+                header, events, self._offset = self._read_lines(self.journal_file)
+            except FileNotFoundError:
+                header, events, self._offset = None, [], 0
+            self._journal_id = header['id'] if header else None
+            self.pending_events = len(events)
+            return events
+
+    # 마지막으로 읽은 위치 이후에 (다른 프로세스가) 추가한 이벤트
+    # 다른 프로세스가 압축하여 저널이 교체된 경우, 새 저널의 prev 가 읽던 저널이면
+    # .prev 의 나머지와 새 저널을 이어서 읽음 (rotations 증가)
+    # 이어 읽을 수 없으면 None → 스냅샷부터 다시 읽어야 함
+    def read_new_events(self):
+        with self._lock:
+            try:
+                header = self._read_header(self.journal_file)
+            except FileNotFoundError:
+                return [] if self._journal_id is None and self._offset == 0 else None
+            journal_id = header['id'] if header else None
+            prev_id = header.get('prev') if header else None
+            if journal_id != self._journal_id:
+                # 추가용으로 열어 둔 파일은 교체되어 .prev 가 되었으므로 닫음
+                self._close()
+            try:
+                if journal_id == self._journal_id:
+                    if os.path.getsize(self.journal_file) < self._offset:
+                        return None
+                    _, events, self._offset = self._read_lines(self.journal_file, self._offset)
+                elif self._journal_id is None and self._offset == 0 and prev_id is None:
+                    # 아무것도 없던 상태에서 다른 프로세스가 처음 만든 저널
+                    _, events, self._offset = self._read_lines(self.journal_file)
+                elif self._journal_id is not None and prev_id == self._journal_id:
+                    prev_header = self._read_header(self.prev_file)
+                    if prev_header is None or prev_header['id'] != self._journal_id:
+                        return None
+                    _, events, _ = self._read_lines(self.prev_file, self._offset)
+                    _, new_events, self._offset = self._read_lines(self.journal_file)
+                    events += new_events
+                    self.rotations += 1
+                    self.pending_events = 0
+                else:
+                    return None
+            except FileNotFoundError:
+                return None
+            self._journal_id = journal_id
+            self.pending_events += len(events)
+            return events
+
+    # 스냅샷에 저널을 재적용
+    def replay(self, engine, transform=None):
+        return apply_events(engine, self.read_events(), transform)
+
+    # 현재 엔진 상태를 스냅샷으로 저장(원자적)하고 새 저널 시작
+    # 기존 저널은 .prev 로 남겨 다른 프로세스가 나머지를 이어 읽을 수 있게 함
+    # continued=True 이면 저널 이벤트로 이어지는 상태(일반 압축)이므로 새 저널 머리글에 기존 저널 id 를 기록하고,
+    # 전체 교체(초기화, 업로드)이면 기록하지 않아 다른 프로세스가 스냅샷부터 다시 읽게 함
+    def compact(self, engine, continued=False):
+        with self._lock:
+            atomic_write_csv(to_csv_frame(engine.to_model()), self.snapshot_file)
+            self._close()
+            if os.path.exists(self.journal_file):
+                os.replace(self.journal_file, self.prev_file)
+            header = _header_line(self._journal_id if continued else None)
+            atomic_write(self.journal_file, header)
+            self.pending_events = 0
+            self._journal_id = json.loads(header)['id']
+            self._offset = len(header)
+
+    # 일정 건수 이상 쌓였을 때만 압축
+    def maybe_compact(self, engine):
+        with self._lock:
+            if self.pending_events >= JOURNAL_COMPACT_EVENTS:
+                self.compact(engine, continued=self._journal_id is not None)
+                return True
+            return False
+
+    def _close(self):
+        if self._file is not None:
+            self._sync()
+            self._file.close()
+            self._file = None
+
+    def close(self):
+        with self._lock:
+            self._close()
+
+
+def _header_line(prev_id):
+    return (json.dumps({'op': OP_HEADER, 'id': uuid.uuid4().hex, 'prev': prev_id}) + '\n').encode('utf-8')
+
+
+def submit_event(name, class_name, lap_number, lap_ms, bonus_ms, penalty_ms):
+    return {'op': OP_SUBMIT, 'name': name, 'class': class_name, 'lap': int(lap_number),
+            'lap_ms': int(lap_ms), 'bonus_ms': int(bonus_ms), 'penalty_ms': int(penalty_ms)}
+
+
+def delete_event(class_name, name, lap_number):
+    return {'op': OP_DELETE, 'name': name, 'class': class_name, 'lap': int(lap_number)}
+
+
+def reset_event():
+    return {'op': OP_RESET}
+
+
+# 이벤트 하나를 엔진에 적용
+def apply_event(engine, event):
+    op = event.get('op')
+    if op == OP_SUBMIT:
+        return engine.insert(event['name'], event['class'], event['lap'], event['lap_ms'], event['bonus_ms'], event['penalty_ms'])
+    if op == OP_DELETE:
+        return engine.delete(event['class'], event['name'], event['lap'])
+    if op == OP_RESET:
+        engine.clear()
+        return True
+    return False
+
+
+# 이벤트 목록을 엔진에 적용하고 실제로 반영된 이벤트 목록 반환
+def apply_events(engine, events, transform=None):
+    applied = []
+    for event in events:
+        if transform is not None:
+            event = transform(event)
+        if apply_event(engine, event):
+            applied.append(event)
+    return applied
+
+
+# 프로세스 전역 저널
+_journal = None
+_journal_lock = threading.Lock()
+
+
+def get_journal():
+    global _journal
+    with _journal_lock:
+        if _journal is None:
+            _journal = Journal()
+        return _journal
@@ -0,0 +1,112 @@
+import contextlib
+import cProfile
+import io
+import pstats
+import threading
+import time
+from collections import deque
+
+import numpy as np
+
+from const import METRICS_PREFIX, METRICS_SAMPLES, PROFILE_TOP_FUNCTIONS
+
+
+# 구간별 소요 시간(span)과 카운터를 모으는 프로세스 측정기
+# - span 은 호출 수, 합계, 최대와 최근 METRICS_SAMPLES 건의 시간(p50/p99 계산용)만 보관하므로 메모리가 늘지 않음
+# - 측정 비용은 perf_counter 두 번과 잠금 한 번이라 매 재실행의 hot path 에 두어도 부담이 없음
+class Metrics:
+    def __init__(self, samples=METRICS_SAMPLES):
+        self.samples = samples
+        self._lock = threading.Lock()
+        self._spans = {}
+        self._counters = {}
+        self.started_at = time.time()
+
+    # with 문 구간의 소요 시간 기록
+    @contextlib.contextmanager
+    def span(self, name):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(name, time.perf_counter() - start)
+
+    def observe(self, name, seconds):
+        with self._lock:
+            span = self._spans.get(name)
+            if span is None:
+                span = self._spans[name] = {'count': 0, 'total': 0.0, 'max': 0.0, 'recent': deque(maxlen=self.samples)}
+            span['count'] += 1
+            span['total'] += seconds
+            span['max'] = max(span['max'], seconds)
+            span['recent'].append(seconds)
+
+    def count(self, name, value=1):
+        with self._lock:
+            self._counters[name] = self._counters.get(name, 0) + value
+
+    def reset(self):
+        with self._lock:
+            self._spans.clear()
+            self._counters.clear()
+            self.started_at = time.time()
+
+    # JSON 으로 직렬화할 수 있는 현재 값 (시간은 ms)
+    def snapshot(self):
+        with self._lock:
+            spans = {name: (span['count'], span['total'], span['max'], np.array(span['recent'])) for name, span in self._spans.items()}
+            counters = dict(self._counters)
+            started_at = self.started_at
+        result = {}
+        for name, (count, total, max_seconds, recent) in sorted(spans.items()):
+            result[name] = {
+                'count': count,
+                'total_ms': total * 1000,
+                'avg_ms': total / count * 1000,
+                'p50_ms': float(np.percentile(recent, 50)) * 1000,
+                'p99_ms': float(np.percentile(recent, 99)) * 1000,
+                'max_ms': max_seconds * 1000,
+            }
+        return {'uptime_seconds': time.time() - started_at, 'spans': result, 'counters': dict(sorted(counters.items()))}
+
+    # Prometheus 텍스트 형식 (span 은 summary, 카운터는 counter, gauges 는 저장소 상태 등 추가로 내보낼 값)
+    def to_prometheus(self, gauges=None):
+        snapshot = self.snapshot()
+        lines = [f"# HELP {METRICS_PREFIX}_span_seconds 구간별 소요 시간", f"# TYPE {METRICS_PREFIX}_span_seconds summary"]
+        for name, span in snapshot['spans'].items():
+            for quantile, key in (('0.5', 'p50_ms'), ('0.99', 'p99_ms')):
+                lines.append(f'{METRICS_PREFIX}_span_seconds{{span="{name}",quantile="{quantile}"}} {span[key] / 1000:.6f}')
+            lines.append(f'{METRICS_PREFIX}_span_seconds_sum{{span="{name}"}} {span["total_ms"] / 1000:.6f}')
+            lines.append(f'{METRICS_PREFIX}_span_seconds_count{{span="{name}"}} {span["count"]}')
+        for name, value in snapshot['counters'].items():
+            lines.append(f"# TYPE {METRICS_PREFIX}_{name}_total counter")
+            lines.append(f"{METRICS_PREFIX}_{name}_total {value}")
+        for name, value in (gauges or {}).items():
+            if isinstance(value, (int, float)) and not isinstance(value, bool):
+                lines.append(f"# TYPE {METRICS_PREFIX}_{name} gauge")
+                lines.append(f"{METRICS_PREFIX}_{name} {value}")
+        lines.append(f"# TYPE {METRICS_PREFIX}_uptime_seconds gauge")
+        lines.append(f"{METRICS_PREFIX}_uptime_seconds {snapshot['uptime_seconds']:.3f}")
+        return '\n'.join(lines) + '\n'
+
+
+# 함수 한 번을 cProfile 로 실행하고 (결과, 누적 시간 상위 함수 보고서) 반환
+# 예외가 나도(Streamlit 의 st.rerun/st.stop 포함) 보고서를 만든 뒤 다시 발생시킴
+def profile_call(fn, report, limit=PROFILE_TOP_FUNCTIONS):
+    profiler = cProfile.Profile()
+    profiler.enable()
+    try:
+        return fn()
+    finally:
+        profiler.disable()
+        stream = io.StringIO()
+        pstats.Stats(profiler, stream=stream).sort_stats('cumulative').print_stats(limit)
+        report(stream.getvalue())
+
+
+# 프로세스 전역 측정기
+_metrics = Metrics()
+
+
+def get_metrics():
+    return _metrics
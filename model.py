@@ -0,0 +1,136 @@
+import numpy as np
+import pandas as pd
+
+from const import COLUMN_NAMES, KEY_BONUS_TIME, KEY_BONUS_TIME_MS, KEY_CLASS, KEY_DIFF_TIME, KEY_DIFF_TIME_MS, KEY_LAP_NUMBER, KEY_LAP_TIME, KEY_LAP_TIME_MS, KEY_NAME, KEY_PENALTY_TIME, KEY_PENALTY_TIME_MS, KEY_RANKING, KEY_TOTAL_TIME, KEY_TOTAL_TIME_MS
+
+# 내부 리더보드 모델 컬럼 (시간은 모두 int64 밀리초)
+MODEL_COLUMNS = [KEY_NAME, KEY_CLASS, KEY_LAP_NUMBER, KEY_LAP_TIME_MS, KEY_BONUS_TIME_MS, KEY_PENALTY_TIME_MS, KEY_TOTAL_TIME_MS]
+MS_COLUMNS = [KEY_LAP_TIME_MS, KEY_BONUS_TIME_MS, KEY_PENALTY_TIME_MS, KEY_TOTAL_TIME_MS]
+
+
+# 빈 모델 생성
+def empty_model():
+    model = pd.DataFrame({column: pd.Series(dtype=np.int64) for column in MODEL_COLUMNS})
+    model[KEY_NAME] = model[KEY_NAME].astype(object)
+    model[KEY_CLASS] = model[KEY_CLASS].astype(object)
+    return model
+
+
+# "분:초:밀리초" 형식 (각 부분은 숫자만, 초는 0~59, 밀리초는 0~999)
+TIME_PATTERN = r'^([0-9]+):([0-9]+):([0-9]+)$'
+
+
+# "분:초:밀리초" 문자열 배열을 int64 밀리초 배열로 변환
+# 부분이 세 개가 아니거나, 숫자가 아닌 문자(부호, 소수점 등)가 있거나, 초/밀리초가 범위를 벗어나면 잘못된 값
+# errors='raise' 이면 ValueError, 'coerce' 이면 해당 행을 -1 로 표시
+def parse_time_strs(values, errors='raise'):
+    values = pd.Series(values, dtype=object).astype(str).str.strip()
+    if values.empty:
+        return np.empty(0, dtype=np.int64)
+    parts = values.str.extract(TIME_PATTERN).apply(pd.to_numeric).to_numpy(dtype=np.float64)
+    minutes, seconds, milliseconds = parts[:, 0], parts[:, 1], parts[:, 2]
+    valid = ~np.isnan(parts).any(axis=1) & (seconds < 60) & (milliseconds < 1000)
+    if not valid.all():
+        if errors == 'raise':
+            raise ValueError(f"시간은 '분:초:밀리초' 형식이어야 합니다: {values[~valid].iloc[0]}")
+    ms = np.where(valid, (minutes * 60 + seconds) * 1000 + milliseconds, -1)
+    return ms.astype(np.int64)
+
+
+# 초 단위 값(가산초, 패널티초) 배열을 int64 밀리초 배열로 변환
+def parse_secs(values, errors='raise'):
+    secs = pd.to_numeric(pd.Series(values, dtype=object).replace("", np.nan), errors=errors)
+    return np.rint(secs.fillna(0).to_numpy(dtype=np.float64) * 1000).astype(np.int64)
+
+
+# int64 밀리초 배열을 "분:초:밀리초" 문자열 배열로 변환
+def format_ms(ms):
+    ms = np.asarray(ms, dtype=np.int64)
+    minutes, rest = np.divmod(ms, 60000)
+    seconds, milliseconds = np.divmod(rest, 1000)
+    return (pd.Series(minutes).astype(str) + ':'
+            + pd.Series(seconds).astype(str).str.zfill(2) + ':'
+            + pd.Series(milliseconds).astype(str).str.zfill(3)).to_numpy(dtype=object)
+
+
+# int64 밀리초 배열을 "초.밀리초" 문자열 배열로 변환
+def format_secs(ms):
+    ms = np.asarray(ms, dtype=np.int64)
+    seconds, milliseconds = np.divmod(ms, 1000)
+    return (pd.Series(seconds).astype(str) + '.'
+            + pd.Series(milliseconds).astype(str).str.zfill(3)).to_numpy(dtype=object)
+
+
+# 가산초 표를 이름 → 가산초(ms) 해시 인덱스로 변환 (같은 이름이 여러 번 있으면 첫 번째 값 사용)
+def build_bonus_index(bonus_times):
+    if bonus_times.empty:
+        return {}
+    names = bonus_times[KEY_NAME].astype(str).to_numpy()
+    bonus_ms = parse_secs(bonus_times[KEY_BONUS_TIME])
+    return dict(zip(names[::-1].tolist(), bonus_ms[::-1].tolist()))
+
+
+# 가산초 인덱스에 등록된 선수의 가산초를 한 번의 map 으로 덮어쓰고 합계 시간 재계산
+def apply_bonus_index(model, bonus_index):
+    if bonus_index and not model.empty:
+        mapped = model[KEY_NAME].map(bonus_index)
+        model[KEY_BONUS_TIME_MS] = np.where(mapped.notna(), mapped, model[KEY_BONUS_TIME_MS]).astype(np.int64)
+    return compute_totals(model)
+
+
+# 합계 시간 계산 (랩타임 + 가산초 + 패널티초)
+def compute_totals(model):
+    model[KEY_TOTAL_TIME_MS] = (model[KEY_LAP_TIME_MS].to_numpy(dtype=np.int64)
+                                + model[KEY_BONUS_TIME_MS].to_numpy(dtype=np.int64)
+                                + model[KEY_PENALTY_TIME_MS].to_numpy(dtype=np.int64))
+    return model
+
+
+# 정렬된 합계 시간 배열로 순위(동일 시간은 같은 순위)와 앞 순위와의 시간 차이 계산
+def rank_and_gap(sorted_totals):
+    sorted_totals = np.asarray(sorted_totals, dtype=np.int64)
+    ranks = np.searchsorted(sorted_totals, sorted_totals, side='left') + 1
+    gaps = np.diff(sorted_totals, prepend=sorted_totals[:1])
+    return ranks.astype(np.int64), gaps.astype(np.int64)
+
+
+# CSV(문자열) 형식 리더보드를 모델로 변환
+def from_csv_frame(frame):
+    if frame.empty:
+        return empty_model()
+    model = pd.DataFrame({
+        KEY_NAME: frame[KEY_NAME].astype(str).to_numpy(dtype=object),
+        KEY_CLASS: frame[KEY_CLASS].astype(str).to_numpy(dtype=object),
+        KEY_LAP_NUMBER: pd.to_numeric(frame[KEY_LAP_NUMBER]).to_numpy(dtype=np.int64),
+        KEY_LAP_TIME_MS: parse_time_strs(frame[KEY_LAP_TIME]),
+        KEY_BONUS_TIME_MS: parse_secs(frame[KEY_BONUS_TIME]),
+        KEY_PENALTY_TIME_MS: parse_secs(frame[KEY_PENALTY_TIME]),
+    })
+    return compute_totals(model)[MODEL_COLUMNS]
+
+
+# 모델을 CSV(문자열) 형식 리더보드로 변환 (저장/내보내기 시점에만 사용)
+def to_csv_frame(model):
+    if model.empty:
+        return pd.DataFrame(columns=COLUMN_NAMES)
+    return pd.DataFrame({
+        KEY_NAME: model[KEY_NAME].to_numpy(),
+        KEY_CLASS: model[KEY_CLASS].to_numpy(),
+        KEY_LAP_NUMBER: model[KEY_LAP_NUMBER].to_numpy(dtype=np.int64),
+        KEY_LAP_TIME: format_ms(model[KEY_LAP_TIME_MS]),
+        KEY_BONUS_TIME: format_secs(model[KEY_BONUS_TIME_MS]),
+        KEY_PENALTY_TIME: format_secs(model[KEY_PENALTY_TIME_MS]),
+        KEY_TOTAL_TIME: format_ms(model[KEY_TOTAL_TIME_MS]),
+    }, columns=COLUMN_NAMES)
+
+
+# 순위가 계산된 모델을 화면 표시용 문자열 표로 변환
+def to_display(ranked):
+    display_data = to_csv_frame(ranked)
+    if ranked.empty:
+        display_data[KEY_RANKING] = pd.Series(dtype=np.int64)
+        display_data[KEY_DIFF_TIME] = pd.Series(dtype=object)
+    else:
+        display_data[KEY_RANKING] = ranked[KEY_RANKING].to_numpy(dtype=np.int64)
+        display_data[KEY_DIFF_TIME] = format_ms(ranked[KEY_DIFF_TIME_MS])
+    return display_data
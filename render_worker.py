@@ -0,0 +1,174 @@
+import multiprocessing
+import threading
+import time
+from concurrent.futures import BrokenExecutor, CancelledError, Future, ProcessPoolExecutor, ThreadPoolExecutor
+
+from const import RENDER_WORKERS
+from exporters import export_source, get_export_cache, record_export, render_bytes
+
+# 백그라운드에서 생성할 형식
+BACKGROUND_FORMATS = ('pdf', 'html')
+
+
+# 작업 프로세스에서 실행 (진행률은 Manager dict 로 전달)
+# 작업 프로세스의 측정기는 화면/API 에 보이지 않으므로 (결과, 소요 시간, 행 수)를 돌려주고 부모 프로세스가 기록
+def _render(job_id, progress_map, fmt, title, display_data, class_tables):
+    last = [0.0]
+
+    # 1% 이상 바뀐 경우에만 전달하여 프로세스 간 통신을 줄임
+    def progress(value):
+        if value - last[0] >= 0.01:
+            last[0] = value
+            progress_map[job_id] = value
+
+    start = time.perf_counter()
+    data = render_bytes(fmt, title, display_data, class_tables, progress)
+    progress_map[job_id] = 1.0
+    return data, time.perf_counter() - start, len(display_data)
+
+
+# 진행 중인 렌더링 작업
+class RenderJob:
+    def __init__(self, key, job_id, future, progress_map):
+        self.key = key
+        self.job_id = job_id
+        self.future = future
+        self.started = time.monotonic()
+        self._progress_map = progress_map
+
+    def done(self):
+        return self.future.done()
+
+    def error(self):
+        if not self.future.done():
+            return None
+        if self.future.cancelled():
+            return CancelledError("작업이 취소되었습니다.")
+        return self.future.exception()
+
+    def progress(self):
+        if self.future.done():
+            return 1.0
+        try:
+            return float(self._progress_map.get(self.job_id, 0.0))
+        except Exception:
+            return 0.0
+
+    def elapsed(self):
+        return time.monotonic() - self.started
+
+
+# PDF/HTML 생성 작업을 프로세스 풀에 맡기고, 같은 (version, 제목, 형식) 요청은 하나로 합침
+class RenderPool:
+    def __init__(self, max_workers=RENDER_WORKERS):
+        self._lock = threading.Lock()
+        self._jobs = {}
+        self._next_id = 0
+        self._executor = None
+        self._manager = None
+        self._progress_map = None
+        self.max_workers = max_workers
+
+    # 폰트는 PDF 를 만들 때 build_pdf 에서 등록하므로 작업 프로세스 초기화는 없음
+    # (폰트 파일이 없어도 HTML 생성은 가능하고, PDF 생성 실패는 해당 작업의 오류로만 보고됨)
+    def _ensure_executor(self):
+        if self._executor is not None:
+            return
+        try:
+            context = multiprocessing.get_context('spawn')
+            if self._manager is None:
+                self._manager = context.Manager()
+                self._progress_map = self._manager.dict()
+            self._executor = ProcessPoolExecutor(max_workers=self.max_workers, mp_context=context)
+        except (OSError, ImportError, NotImplementedError):
+            # 프로세스를 만들 수 없는 환경에서는 스레드로 대신 실행
+            self._progress_map = {}
+            self._executor = ThreadPoolExecutor(max_workers=self.max_workers)
+
+    # 작업 프로세스가 비정상 종료되어 깨진 풀은 버리고 다음 요청 때 새로 만듦 (self._lock 안에서 호출)
+    def _discard_executor(self, executor):
+        if executor is not None and self._executor is executor:
+            executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+    def _submit(self, job_id, fmt, title, display_data, class_tables):
+        self._ensure_executor()
+        executor = self._executor
+        return executor, executor.submit(_render, job_id, self._progress_map, fmt, title, display_data, class_tables)
+
+    # 렌더링 요청 (이미 캐시에 있으면 None, 진행 중인 같은 요청이 있으면 그 작업 반환)
+    def request(self, store, fmt, title):
+        version, display_data, class_tables = export_source(store)
+        key = (version, title, fmt)
+        if get_export_cache().peek(key) is not None:
+            return key, None
+        with self._lock:
+            job = self._jobs.get(key)
+            if job is not None:
+                return key, job
+            self._ensure_executor()
+            job_id = self._next_id
+            self._next_id += 1
+            try:
+                executor, future = self._submit(job_id, fmt, title, display_data, class_tables)
+            except BrokenExecutor:
+                # 이전 작업에서 풀이 깨졌으면 새 풀로 한 번 더 시도하고, 그래도 실패하면 작업의 오류로 보고
+                self._discard_executor(self._executor)
+                try:
+                    executor, future = self._submit(job_id, fmt, title, display_data, class_tables)
+                except BrokenExecutor as e:
+                    self._discard_executor(self._executor)
+                    executor, future = None, Future()
+                    future.set_exception(e)
+            job = RenderJob(key, job_id, future, self._progress_map)
+            self._jobs[key] = job
+        future.add_done_callback(lambda f, job=job, executor=executor: self._finish(job, executor))
+        return key, job
+
+    def _finish(self, job, executor):
+        error = job.error()
+        if error is None:
+            data, seconds, rows = job.future.result()
+            record_export(job.key[2], seconds, rows)
+            get_export_cache().put(job.key, data)
+        with self._lock:
+            # 실패한 작업은 오류 표시를 위해 남겨두고, 성공한 작업만 제거
+            if error is None:
+                self._jobs.pop(job.key, None)
+            elif isinstance(error, BrokenExecutor):
+                self._discard_executor(executor)
+        try:
+            self._progress_map.pop(job.job_id, None)
+        except Exception:
+            pass
+
+    def get(self, key):
+        with self._lock:
+            return self._jobs.get(key)
+
+    # 실패한 작업을 지워 다시 요청할 수 있게 함
+    def discard(self, key):
+        with self._lock:
+            self._jobs.pop(key, None)
+
+    def shutdown(self):
+        with self._lock:
+            if self._executor is not None:
+                self._executor.shutdown(wait=False, cancel_futures=True)
+                self._executor = None
+            if self._manager is not None:
+                self._manager.shutdown()
+                self._manager = None
+
+
+# 프로세스 전역 렌더링 풀
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def get_render_pool():
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = RenderPool()
+        return _pool
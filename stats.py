@@ -0,0 +1,217 @@
+import heapq
+from bisect import bisect_left, insort
+from itertools import islice
+
+import numpy as np
+import pandas as pd
+
+from const import KEY_AVERAGE_TIME, KEY_AVERAGE_TIME_MS, KEY_BEST_LAP_NUMBER, KEY_BEST_TIME, KEY_BEST_TIME_MS, KEY_CLASS, KEY_DIFF_TIME_MS, KEY_FIRST_TIME, KEY_FIRST_TIME_MS, KEY_IMPROVEMENT, KEY_IMPROVEMENT_MS, KEY_LAP_COUNT, KEY_LAP_NUMBER, KEY_LAST_TIME, KEY_LAST_TIME_MS, KEY_NAME, KEY_RANKING, KEY_STD_TIME, KEY_STD_TIME_MS, KEY_TOTAL_TIME_MS
+from model import format_ms, format_secs, rank_and_gap
+
+# 선수별 통계 컬럼 (시간은 합계 시간 기준 밀리초, 평균/표준편차는 실수)
+# - 첫 주행/마지막 주행: 주행 차수가 가장 작은/큰 주행의 합계 시간
+# - 향상: 첫 주행 - 마지막 주행 (양수이면 빨라짐)
+# - 표준편차: 표본 표준편차 (주행이 한 번이면 NaN)
+STATS_COLUMNS = [KEY_NAME, KEY_CLASS, KEY_LAP_COUNT, KEY_BEST_TIME_MS, KEY_BEST_LAP_NUMBER, KEY_AVERAGE_TIME_MS, KEY_STD_TIME_MS,
+                 KEY_FIRST_TIME_MS, KEY_LAST_TIME_MS, KEY_IMPROVEMENT_MS]
+
+
+# 선수 한 명(클래스별)의 누적 값
+# laps 는 주행 차수 → 엔진 정렬 항목 (합계 시간, 입력 순번, 키)
+class _Driver:
+    __slots__ = ('laps', 'total', 'total_sq', 'best', 'first_lap', 'last_lap')
+
+    def __init__(self):
+        self.laps = {}
+        self.total = 0
+        self.total_sq = 0
+        self.best = None
+        self.first_lap = None
+        self.last_lap = None
+
+
+# 증분 선수 통계
+# - 기록이 추가/삭제될 때 해당 선수의 합계, 제곱합, 최고 기록, 첫/마지막 주행만 갱신하므로
+#   조회 시 전체 기록을 다시 훑지 않고 선수 수만큼만 계산 (평균/표준편차는 합계와 제곱합으로 한 번에 계산)
+# - 클래스별 선수 최고 기록은 엔진과 같은 (합계 시간, 입력 순번, 키) 정렬 리스트로 유지하여
+#   최고 기록만의 순위와 클래스 기록을 바로 얻음
+class DriverStats:
+    def __init__(self):
+        self._drivers = {}
+        self._bests = {}
+
+    def __len__(self):
+        return sum(len(drivers) for drivers in self._drivers.values())
+
+    # 기록 추가 후 (선수, 이전 최고 기록) 반환
+    def _add(self, item):
+        class_name, name, lap_number = item[2]
+        driver = self._drivers.setdefault(class_name, {}).get(name)
+        if driver is None:
+            driver = self._drivers[class_name][name] = _Driver()
+        previous_best = driver.best
+        driver.laps[lap_number] = item
+        driver.total += item[0]
+        driver.total_sq += item[0] * item[0]
+        if driver.best is None or item < driver.best:
+            driver.best = item
+        if driver.first_lap is None or lap_number < driver.first_lap:
+            driver.first_lap = lap_number
+        if driver.last_lap is None or lap_number > driver.last_lap:
+            driver.last_lap = lap_number
+        return driver, previous_best
+
+    def add(self, item):
+        driver, previous_best = self._add(item)
+        if driver.best != previous_best:
+            bests = self._bests.setdefault(item[2][0], [])
+            if previous_best is not None:
+                del bests[bisect_left(bests, previous_best)]
+            insort(bests, driver.best)
+
+    # 여러 기록을 한 번에 추가 (최고 기록이 바뀐 클래스만 마지막에 한 번 정렬)
+    def add_many(self, items):
+        touched = set()
+        for item in items:
+            driver, previous_best = self._add(item)
+            if driver.best != previous_best:
+                touched.add(item[2][0])
+        for class_name in touched:
+            self._bests[class_name] = sorted(driver.best for driver in self._drivers[class_name].values())
+
+    def remove(self, item):
+        class_name, name, lap_number = item[2]
+        drivers = self._drivers[class_name]
+        driver = drivers[name]
+        del driver.laps[lap_number]
+        bests = self._bests[class_name]
+        if not driver.laps:
+            del drivers[name]
+            del bests[bisect_left(bests, driver.best)]
+            if not drivers:
+                del self._drivers[class_name]
+                del self._bests[class_name]
+            return
+        driver.total -= item[0]
+        driver.total_sq -= item[0] * item[0]
+        # 지워진 기록이 최고 기록이나 첫/마지막 주행이었던 경우에만 해당 선수의 주행으로 다시 계산
+        if item == driver.best:
+            del bests[bisect_left(bests, driver.best)]
+            driver.best = min(driver.laps.values())
+            insort(bests, driver.best)
+        if lap_number == driver.first_lap:
+            driver.first_lap = min(driver.laps)
+        if lap_number == driver.last_lap:
+            driver.last_lap = max(driver.laps)
+
+    def clear(self):
+        self._drivers.clear()
+        self._bests.clear()
+
+    # 선수별 최고 기록 항목 (클래스별 또는 전체, 합계 시간 순, limit 이 주어지면 앞에서부터 limit 건만)
+    def best_items(self, class_name=None, limit=None):
+        if class_name is not None:
+            return self._bests.get(class_name, [])[:limit]
+        return list(islice(heapq.merge(*self._bests.values()), limit))
+
+    # 선수 수 (클래스별 또는 전체)
+    def count(self, class_name=None):
+        if class_name is not None:
+            return len(self._bests.get(class_name, ()))
+        return len(self)
+
+    # 선수별 통계 (클래스 이름 순, 클래스 안에서는 최고 기록 순)
+    def to_frame(self, class_name=None):
+        classes = sorted(self._drivers) if class_name is None else [class_name] if class_name in self._drivers else []
+        drivers = [(class_name, self._drivers[class_name][item[2][1]]) for class_name in classes for item in self._bests[class_name]]
+        if not drivers:
+            return empty_stats()
+        count = len(drivers)
+        laps = np.fromiter((len(driver.laps) for _, driver in drivers), dtype=np.int64, count=count)
+        totals = np.fromiter((driver.total for _, driver in drivers), dtype=np.float64, count=count)
+        totals_sq = np.fromiter((driver.total_sq for _, driver in drivers), dtype=np.float64, count=count)
+        first = np.fromiter((driver.laps[driver.first_lap][0] for _, driver in drivers), dtype=np.int64, count=count)
+        last = np.fromiter((driver.laps[driver.last_lap][0] for _, driver in drivers), dtype=np.int64, count=count)
+        with np.errstate(invalid='ignore', divide='ignore'):
+            variance = (totals_sq - totals * totals / laps) / (laps - 1)
+        return pd.DataFrame({
+            KEY_NAME: [driver.best[2][1] for _, driver in drivers],
+            KEY_CLASS: [class_name for class_name, _ in drivers],
+            KEY_LAP_COUNT: laps,
+            KEY_BEST_TIME_MS: np.fromiter((driver.best[0] for _, driver in drivers), dtype=np.int64, count=count),
+            KEY_BEST_LAP_NUMBER: np.fromiter((driver.best[2][2] for _, driver in drivers), dtype=np.int64, count=count),
+            KEY_AVERAGE_TIME_MS: totals / laps,
+            KEY_STD_TIME_MS: np.sqrt(np.maximum(variance, 0)),
+            KEY_FIRST_TIME_MS: first,
+            KEY_LAST_TIME_MS: last,
+            KEY_IMPROVEMENT_MS: first - last,
+        }, columns=STATS_COLUMNS)
+
+
+def empty_stats():
+    stats = pd.DataFrame({column: pd.Series(dtype=np.int64) for column in STATS_COLUMNS})
+    stats[KEY_NAME] = stats[KEY_NAME].astype(object)
+    stats[KEY_CLASS] = stats[KEY_CLASS].astype(object)
+    stats[KEY_AVERAGE_TIME_MS] = stats[KEY_AVERAGE_TIME_MS].astype(np.float64)
+    stats[KEY_STD_TIME_MS] = stats[KEY_STD_TIME_MS].astype(np.float64)
+    return stats
+
+
+# 순위가 계산된 모델(합계 시간 순)에서 선수별 통계를 그룹 집계로 계산 (보관된 이벤트 등 증분 통계가 없는 경우)
+# 결과는 DriverStats.to_frame 과 같은 컬럼/순서
+def aggregate_stats(ranked):
+    if ranked.empty:
+        return empty_stats()
+    keys = [KEY_CLASS, KEY_NAME]
+    totals = ranked[KEY_TOTAL_TIME_MS].astype(np.int64)
+    grouped = totals.groupby([ranked[KEY_CLASS], ranked[KEY_NAME]], sort=False)
+    # 합계 시간 순으로 정렬되어 있으므로 그룹의 첫 행이 최고 기록
+    bests = ranked.drop_duplicates(keys).set_index(keys)
+    by_lap = ranked.sort_values(KEY_LAP_NUMBER, kind='stable').groupby(keys, sort=False)[KEY_TOTAL_TIME_MS]
+    stats = pd.DataFrame({
+        KEY_LAP_COUNT: grouped.size(),
+        KEY_BEST_TIME_MS: bests[KEY_TOTAL_TIME_MS],
+        KEY_BEST_LAP_NUMBER: bests[KEY_LAP_NUMBER],
+        KEY_AVERAGE_TIME_MS: grouped.mean(),
+        KEY_STD_TIME_MS: grouped.std(),
+        KEY_FIRST_TIME_MS: by_lap.first(),
+        KEY_LAST_TIME_MS: by_lap.last(),
+    }).reindex(bests.index).reset_index()
+    stats[KEY_IMPROVEMENT_MS] = stats[KEY_FIRST_TIME_MS] - stats[KEY_LAST_TIME_MS]
+    return stats.sort_values(KEY_CLASS, kind='stable')[STATS_COLUMNS].reset_index(drop=True)
+
+
+# 순위가 계산된 모델에서 선수별 최고 기록만 남기고 순위/시간 차이 재계산
+def best_laps_model(ranked):
+    best = ranked.drop_duplicates([KEY_CLASS, KEY_NAME]).reset_index(drop=True)
+    best[KEY_RANKING], best[KEY_DIFF_TIME_MS] = rank_and_gap(best[KEY_TOTAL_TIME_MS].to_numpy(dtype=np.int64))
+    return best
+
+
+# 클래스별 기록 (클래스마다 최고 기록 선수 한 명)
+def class_records(stats):
+    return stats.drop_duplicates(KEY_CLASS).reset_index(drop=True)
+
+
+def _format_signed_secs(ms):
+    ms = np.asarray(ms, dtype=np.int64)
+    return np.where(ms < 0, '-', '') + format_secs(np.abs(ms))
+
+
+# 선수별 통계를 화면 표시용 문자열 표로 변환 (기록은 분:초:밀리초, 표준편차/향상은 초)
+def stats_display(stats):
+    display_data = pd.DataFrame({
+        KEY_CLASS: stats[KEY_CLASS].to_numpy(),
+        KEY_NAME: stats[KEY_NAME].to_numpy(),
+        KEY_LAP_COUNT: stats[KEY_LAP_COUNT].to_numpy(dtype=np.int64),
+        KEY_BEST_TIME: format_ms(stats[KEY_BEST_TIME_MS]),
+        KEY_BEST_LAP_NUMBER: stats[KEY_BEST_LAP_NUMBER].to_numpy(dtype=np.int64),
+        KEY_AVERAGE_TIME: format_ms(np.rint(stats[KEY_AVERAGE_TIME_MS].to_numpy(dtype=np.float64))),
+        KEY_STD_TIME: np.where(stats[KEY_STD_TIME_MS].isna(), "",
+                               format_secs(np.rint(stats[KEY_STD_TIME_MS].fillna(0).to_numpy(dtype=np.float64)))),
+        KEY_FIRST_TIME: format_ms(stats[KEY_FIRST_TIME_MS]),
+        KEY_LAST_TIME: format_ms(stats[KEY_LAST_TIME_MS]),
+        KEY_IMPROVEMENT: _format_signed_secs(stats[KEY_IMPROVEMENT_MS]),
+    })
+    display_data.index = display_data.index + 1
+    return display_data
@@ -0,0 +1,456 @@
+import argparse
+import os
+import sqlite3
+import threading
+
+import numpy as np
+import pandas as pd
+
+from const import BONUS_TIME_FILE, COLUMN_NAMES, DATA_FILE, DEFAULT_TITLE, JOURNAL_COMPACT_EVENTS, KEY_BONUS_TIME, KEY_BONUS_TIME_MS, KEY_CLASS, KEY_DIFF_TIME_MS, KEY_LAP_COUNT, KEY_LAP_NUMBER, KEY_LAP_TIME_MS, KEY_NAME, KEY_PENALTY_TIME_MS, KEY_RANKING, KEY_TOTAL_TIME_MS, SQLITE_FILE, STORAGE_BACKEND, TITLE_FILE
+from engine import LeaderboardEngine
+from fileutils import file_lock
+from journal import OP_DELETE, OP_RESET, OP_SUBMIT, Journal, apply_events, get_journal
+from model import MODEL_COLUMNS, apply_bonus_index, build_bonus_index, from_csv_frame, to_csv_frame
+
+# 개인 최고 기록 컬럼
+BEST_COLUMNS = [KEY_NAME, KEY_CLASS, KEY_LAP_NUMBER, KEY_TOTAL_TIME_MS, KEY_LAP_COUNT]
+
+
+# 가산초 파일 읽기
+def read_bonus_times():
+    if os.path.exists(BONUS_TIME_FILE) and os.path.getsize(BONUS_TIME_FILE) > 0:
+        return pd.read_csv(BONUS_TIME_FILE, encoding='utf-8', dtype={KEY_NAME: str})
+    return pd.DataFrame(columns=[KEY_NAME, KEY_BONUS_TIME])
+
+
+# 리더보드 제목 읽기
+def read_title():
+    if os.path.exists(TITLE_FILE):
+        with open(TITLE_FILE, 'r', encoding='utf-8') as f:
+            return f.read().strip()
+    return DEFAULT_TITLE
+
+
+# 리더보드 CSV 읽기
+def read_csv_board(path):
+    if os.path.exists(path) and os.path.getsize(path) > 0:
+        return pd.read_csv(path, encoding='utf-8', dtype={KEY_NAME: str, KEY_CLASS: str})
+    return pd.DataFrame(columns=COLUMN_NAMES)
+
+
+# 파일 변경 감지용 (수정 시각, 크기)
+def file_signature(*paths):
+    signature = []
+    for path in paths:
+        try:
+            stat = os.stat(path)
+            signature.append((stat.st_mtime_ns, stat.st_size))
+        except FileNotFoundError:
+            signature.append(None)
+    return tuple(signature)
+
+
+# 가산초 파일에 등록된 선수는 제출 이벤트의 가산초를 덮어씀
+def bonus_override(bonus_index):
+    def transform(event):
+        if event.get('op') == OP_SUBMIT and event['name'] in bonus_index:
+            event = dict(event, bonus_ms=bonus_index[event['name']])
+        return event
+    return transform
+
+
+# 저장소 인터페이스
+# - load: 저장된 기록으로 엔진 생성 (가산초 인덱스 적용)
+# - catch_up: 마지막 load 이후 다른 프로세스가 추가한 이벤트만 엔진에 적용하고 적용된 이벤트 목록 반환
+#   (증분으로 따라잡을 수 없으면 None → load 로 전체를 다시 읽음)
+# - append / append_many: 제출/삭제/초기화 이벤트 저장
+# - write_snapshot: 엔진 상태 전체를 저장 (초기화, CSV 업로드)
+# - writer_lock: 여러 프로세스가 같은 저장소에 쓸 때 한 번에 하나만 쓰도록 잠금
+# - top_n_per_class / personal_bests: 저장소에서 직접 조회할 수 없으면 None (메모리에서 계산)
+class Storage:
+    name = None
+
+    def signature(self):
+        raise NotImplementedError
+
+    # 다른 프로세스와 쓰기를 직렬화하는 잠금 (with 문으로 사용)
+    def writer_lock(self):
+        return file_lock(self.lock_file)
+
+    def read_bonus_times(self):
+        return read_bonus_times()
+
+    def load(self, bonus_index):
+        raise NotImplementedError
+
+    def catch_up(self, engine, bonus_index):
+        return None
+
+    def append(self, event, sync=False):
+        raise NotImplementedError
+
+    def append_many(self, events):
+        for event in events:
+            self.append(event)
+
+    def write_snapshot(self, engine):
+        raise NotImplementedError
+
+    def maybe_compact(self, engine):
+        return False
+
+    def sync(self):
+        pass
+
+    # 미뤄 둔 fsync 가 있고 시간이 지났으면 수행 (SQLite 는 WAL 체크포인트에 맡기므로 해당 없음)
+    def sync_if_due(self):
+        pass
+
+    def close(self):
+        pass
+
+    def top_n_per_class(self, n, class_name=None):
+        return None
+
+    def personal_bests(self, class_name=None):
+        return None
+
+
+# CSV 스냅샷 + 저널 저장소 (기본값)
+class CsvStorage(Storage):
+    name = 'csv'
+
+    def __init__(self, snapshot_file=DATA_FILE, journal=None):
+        self.snapshot_file = snapshot_file
+        self.journal = journal or Journal(snapshot_file=snapshot_file)
+        self.lock_file = f"{snapshot_file}.lock"
+        self._base_signature = (None, None)
+
+    def signature(self):
+        return file_signature(self.snapshot_file, self.journal.journal_file, BONUS_TIME_FILE)
+
+    # 스냅샷(CSV) 로드 후 저널 재적용 (가산초 파일에 등록된 선수는 가산초를 덮어씀)
+    def load(self, bonus_index):
+        # 다른 프로세스가 압축하면서 저널 파일을 교체했을 수 있으므로 다음 추가 시 경로로 다시 열도록 닫음
+        self.journal.close()
+        self._base_signature = file_signature(self.snapshot_file, BONUS_TIME_FILE)
+        model = apply_bonus_index(from_csv_frame(read_csv_board(self.snapshot_file)), bonus_index)
+        engine = LeaderboardEngine.from_model(model)
+        self.journal.replay(engine, transform=bonus_override(bonus_index))
+        return engine
+
+    # 저널에 이어 쓰인 이벤트만 적용
+    # 가산초 파일이 바뀌었거나, 저널을 이어 읽을 수 없거나, 압축 없이 스냅샷만 바뀐 경우(직접 수정)에는 None
+    def catch_up(self, engine, bonus_index):
+        snapshot_signature, bonus_signature = file_signature(self.snapshot_file, BONUS_TIME_FILE)
+        if bonus_signature != self._base_signature[1]:
+            return None
+        rotations = self.journal.rotations
+        events = self.journal.read_new_events()
+        if events is None or (snapshot_signature != self._base_signature[0] and self.journal.rotations == rotations):
+            return None
+        self._base_signature = (snapshot_signature, bonus_signature)
+        return apply_events(engine, events, bonus_override(bonus_index))
+
+    def append(self, event, sync=False):
+        self.journal.append(event, sync=sync)
+
+    def append_many(self, events):
+        self.journal.append_many(events)
+
+    def write_snapshot(self, engine):
+        self.journal.compact(engine)
+        self._base_signature = file_signature(self.snapshot_file, BONUS_TIME_FILE)
+
+    def maybe_compact(self, engine):
+        if not self.journal.maybe_compact(engine):
+            return False
+        self._base_signature = file_signature(self.snapshot_file, BONUS_TIME_FILE)
+        return True
+
+    def sync(self):
+        self.journal.sync()
+
+    def sync_if_due(self):
+        self.journal.sync_if_due()
+
+    def close(self):
+        self.journal.close()
+
+
+# SQLite(WAL) 저장소
+# - (class, total_ms) 인덱스로 클래스별 순위/상위 N 조회, (name, class, lap) 고유 인덱스로 중복 확인
+# - total_ms 는 lap_ms + bonus_ms + penalty_ms 로 계산되어 저장되는 컬럼
+# - laps 의 추가/삭제는 트리거로 changes 에 기록되어 다른 프로세스가 이어서 따라잡을 수 있음
+#   (전체 교체 시에는 changes 를 비우고 meta 의 generation 을 올려 전체를 다시 읽게 함)
+class SqliteStorage(Storage):
+    name = 'sqlite'
+
+    SCHEMA = """
+    CREATE TABLE IF NOT EXISTS laps (
+        id INTEGER PRIMARY KEY,
+        name TEXT NOT NULL,
+        class TEXT NOT NULL,
+        lap INTEGER NOT NULL,
+        lap_ms INTEGER NOT NULL,
+        bonus_ms INTEGER NOT NULL DEFAULT 0,
+        penalty_ms INTEGER NOT NULL DEFAULT 0,
+        total_ms INTEGER GENERATED ALWAYS AS (lap_ms + bonus_ms + penalty_ms) STORED
+    );
+    CREATE UNIQUE INDEX IF NOT EXISTS laps_name_class_lap ON laps (name, class, lap);
+    CREATE INDEX IF NOT EXISTS laps_class_total ON laps (class, total_ms);
+    CREATE TABLE IF NOT EXISTS bonus_times (
+        name TEXT PRIMARY KEY,
+        bonus_ms INTEGER NOT NULL
+    );
+    CREATE TABLE IF NOT EXISTS meta (
+        key TEXT PRIMARY KEY,
+        value TEXT
+    );
+    CREATE TABLE IF NOT EXISTS changes (
+        seq INTEGER PRIMARY KEY AUTOINCREMENT,
+        op TEXT NOT NULL,
+        name TEXT NOT NULL,
+        class TEXT NOT NULL,
+        lap INTEGER NOT NULL,
+        lap_ms INTEGER,
+        bonus_ms INTEGER,
+        penalty_ms INTEGER
+    );
+    CREATE TRIGGER IF NOT EXISTS laps_insert_change AFTER INSERT ON laps BEGIN
+        INSERT INTO changes (op, name, class, lap, lap_ms, bonus_ms, penalty_ms)
+        VALUES ('submit', NEW.name, NEW.class, NEW.lap, NEW.lap_ms, NEW.bonus_ms, NEW.penalty_ms);
+    END;
+    CREATE TRIGGER IF NOT EXISTS laps_delete_change AFTER DELETE ON laps BEGIN
+        INSERT INTO changes (op, name, class, lap) VALUES ('delete', OLD.name, OLD.class, OLD.lap);
+    END;
+    """
+
+    def __init__(self, path=SQLITE_FILE, legacy_csv=DATA_FILE):
+        self.path = path
+        self.legacy_csv = legacy_csv
+        self.lock_file = f"{path}.lock"
+        self._lock = threading.RLock()
+        self._base_bonus = None
+        self._generation = None
+        self._last_seq = 0
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript(self.SCHEMA)
+        self._migrate_legacy_csv()
+
+    # 처음 사용할 때 기존 CSV 스냅샷과 저널을 가져옴
+    def _migrate_legacy_csv(self):
+        with self._lock, self.writer_lock():
+            if self._conn.execute("SELECT value FROM meta WHERE key = 'migrated'").fetchone() is not None:
+                return
+            if self.legacy_csv:
+                engine = CsvStorage(self.legacy_csv).load({})
+                if len(engine):
+                    self.write_snapshot(engine)
+            self._conn.execute("INSERT OR REPLACE INTO meta (key, value) VALUES ('migrated', '1')")
+
+    # 다른 연결(프로세스)에서 커밋하면 data_version 이 바뀜
+    def signature(self):
+        with self._lock:
+            data_version = self._conn.execute("PRAGMA data_version").fetchone()[0]
+        return (data_version,) + file_signature(BONUS_TIME_FILE)
+
+    # 가산초 표를 DB 에 반영하고 해당 선수의 가산초를 덮어쓴 뒤 전체 기록 로드
+    # (가산초 표가 바뀐 경우에만 쓰므로 읽기만 하는 프로세스가 다른 프로세스의 data_version 을 바꾸지 않음)
+    def load(self, bonus_index):
+        with self._lock:
+            self._base_bonus = file_signature(BONUS_TIME_FILE)
+            stored_bonus = dict(self._conn.execute("SELECT name, bonus_ms FROM bonus_times").fetchall())
+            if stored_bonus != bonus_index:
+                self._transaction(self._store_bonus, bonus_index)
+            self._conn.execute("BEGIN")
+            try:
+                rows = self._conn.execute("SELECT name, class, lap, lap_ms, bonus_ms, penalty_ms, total_ms FROM laps ORDER BY id").fetchall()
+                self._generation = self._meta('generation')
+                self._last_seq = self._current_seq()
+            finally:
+                self._conn.execute("COMMIT")
+        return LeaderboardEngine.from_model(self._rows_to_model(rows))
+
+    def _store_bonus(self, bonus_index):
+        self._conn.execute("DELETE FROM bonus_times")
+        self._conn.executemany("INSERT INTO bonus_times (name, bonus_ms) VALUES (?, ?)", bonus_index.items())
+        self._conn.execute("UPDATE laps SET bonus_ms = (SELECT b.bonus_ms FROM bonus_times b WHERE b.name = laps.name) "
+                           "WHERE name IN (SELECT name FROM bonus_times)")
+
+    def _transaction(self, func, *args):
+        self._conn.execute("BEGIN IMMEDIATE")
+        try:
+            result = func(*args)
+            self._conn.execute("COMMIT")
+        except BaseException:
+            self._conn.execute("ROLLBACK")
+            raise
+        return result
+
+    def _meta(self, key):
+        row = self._conn.execute("SELECT value FROM meta WHERE key = ?", (key,)).fetchone()
+        return None if row is None else row[0]
+
+    # 마지막으로 발급된 changes 번호 (행이 지워져도 AUTOINCREMENT 번호는 유지됨)
+    def _current_seq(self):
+        row = self._conn.execute("SELECT seq FROM sqlite_sequence WHERE name = 'changes'").fetchone()
+        return 0 if row is None else row[0]
+
+    # changes 에서 마지막으로 읽은 번호 이후의 추가/삭제만 적용
+    def catch_up(self, engine, bonus_index):
+        with self._lock:
+            if file_signature(BONUS_TIME_FILE) != self._base_bonus:
+                return None
+            self._conn.execute("BEGIN")
+            try:
+                if self._meta('generation') != self._generation:
+                    return None
+                first_seq = self._conn.execute("SELECT MIN(seq) FROM changes").fetchone()[0]
+                if first_seq is not None and first_seq > self._last_seq + 1:
+                    return None
+                rows = self._conn.execute("SELECT seq, op, name, class, lap, lap_ms, bonus_ms, penalty_ms FROM changes WHERE seq > ? ORDER BY seq",
+                                          (self._last_seq,)).fetchall()
+            finally:
+                self._conn.execute("COMMIT")
+        if rows:
+            self._last_seq = rows[-1][0]
+        events = [{'op': op, 'name': name, 'class': class_name, 'lap': lap, 'lap_ms': lap_ms, 'bonus_ms': bonus_ms, 'penalty_ms': penalty_ms}
+                  for _, op, name, class_name, lap, lap_ms, bonus_ms, penalty_ms in rows]
+        return apply_events(engine, events, bonus_override(bonus_index))
+
+    @staticmethod
+    def _rows_to_model(rows, columns=MODEL_COLUMNS):
+        if not rows:
+            return pd.DataFrame({column: pd.Series(dtype=object if column in (KEY_NAME, KEY_CLASS) else np.int64) for column in columns})
+        return pd.DataFrame.from_records(rows, columns=columns)
+
+    def _apply(self, event):
+        op = event.get('op')
+        if op == OP_SUBMIT:
+            self._conn.execute("INSERT OR IGNORE INTO laps (name, class, lap, lap_ms, bonus_ms, penalty_ms) VALUES (?, ?, ?, ?, ?, ?)",
+                               (event['name'], event['class'], event['lap'], event['lap_ms'], event['bonus_ms'], event['penalty_ms']))
+        elif op == OP_DELETE:
+            self._conn.execute("DELETE FROM laps WHERE name = ? AND class = ? AND lap = ?", (event['name'], event['class'], event['lap']))
+        elif op == OP_RESET:
+            self._conn.execute("DELETE FROM laps")
+
+    def append(self, event, sync=False):
+        self.append_many([event])
+
+    # 여러 이벤트를 하나의 트랜잭션으로 저장
+    # (쓰기 잠금 안에서 따라잡은 뒤 호출되므로 이번에 생긴 changes 는 자신이 쓴 것)
+    def append_many(self, events):
+        if not events:
+            return
+        with self._lock:
+            self._last_seq = self._transaction(self._append_events, events)
+
+    def _append_events(self, events):
+        for event in events:
+            self._apply(event)
+        return self._current_seq()
+
+    def write_snapshot(self, engine):
+        model = engine.to_model()
+        rows = zip(model[KEY_NAME], model[KEY_CLASS], model[KEY_LAP_NUMBER].tolist(), model[KEY_LAP_TIME_MS].tolist(),
+                   model[KEY_BONUS_TIME_MS].tolist(), model[KEY_PENALTY_TIME_MS].tolist())
+        with self._lock:
+            self._generation, self._last_seq = self._transaction(self._replace_laps, rows)
+
+    def _replace_laps(self, rows):
+        self._conn.execute("DELETE FROM laps")
+        self._conn.executemany("INSERT INTO laps (name, class, lap, lap_ms, bonus_ms, penalty_ms) VALUES (?, ?, ?, ?, ?, ?)", rows)
+        self._conn.execute("DELETE FROM changes")
+        generation = str(int(self._meta('generation') or 0) + 1)
+        self._conn.execute("INSERT OR REPLACE INTO meta (key, value) VALUES ('generation', ?)", (generation,))
+        return generation, self._current_seq()
+
+    # 오래된 changes 정리 (이보다 뒤처진 프로세스는 전체를 다시 읽음)
+    def maybe_compact(self, engine):
+        with self._lock:
+            first_seq = self._conn.execute("SELECT MIN(seq) FROM changes").fetchone()[0]
+            if first_seq is not None and self._last_seq - first_seq >= 2 * JOURNAL_COMPACT_EVENTS:
+                self._transaction(self._conn.execute, "DELETE FROM changes WHERE seq <= ?", (self._last_seq - JOURNAL_COMPACT_EVENTS,))
+        return False
+
+    def sync(self):
+        with self._lock:
+            self._conn.execute("PRAGMA wal_checkpoint(PASSIVE)")
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+    # 클래스별 상위 n 위 (동일한 시간은 같은 순위, class_name 이 주어지면 해당 클래스만)
+    def top_n_per_class(self, n, class_name=None):
+        query = """
+        SELECT name, class, lap, lap_ms, bonus_ms, penalty_ms, total_ms, rank, total_ms - prev_ms FROM (
+            SELECT *,
+                   RANK() OVER (PARTITION BY class ORDER BY total_ms) AS rank,
+                   LAG(total_ms, 1, total_ms) OVER (PARTITION BY class ORDER BY total_ms, id) AS prev_ms
+            FROM laps {where}
+        ) WHERE rank <= ? ORDER BY class, total_ms, id
+        """
+        with self._lock:
+            if class_name is None:
+                rows = self._conn.execute(query.format(where=""), (n,)).fetchall()
+            else:
+                rows = self._conn.execute(query.format(where="WHERE class = ?"), (class_name, n)).fetchall()
+        return self._rows_to_model(rows, MODEL_COLUMNS + [KEY_RANKING, KEY_DIFF_TIME_MS])
+
+    # 선수별(클래스별) 최고 기록과 주행 수
+    def personal_bests(self, class_name=None):
+        query = """
+        SELECT name, class, lap, total_ms, laps FROM (
+            SELECT id, name, class, lap, total_ms,
+                   ROW_NUMBER() OVER (PARTITION BY name, class ORDER BY total_ms, id) AS position,
+                   COUNT(*) OVER (PARTITION BY name, class) AS laps
+            FROM laps {where}
+        ) WHERE position = 1 ORDER BY class, total_ms, id
+        """
+        with self._lock:
+            if class_name is None:
+                rows = self._conn.execute(query.format(where="")).fetchall()
+            else:
+                rows = self._conn.execute(query.format(where="WHERE class = ?"), (class_name,)).fetchall()
+        return self._rows_to_model(rows, BEST_COLUMNS)
+
+
+# 설정에 따른 저장소 생성
+def create_storage(backend=STORAGE_BACKEND):
+    if backend == 'sqlite':
+        return SqliteStorage()
+    if backend == 'csv':
+        return CsvStorage(journal=get_journal())
+    raise ValueError(f"지원하지 않는 저장소입니다: {backend}")
+
+
+# 저장소 간 데이터 옮기기 및 CSV 내보내기
+def main():
+    parser = argparse.ArgumentParser(description="리더보드 저장소 관리")
+    subparsers = parser.add_subparsers(dest='command', required=True)
+    copy_parser = subparsers.add_parser('copy', help="한 저장소의 기록을 다른 저장소로 복사")
+    copy_parser.add_argument('source', choices=['csv', 'sqlite'])
+    copy_parser.add_argument('target', choices=['csv', 'sqlite'])
+    export_parser = subparsers.add_parser('export', help="저장소의 기록을 CSV 로 내보내기")
+    export_parser.add_argument('path')
+    export_parser.add_argument('--backend', choices=['csv', 'sqlite'], default=STORAGE_BACKEND)
+    args = parser.parse_args()
+
+    # 앱과 같은 가산초 인덱스로 읽음 (빈 인덱스로 읽으면 SQLite 저장소는 저장된 가산초 표를 비워 버림)
+    bonus_index = build_bonus_index(read_bonus_times())
+    if args.command == 'copy':
+        engine = create_storage(args.source).load(bonus_index)
+        create_storage(args.target).write_snapshot(engine)
+        print(f"{len(engine)}건 복사 완료 ({args.source} -> {args.target})")
+    elif args.command == 'export':
+        engine = create_storage(args.backend).load(bonus_index)
+        to_csv_frame(engine.to_model()).to_csv(args.path, index=False, encoding='utf-8')
+        print(f"{len(engine)}건 내보내기 완료 ({args.path})")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,441 @@
+import contextlib
+import os
+import threading
+import time
+import uuid
+from collections import deque
+
+import numpy as np
+
+import pandas as pd
+
+from const import EVENTS_DIR, TABLE_PAGE_SIZE, KEY_BEST_LAP_NUMBER, KEY_BEST_TIME_MS, KEY_BONUS_TIME, KEY_LAP_NUMBER, KEY_NAME, KEY_RANKING, KEY_TOTAL_TIME_MS, COMMIT_LATENCY_SAMPLES, RERUN_WINDOW_SECONDS
+from changefeed import ChangeFeed
+from engine import LeaderboardEngine
+from events import archive_event
+from journal import OP_RESET, OP_SUBMIT, delete_event, reset_event, submit_event
+from metrics import get_metrics
+from model import build_bonus_index, to_display
+from stats import class_records
+from storage import BEST_COLUMNS, create_storage
+
+
+# 현재 프로세스의 RSS (bytes)
+def current_rss():
+    try:
+        with open('/proc/self/statm') as f:
+            return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+    except (OSError, ValueError):
+        import resource
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+
+
+# 화면 표시용 문자열 표 (셀 번호는 1부터)
+def _display_frame(ranked):
+    display_data = to_display(ranked)
+    display_data.index = display_data.index + 1
+    return display_data
+
+
+# 모든 세션이 공유하는 프로세스 전역 리더보드 저장소
+# - 저장소를 한 번만 읽고, 저장소 서명(파일 수정 시각/크기, DB data_version)이 바뀌었을 때만 다시 읽음
+# - 변경될 때마다 version이 증가하며, 세션은 version 번호만 보관
+class LeaderboardStore:
+    def __init__(self, storage=None, feed=None):
+        self.storage = storage or create_storage()
+        self.feed = feed or ChangeFeed()
+        self._lock = threading.RLock()
+        self._signature = None
+        self._ranked = {}
+        self._display = {}
+        self._best_ranked = {}
+        self._best_display = {}
+        self._pages = {}
+        self._driver_stats = {}
+        self._generation = 0
+        self._class_versions = {}
+        self.engine = LeaderboardEngine()
+        # 프로세스마다 다른 값 (재시작 후 같은 version 번호가 다시 나와도 ETag 가 겹치지 않음)
+        self.instance = uuid.uuid4().hex[:8]
+        self.bonus_times = pd.DataFrame(columns=[KEY_NAME, KEY_BONUS_TIME])
+        self.bonus_index = {}
+        self.bonus_error = None
+        self.version = 0
+        self.loads = 0
+        self.catch_ups = 0
+        self._commit_seconds = deque(maxlen=COMMIT_LATENCY_SAMPLES)
+        self._reruns = deque()
+        self._sessions = {}
+        self.reruns_total = 0
+
+    # 여러 값을 같은 version 기준으로 읽어야 할 때 사용
+    @property
+    def lock(self):
+        return self._lock
+
+    def __len__(self):
+        return len(self.engine)
+
+    def classes(self):
+        return self.engine.classes()
+
+    def _current_signature(self):
+        return self.storage.signature()
+
+    # 변경 감시 스레드가 LIVE_WATCH_SECONDS 마다 호출: 미뤄 둔 저널 fsync 를 수행하고 다른 프로세스가 쓴 변경을 반영
+    def watch(self):
+        self.storage.sync_if_due()
+        return self.refresh()
+
+    # 파일이 바뀌었을 때만 다시 로드하고 현재 version 반환
+    # 읽기 전에 얻은 서명을 보관하므로, 읽는 동안 다른 프로세스가 쓴 변경은 다음 refresh 에서 서명이 달라 따라잡음
+    # (읽은 뒤의 서명을 보관하면 그 사이의 변경을 이미 읽은 것으로 여겨 영영 놓침)
+    def refresh(self, force=False):
+        with self._lock:
+            signature = self._current_signature()
+            if force:
+                self._load()
+            elif signature != self._signature:
+                self._catch_up()
+            else:
+                return self.version
+            self._signature = signature
+            return self.version
+
+    def _load(self):
+        metrics = get_metrics()
+        with metrics.span('load_bonus_times'):
+            try:
+                self.bonus_times = self.storage.read_bonus_times()
+                self.bonus_index = build_bonus_index(self.bonus_times)
+                self.bonus_error = None
+            except Exception as e:
+                self.bonus_error = e
+        # 가산초 파일에 등록된 선수는 가산초를 덮어씀 (이름 → 가산초 해시 인덱스로 한 번에 적용)
+        with metrics.span('store_load'):
+            self.engine = self.storage.load(self.bonus_index)
+        metrics.count('rows_loaded', len(self.engine))
+        self.loads += 1
+        self._bump()
+        self.feed.publish(self.version)
+
+    # 다른 프로세스가 쓴 변경 따라잡기
+    # 저장소가 이어 쓰인 이벤트만 줄 수 있으면 바뀐 클래스만 무효화하고, 아니면(압축, 전체 교체, 가산초 변경) 전체를 다시 읽음
+    def _catch_up(self):
+        with get_metrics().span('store_catch_up'):
+            events = self.storage.catch_up(self.engine, self.bonus_index)
+        if events is None:
+            self._load()
+            return
+        self.catch_ups += 1
+        if any(event['op'] == OP_RESET for event in events):
+            self._bump()
+            self.feed.publish(self.version)
+            return
+        changes = {}
+        for event in events:
+            added, removed = changes.setdefault(event['class'], ([], []))
+            (added if event['op'] == OP_SUBMIT else removed).append((event['class'], event['name'], event['lap']))
+        for class_name, (added, removed) in changes.items():
+            self._bump(class_name)
+            self.feed.publish(self.version, class_name, added=added, removed=removed)
+
+    # class_name 이 None 이면 전체 변경 (모든 클래스 캐시 무효화)
+    def _bump(self, class_name=None):
+        self.version += 1
+        if class_name is None:
+            self._generation += 1
+        else:
+            self._class_versions[class_name] = self._class_versions.get(class_name, 0) + 1
+
+    # 자신이 쓴 파일 변경은 다시 읽지 않도록 서명 갱신
+    def _committed(self, class_name=None):
+        self._bump(class_name)
+        self._signature = self._current_signature()
+
+    # 쓰기 구간: 다른 프로세스(앱, API 서버, 가져오기 CLI)와 쓰기를 직렬화하고,
+    # 마지막으로 읽은 뒤 다른 프로세스가 쓴 내용이 있으면(서명이 다르면) 먼저 따라잡은 다음 변경을 적용
+    # → 오래된 메모리 상태로 중복 검사를 하거나 다른 프로세스의 기록을 스냅샷으로 덮어쓰지 않음
+    @contextlib.contextmanager
+    def _writing(self):
+        start = time.perf_counter()
+        with self._lock, self.storage.writer_lock():
+            if self._current_signature() != self._signature:
+                self._catch_up()
+                self._signature = self._current_signature()
+            yield
+            self._commit_seconds.append(time.perf_counter() - start)
+
+    # 캐시 키: 전체 리더보드는 version, 클래스별 리더보드는 해당 클래스가 바뀔 때만 바뀜
+    def _cache_key(self, class_name):
+        if class_name is None:
+            return self.version
+        return (self._generation, self._class_versions.get(class_name, 0))
+
+    # 전체 또는 클래스별 리더보드의 ETag (해당 표가 바뀔 때만 바뀜)
+    def etag(self, class_name=None):
+        with self._lock:
+            key = self._cache_key(class_name)
+            key = key if class_name is None else f"{key[0]}.{key[1]}"
+            return f'"{self.instance}-{key}"'
+
+    # 순위가 계산된 전체(class_name=None) 또는 클래스별 리더보드
+    # 바뀐 클래스만 다시 계산하여 모든 세션이 공유 (반환된 DataFrame은 수정하지 말 것)
+    def ranked(self, class_name=None):
+        with self._lock:
+            key = self._cache_key(class_name)
+            cached = self._ranked.get(class_name)
+            metrics = get_metrics()
+            if cached is None or cached[0] != key:
+                with metrics.span('rank'):
+                    cached = (key, self.engine.to_model(class_name))
+                self._ranked[class_name] = cached
+                metrics.count('rank_cache_misses')
+                metrics.count('rows_ranked', len(cached[1]))
+            else:
+                metrics.count('rank_cache_hits')
+            return cached[1]
+
+    # 화면 표시용 문자열 표 (셀 번호는 1부터), ranked 와 같은 키로 캐시
+    def display(self, class_name=None):
+        return self._formatted(self._display, 'display', class_name, lambda: self.ranked(class_name))
+
+    # 순위표는 잠금 안에서 가져오고 문자열 변환은 잠금 밖에서 수행
+    # 변환하는 동안 기록이 바뀌었으면 결과를 반환만 하고 캐시하지 않음
+    def _formatted(self, cache, name, class_name, ranked):
+        metrics = get_metrics()
+        with self._lock:
+            key = self._cache_key(class_name)
+            cached = cache.get(class_name)
+            if cached is not None and cached[0] == key:
+                metrics.count(f"{name}_cache_hits")
+                return cached[1]
+            data = ranked()
+        with metrics.span(name):
+            display_data = _display_frame(data)
+        with self._lock:
+            if self._cache_key(class_name) == key:
+                cache[class_name] = (key, display_data)
+        metrics.count(f"{name}_cache_misses")
+        return display_data
+
+    # 화면에 보이는 앞부분 limit 행만의 표시용 표와 전체 행 수
+    # 전체 표를 만들지 않고 엔진의 정렬된 목록 앞부분만 잘라 순위를 매김 (문자열 변환은 잠금 밖에서 수행)
+    def display_page(self, class_name=None, limit=TABLE_PAGE_SIZE, best_only=False):
+        metrics = get_metrics()
+        page_key = (class_name, best_only)
+        with self._lock:
+            key = self._cache_key(class_name)
+            cached = self._pages.get(page_key)
+            # 같은 버전에서 더 많은 행(또는 전체)을 이미 만들어 두었으면 앞부분만 잘라 사용
+            if cached is not None and cached[0] == key and (cached[1] >= limit or cached[1] >= cached[3]):
+                metrics.count('page_cache_hits')
+                return cached[2].head(limit), cached[3]
+            with metrics.span('page_rank'):
+                if best_only:
+                    model = self.engine.best_model(class_name, limit)
+                    total = self.engine.stats.count(class_name)
+                else:
+                    model = self.engine.to_model(class_name, limit)
+                    total = len(self.engine) if class_name is None else self.engine.count(class_name)
+        with metrics.span('page_display'):
+            display_data = _display_frame(model)
+        with self._lock:
+            if self._cache_key(class_name) == key:
+                self._pages[page_key] = (key, limit, display_data, total)
+        metrics.count('page_cache_misses')
+        return display_data, total
+
+    # ranked/display 와 같은 키로 캐시 (캐시 적중/실패는 name 지표로 집계)
+    def _cached(self, cache, name, class_name, build):
+        with self._lock:
+            key = self._cache_key(class_name)
+            cached = cache.get(class_name)
+            metrics = get_metrics()
+            if cached is None or cached[0] != key:
+                with metrics.span(name):
+                    cached = (key, build())
+                cache[class_name] = cached
+                metrics.count(f"{name}_cache_misses")
+            else:
+                metrics.count(f"{name}_cache_hits")
+            return cached[1]
+
+    # 선수별 최고 기록만의 순위표 (엔진이 유지하는 선수별 최고 기록 목록에서 바로 만듦)
+    def best_laps(self, class_name=None):
+        return self._cached(self._best_ranked, 'best_rank', class_name, lambda: self.engine.best_model(class_name))
+
+    # 최고 기록만의 화면 표시용 표 (셀 번호는 1부터)
+    def display_best(self, class_name=None):
+        return self._formatted(self._best_display, 'best_display', class_name, lambda: self.best_laps(class_name))
+
+    # 선수별 통계 (최고 기록, 평균, 표준편차, 첫/마지막 주행, 향상)
+    # 기록이 들어올 때 엔진이 선수별 누적 값을 갱신하므로 전체 기록을 다시 훑지 않음
+    def driver_stats(self, class_name=None):
+        return self._cached(self._driver_stats, 'driver_stats', class_name, lambda: self.engine.stats.to_frame(class_name))
+
+    # 클래스별 기록 (클래스마다 최고 기록 선수 한 명)
+    def class_records(self):
+        return class_records(self.driver_stats())
+
+    # 기록 제출 (이미 존재하면 False)
+    # 가산초 파일에 등록된 선수는 가산초를 덮어씀 (다시 읽을 때의 bonus_override 와 같은 규칙을 여기서 한 번만 적용)
+    def submit(self, name, class_name, lap_number, lap_ms, bonus_ms, penalty_ms):
+        with self._writing():
+            bonus_ms = self.bonus_index.get(name, bonus_ms)
+            if not self.engine.insert(name, class_name, lap_number, lap_ms, bonus_ms, penalty_ms):
+                return False
+            self.storage.append(submit_event(name, class_name, lap_number, lap_ms, bonus_ms, penalty_ms))
+            self.storage.maybe_compact(self.engine)
+            self._committed(class_name)
+            self.feed.publish(self.version, class_name, added=[(class_name, name, int(lap_number))])
+            return True
+
+    # 여러 기록을 한 번에 병합 (이미 존재하는 기록은 건너뜀), 추가된 행 목록 반환
+    # compact=False 이면 압축을 호출한 쪽에서 maybe_compact 로 직접 수행
+    def submit_many(self, rows, compact=True):
+        with self._writing():
+            bonus_index = self.bonus_index
+            if bonus_index:
+                rows = [(name, class_name, lap_number, lap_ms, bonus_index.get(name, bonus_ms), penalty_ms)
+                        for name, class_name, lap_number, lap_ms, bonus_ms, penalty_ms in rows]
+            inserted = self.engine.insert_many(rows)
+            if not inserted:
+                return inserted
+            self.storage.append_many([submit_event(*row) for row in inserted])
+            if compact:
+                self.storage.maybe_compact(self.engine)
+            # 추가된 클래스의 캐시만 무효화
+            for class_name in {row[1] for row in inserted}:
+                self._committed(class_name)
+                self.feed.publish(self.version, class_name, added=[(row[1], row[0], int(row[2])) for row in inserted if row[1] == class_name])
+            return inserted
+
+    # 저널이 충분히 쌓였으면 스냅샷으로 압축 (SQLite 저장소는 해당 없음)
+    def maybe_compact(self):
+        with self._writing():
+            if self.storage.maybe_compact(self.engine):
+                self._signature = self._current_signature()
+
+    # 기록 삭제 (없으면 False)
+    def delete(self, class_name, name, lap_number):
+        with self._writing():
+            return self._delete((class_name, name, int(lap_number)))
+
+    # 전체 순위 기준 위치(0부터)의 기록 삭제
+    def delete_at(self, position):
+        with self._writing():
+            key = self.engine.key_at(position)
+            return key is not None and self._delete(key)
+
+    def _delete(self, key):
+        if not self.engine.delete(*key):
+            return False
+        self.storage.append(delete_event(*key))
+        self.storage.maybe_compact(self.engine)
+        self._committed(key[0])
+        self.feed.publish(self.version, key[0], removed=[key])
+        return True
+
+    # 리더보드 초기화
+    def reset(self):
+        with self._writing():
+            self._reset()
+
+    # 현재 리더보드를 보관된 이벤트로 저장한 뒤 초기화하고 이벤트 ID 반환 (기록이 없으면 None)
+    # 보관과 초기화를 한 쓰기 구간에서 수행하므로 그 사이에 다른 프로세스가 제출한 기록이 보관되지 않은 채 지워지지 않음
+    def archive_and_reset(self, title, events_dir=EVENTS_DIR):
+        with self._writing():
+            if len(self.engine) == 0:
+                return None
+            event_id = archive_event(self.ranked(), title, events_dir)
+            self._reset()
+            return event_id
+
+    def _reset(self):
+        self.engine.clear()
+        self.storage.append(reset_event(), sync=True)
+        self.storage.write_snapshot(self.engine)
+        self._committed()
+        self.feed.publish(self.version)
+
+    # 리더보드 전체 교체 (CSV 업로드)
+    def replace(self, model):
+        with self._writing():
+            self.engine = LeaderboardEngine.from_model(model)
+            self.storage.write_snapshot(self.engine)
+            self._committed()
+            self.feed.publish(self.version)
+
+    # 클래스별 상위 n 위 (순위, 앞 기록과의 시간 차이 포함, class_name 이 주어지면 해당 클래스만)
+    # 저장소가 직접 조회할 수 있으면(SQLite 인덱스) 저장소에서, 아니면 메모리의 순위표에서 계산
+    def top_n_per_class(self, n, class_name=None):
+        with self._lock:
+            result = self.storage.top_n_per_class(n, class_name)
+            if result is not None:
+                return result
+            classes = sorted(self.engine.classes()) if class_name is None else [class_name]
+            frames = [ranked[ranked[KEY_RANKING] <= n] for ranked in map(self.ranked, classes)]
+            if not frames:
+                return self.ranked().iloc[0:0]
+            return pd.concat(frames, ignore_index=True)
+
+    # 선수별(클래스별) 최고 기록과 주행 수
+    def personal_bests(self, class_name=None):
+        with self._lock:
+            result = self.storage.personal_bests(class_name)
+            if result is not None:
+                return result
+            bests = self.driver_stats(class_name).rename(columns={KEY_BEST_LAP_NUMBER: KEY_LAP_NUMBER, KEY_BEST_TIME_MS: KEY_TOTAL_TIME_MS})
+            return bests[BEST_COLUMNS].reset_index(drop=True)
+
+    # 재실행 기록 (세션 수와 초당 재실행 수 측정용)
+    def record_rerun(self, session_id=None):
+        now = time.monotonic()
+        get_metrics().count('reruns')
+        with self._lock:
+            self.reruns_total += 1
+            self._reruns.append(now)
+            while self._reruns and now - self._reruns[0] > RERUN_WINDOW_SECONDS:
+                self._reruns.popleft()
+            if session_id is not None:
+                self._sessions[session_id] = now
+            for sid, last_seen in list(self._sessions.items()):
+                if now - last_seen > RERUN_WINDOW_SECONDS:
+                    del self._sessions[sid]
+
+    # 측정 지표
+    def stats(self):
+        with self._lock:
+            rss = current_rss()
+            sessions = len(self._sessions)
+            commit_ms = np.array(self._commit_seconds) * 1000
+            return {
+                'version': self.version,
+                'rows': len(self.engine),
+                'storage': self.storage.name,
+                'catch_ups': self.catch_ups,
+                'commit_ms_p50': float(np.percentile(commit_ms, 50)) if len(commit_ms) else None,
+                'commit_ms_p99': float(np.percentile(commit_ms, 99)) if len(commit_ms) else None,
+                'loads': self.loads,
+                'sessions': sessions,
+                'reruns_total': self.reruns_total,
+                'reruns_per_sec': len(self._reruns) / RERUN_WINDOW_SECONDS,
+                'rss_mb': rss / 1024 / 1024,
+                'rss_mb_per_session': rss / 1024 / 1024 / sessions if sessions else None,
+            }
+
+
+# 프로세스 전역 저장소
+_store = None
+_store_lock = threading.Lock()
+
+
+def get_store():
+    global _store
+    with _store_lock:
+        if _store is None:
+            _store = LeaderboardStore()
+            # 다른 프로세스(가져오기 CLI 등)가 쓴 변경도 실시간 화면에 전달하고, 추가가 멈춘 뒤 남은 저널도 fsync
+            _store.feed.start(watch=_store.watch)
+        return _store
@@ -0,0 +1,26 @@
+import os
+import sys
+
+import pytest
+
+# 저장소 최상위 모듈(model, ingest, store 등)을 import 할 수 있도록 경로 추가
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+# 저장소 파일(leaderboard.csv, 저널, 가산초 등)은 현재 디렉터리 기준이므로 테스트마다 빈 임시 디렉터리에서 실행
+@pytest.fixture
+def workdir(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    return tmp_path
+
+
+@pytest.fixture
+def store(workdir):
+    from journal import Journal
+    from storage import CsvStorage
+    from store import LeaderboardStore
+
+    store = LeaderboardStore(CsvStorage(journal=Journal()))
+    store.refresh(force=True)
+    yield store
+    store.storage.close()
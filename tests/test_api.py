@@ -0,0 +1,32 @@
+import pytest
+
+import api
+from const import KEY_CLASS, KEY_LAP_TIME, KEY_NAME
+
+
+# 이름/클래스는 문자열만, 나머지는 문자열 또는 숫자만 허용
+def test_laps_frame_rejects_non_scalar_values():
+    frame = api.laps_frame([{'name': "kim", 'class': "A", 'lap': 2, 'lap_time': "1:00:000", 'bonus': 1.5}])
+    assert frame.loc[0, [KEY_NAME, KEY_CLASS, KEY_LAP_TIME]].tolist() == ["kim", "A", "1:00:000"]
+    for item in ({'name': ["x"], 'class': "A"}, {'name': "kim", 'class': 1}, {'name': "kim", 'class': "A", 'lap': {'n': 1}},
+                 {'name': "kim", 'class': "A", 'bonus': True}):
+        with pytest.raises(ValueError):
+            api.laps_frame([item])
+
+
+def test_submit_lap_rejects_list_name(store):
+    status_code, body = api._submit_lap(store, {'name': ["x"], 'class': "A", 'lap_time': "1:00:000"})
+    assert status_code == 400 and 'name' in body['error']
+    assert len(store) == 0
+
+
+# 요청 값마다 다른 키가 생겨도 응답 본문 캐시는 API_BODY_CACHE_SIZE 개를 넘지 않음
+def test_body_cache_is_bounded(store, monkeypatch):
+    monkeypatch.setattr(api, 'API_BODY_CACHE_SIZE', 3)
+    monkeypatch.setattr(api, '_body_cache', api.OrderedDict())
+    store.submit("kim", "A", 1, 60_000, 0, 0)
+    for limit in range(1, 10):
+        api.standings_body(store, None, limit)
+    api.standings_body(store, None, 7)
+    api.standings_body(store, None, 10)
+    assert list(api._body_cache) == [('standings', None, 9, None), ('standings', None, 7, None), ('standings', None, 10, None)]
@@ -0,0 +1,80 @@
+import multiprocessing
+import os
+import time
+
+import numpy as np
+import pytest
+
+import journal
+import storage
+from journal import Journal
+from storage import CsvStorage, SqliteStorage, create_storage
+from store import LeaderboardStore
+
+PROCESSES = 4
+# 요청 수준의 동시 제출 수 (오래 걸리므로 LEADERBOARD_SLOW_TESTS=1 일 때만 실행)
+SLOW_PROCESSES = 20
+LAPS = 30
+SHARED_EVERY = 5
+# 압축(저널 교체, 오래된 changes 정리)도 테스트 중에 여러 번 일어나도록 낮춘 기준
+COMPACT_EVENTS = 10
+# 제출 한 건(쓰기 잠금 대기 포함)의 p99 지연 상한 (느린 CI 에서도 통과하도록 넉넉하게)
+COMMIT_P99_SECONDS = 2.0
+
+
+# 각 프로세스는 자신의 기록과 모든 프로세스가 함께 노리는 공유 기록(중복 경쟁)을 번갈아 제출하고
+# (성공한 기록, 제출마다 걸린 시간) 을 돌려줌
+def submitter(index, backend, workdir, barrier, results):
+    os.chdir(workdir)
+    journal.JOURNAL_COMPACT_EVENTS = storage.JOURNAL_COMPACT_EVENTS = COMPACT_EVENTS
+    store = LeaderboardStore(create_storage(backend))
+    store.refresh()
+    accepted = []
+    latencies = []
+    barrier.wait()
+    for lap_number in range(1, LAPS + 1):
+        name = "shared" if lap_number % SHARED_EVERY == 0 else f"driver{index}"
+        start = time.perf_counter()
+        if store.submit(name, "A", lap_number, 60_000 + index * 1000 + lap_number, 0, 0):
+            accepted.append(("A", name, lap_number))
+        latencies.append(time.perf_counter() - start)
+    store.storage.sync()
+    store.storage.close()
+    results.put((accepted, latencies))
+
+
+# 여러 프로세스가 동시에 제출해도 성공한 기록만 정확히 한 번씩 저장되고 제출 지연이 상한을 넘지 않음
+@pytest.mark.parametrize('processes', [
+    PROCESSES,
+    pytest.param(SLOW_PROCESSES, marks=pytest.mark.skipif(not os.getenv('LEADERBOARD_SLOW_TESTS'), reason="LEADERBOARD_SLOW_TESTS=1 일 때만 실행")),
+])
+@pytest.mark.parametrize('backend', ['csv', 'sqlite'])
+def test_concurrent_submitters(workdir, backend, processes):
+    ctx = multiprocessing.get_context('spawn')
+    barrier = ctx.Barrier(processes)
+    results = ctx.Queue()
+    workers = [ctx.Process(target=submitter, args=(i, backend, str(workdir), barrier, results)) for i in range(processes)]
+    for worker in workers:
+        worker.start()
+    accepted = []
+    latencies = []
+    for _ in workers:
+        worker_accepted, worker_latencies = results.get(timeout=300)
+        accepted.extend(worker_accepted)
+        latencies.extend(worker_latencies)
+    for worker in workers:
+        worker.join(timeout=60)
+        assert worker.exitcode == 0
+    assert np.percentile(latencies, 99) < COMMIT_P99_SECONDS
+
+    if backend == 'csv':
+        assert os.path.exists(journal.JOURNAL_FILE + '.prev')
+    reader = CsvStorage(journal=Journal()) if backend == 'csv' else SqliteStorage()
+    store = LeaderboardStore(reader)
+    store.refresh(force=True)
+    assert len(accepted) == len(set(accepted))
+    assert len(store) == len(accepted)
+    assert all(store.engine.exists(*lap) for lap in accepted)
+    # 공유 기록은 주행 차수마다 정확히 한 프로세스만 성공
+    assert sorted(lap for _, name, lap in accepted if name == "shared") == list(range(SHARED_EVERY, LAPS + 1, SHARED_EVERY))
+    reader.close()
@@ -0,0 +1,45 @@
+import json
+import os
+
+from events import get_event, list_events
+from journal import Journal
+from storage import CsvStorage
+from store import LeaderboardStore
+
+
+# 보관 직전에 다른 프로세스(같은 파일을 쓰는 다른 저장소)가 제출한 기록도 보관에 포함된 뒤 초기화됨
+def test_archive_and_reset_includes_other_writers(store):
+    store.submit("kim", "A", 1, 60_000, 0, 0)
+    other = LeaderboardStore(CsvStorage(journal=Journal()))
+    other.refresh(force=True)
+    other.submit("lee", "A", 1, 59_000, 0, 0)
+
+    event_id = store.archive_and_reset("event")
+    event = get_event(event_id)
+    assert sorted(event.ranked()['이름']) == ["kim", "lee"]
+    assert len(store) == 0
+    other.refresh()
+    assert len(other) == 0
+    assert store.archive_and_reset("empty") is None
+    other.storage.close()
+
+
+# 목록은 이벤트 디렉터리가 바뀔 때만 다시 읽음
+def test_list_events_cached(store):
+    assert list_events() == []
+    store.submit("kim", "A", 1, 60_000, 0, 0)
+    event_id = store.archive_and_reset("first")
+    assert [meta['id'] for meta in list_events()] == [event_id]
+
+    # meta.json 만 고쳐서는 디렉터리가 바뀌지 않으므로 캐시된 목록을 그대로 사용
+    meta_path = os.path.join('events', event_id, 'meta.json')
+    with open(meta_path, encoding='utf-8') as f:
+        meta = json.load(f)
+    with open(meta_path, 'w', encoding='utf-8') as f:
+        json.dump(dict(meta, title="renamed"), f)
+    assert list_events()[0]['title'] == "first"
+
+    os.makedirs(os.path.join('events', 'manual'))
+    with open(os.path.join('events', 'manual', 'meta.json'), 'w', encoding='utf-8') as f:
+        json.dump(dict(meta, id='manual'), f)
+    assert [meta['id'] for meta in list_events()] == ['manual', event_id]
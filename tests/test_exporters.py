@@ -0,0 +1,32 @@
+import pytest
+
+from exporters import export_source, get_export_cache, render_bytes, stream_export
+
+
+@pytest.fixture
+def board(store):
+    for i in range(5):
+        store.submit(f"driver{i}", "A" if i % 2 else "B", 1, 60_000 + i * 10, 0, 0)
+    return store
+
+
+# 스트리밍은 조각 단위로 나오고, 합치면 한 번에 만든 결과와 같으며, 끝까지 만든 결과는 캐시됨
+@pytest.mark.parametrize('fmt', ['csv', 'html', 'md'])
+def test_stream_export(board, fmt):
+    version, display_data, class_tables = export_source(board)
+    expected = render_bytes(fmt, "title", display_data, class_tables)
+
+    chunks = list(stream_export(board, fmt, "title"))
+    assert len(chunks) > 1
+    assert b''.join(chunks) == expected
+    assert get_export_cache().peek((version, "title", fmt)) == expected
+    assert list(stream_export(board, fmt, "title")) == [expected]
+
+
+# 중간에 끊긴 스트림은 캐시에 남지 않음
+def test_partial_stream_not_cached(board):
+    version = board.version
+    chunks = stream_export(board, 'csv', "partial")
+    next(chunks)
+    chunks.close()
+    assert get_export_cache().peek((version, "partial", 'csv')) is None
@@ -0,0 +1,23 @@
+import pandas as pd
+
+from const import KEY_BONUS_TIME, KEY_CLASS, KEY_LAP_NUMBER, KEY_LAP_TIME, KEY_NAME, KEY_PENALTY_TIME
+from ingest import REASON_BAD_LAP_TIME, validate_chunk
+
+
+def chunk(lap_times):
+    return pd.DataFrame({
+        KEY_NAME: [f"driver{i}" for i in range(len(lap_times))],
+        KEY_CLASS: ["A"] * len(lap_times),
+        KEY_LAP_NUMBER: ["1"] * len(lap_times),
+        KEY_LAP_TIME: lap_times,
+        KEY_BONUS_TIME: [""] * len(lap_times),
+        KEY_PENALTY_TIME: [""] * len(lap_times),
+    }, dtype=object)
+
+
+def test_validate_chunk_rejects_malformed_lap_times():
+    lap_times = ["1:02:003", "1:02:003:004", "1:75:000", "0:59:1000", "1:00:-5", "1:02:003.7"]
+    rows, rejected, row_numbers = validate_chunk(chunk(lap_times), 2)
+    assert rows == [("driver0", "A", 1, 62003, 0, 0)]
+    assert row_numbers.tolist() == [2]
+    assert [(reason, numbers.tolist()) for reason, numbers in rejected] == [(REASON_BAD_LAP_TIME, [3, 4, 5, 6, 7])]
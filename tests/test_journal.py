@@ -0,0 +1,138 @@
+import json
+
+from const import KEY_CLASS, KEY_LAP_NUMBER, KEY_NAME, KEY_TOTAL_TIME_MS
+from engine import LeaderboardEngine
+import journal as journal_module
+from journal import Journal, delete_event, reset_event, submit_event
+
+
+def keys(engine):
+    model = engine.to_model()
+    return sorted(zip(model[KEY_CLASS], model[KEY_NAME], model[KEY_LAP_NUMBER]))
+
+
+def test_replay_applies_events_in_order(workdir):
+    journal = Journal()
+    journal.append(submit_event("kim", "A", 1, 60_000, 0, 0))
+    journal.append(submit_event("lee", "A", 1, 61_000, 0, 0))
+    journal.append(reset_event())
+    journal.append(submit_event("park", "B", 1, 62_000, 0, 0))
+    journal.append(submit_event("park", "B", 1, 63_000, 0, 0))  # 중복 제출은 무시
+    journal.append(submit_event("choi", "B", 2, 64_000, 0, 0))
+    journal.append(delete_event("B", "choi", 2))
+    journal.append(delete_event("B", "nobody", 1))  # 없는 기록 삭제는 무시
+    journal.close()
+
+    engine = LeaderboardEngine()
+    applied = Journal().replay(engine)
+    assert keys(engine) == [("B", "park", 1)]
+    assert engine.to_model()[KEY_TOTAL_TIME_MS].tolist() == [62_000]
+    assert [event['op'] for event in applied] == ['submit', 'submit', 'reset', 'submit', 'submit', 'delete']
+
+
+# 쓰다가 끊긴 마지막 줄은 읽지 않고, 다음 추가 전에 잘라냄
+def test_torn_tail_is_ignored_and_truncated(workdir):
+    journal = Journal()
+    journal.append(submit_event("kim", "A", 1, 60_000, 0, 0), sync=True)
+    journal.close()
+    with open(journal.journal_file, 'ab') as f:
+        f.write(b'{"op":"submit","name":"lee"')
+
+    assert [event['name'] for event in Journal().read_events()] == ["kim"]
+    writer = Journal()
+    writer.append(submit_event("park", "A", 1, 61_000, 0, 0))
+    writer.close()
+    assert [event['name'] for event in Journal().read_events()] == ["kim", "park"]
+
+
+# 다른 프로세스가 압축(저널 교체)해도 .prev 의 나머지와 새 저널을 이어 읽음
+def test_reader_follows_rotation(workdir):
+    writer = Journal()
+    writer.append(submit_event("kim", "A", 1, 60_000, 0, 0))
+    reader = Journal()
+    reader.read_events()
+
+    engine = LeaderboardEngine()
+    Journal().replay(engine)
+    writer.append(submit_event("lee", "A", 1, 61_000, 0, 0))
+    engine.insert("lee", "A", 1, 61_000, 0, 0)
+    writer.compact(engine, continued=True)
+    writer.append(submit_event("park", "A", 1, 62_000, 0, 0))
+
+    assert [event['name'] for event in reader.read_new_events()] == ["lee", "park"]
+    assert reader.rotations == 1
+    writer.append(submit_event("choi", "A", 1, 63_000, 0, 0))
+    assert [event['name'] for event in reader.read_new_events()] == ["choi"]
+    assert reader.read_new_events() == []
+    writer.close()
+
+
+# 전체 교체(초기화, 업로드)나 두 번 이상 교체된 경우에는 이어 읽을 수 없음 (스냅샷부터 다시 읽어야 함)
+def test_reader_cannot_follow_replacement(workdir):
+    writer = Journal()
+    writer.append(submit_event("kim", "A", 1, 60_000, 0, 0))
+    reader = Journal()
+    reader.read_events()
+    writer.compact(LeaderboardEngine(), continued=False)
+    assert reader.read_new_events() is None
+
+    reader.read_events()
+    writer.compact(LeaderboardEngine(), continued=True)
+    writer.compact(LeaderboardEngine(), continued=True)
+    assert reader.read_new_events() is None
+    writer.close()
+
+
+# 저널이 없던 상태에서 다른 프로세스가 처음 만든 저널은 처음부터 읽음
+def test_reader_reads_first_journal(workdir):
+    reader = Journal()
+    assert reader.read_events() == []
+    assert reader.read_new_events() == []
+    writer = Journal()
+    writer.append(submit_event("kim", "A", 1, 60_000, 0, 0))
+    assert [event['name'] for event in reader.read_new_events()] == ["kim"]
+    with open(writer.journal_file, 'rb') as f:
+        assert json.loads(f.readline())['prev'] is None
+    writer.close()
+
+
+# 핸들을 열어 둔 채 실행 중인 프로세스도 다른 프로세스가 남긴 끊긴 줄 뒤에 이어 쓰지 않음
+def test_torn_tail_truncated_before_every_append(store):
+    store.submit("kim", "A", 1, 60_000, 0, 0)
+    with open(store.storage.journal.journal_file, 'ab') as f:
+        f.write(b'{"op":"submit","name":"killed"')
+    store.submit("lee", "A", 1, 61_000, 0, 0)
+    store.submit("park", "A", 1, 62_000, 0, 0)
+
+    engine = LeaderboardEngine()
+    Journal().replay(engine)
+    assert keys(engine) == [("A", "kim", 1), ("A", "lee", 1), ("A", "park", 1)]
+
+
+# 읽을 수 없는 완전한 줄은 건너뛰고 뒤의 이벤트는 모두 읽음
+def test_corrupt_line_is_skipped(workdir):
+    journal = Journal()
+    journal.append(submit_event("kim", "A", 1, 60_000, 0, 0))
+    journal.close()
+    with open(journal.journal_file, 'ab') as f:
+        f.write(b'garbage{"op":"submit"}\n[1, 2]\n')
+    journal.append(submit_event("lee", "A", 1, 61_000, 0, 0))
+    journal.close()
+    assert [event['name'] for event in Journal().read_events()] == ["kim", "lee"]
+
+
+# 추가가 멈춰도 JOURNAL_FSYNC_INTERVAL 이 지나면 sync_if_due 가 남은 이벤트를 fsync
+def test_sync_if_due_flushes_after_interval(workdir, monkeypatch):
+    synced = []
+    monkeypatch.setattr(journal_module.os, 'fsync', synced.append)
+    journal = Journal()
+    journal.append(submit_event("kim", "A", 1, 60_000, 0, 0))
+    journal.sync_if_due()
+    assert synced == []
+
+    monkeypatch.setattr(journal_module, 'JOURNAL_FSYNC_INTERVAL', 0)
+    journal.sync_if_due()
+    assert len(synced) == 1
+    journal.sync_if_due()
+    assert len(synced) == 1
+    journal.close()
@@ -0,0 +1,33 @@
+import numpy as np
+import pytest
+
+from model import parse_time_strs
+
+
+def test_parse_time_strs_valid():
+    values = ["1:02:003", "0:59:999", " 2:00:000 ", "0:00:000", "1:2:3"]
+    assert parse_time_strs(values).tolist() == [62003, 59999, 120000, 0, 62003]
+
+
+def test_parse_time_strs_empty():
+    assert parse_time_strs([]).dtype == np.int64
+    assert len(parse_time_strs([])) == 0
+
+
+@pytest.mark.parametrize('value', [
+    "1:02:003:004",  # 부분이 네 개
+    "1:02",  # 부분이 두 개
+    "1:75:000",  # 초 범위 초과
+    "0:59:1000",  # 밀리초 범위 초과
+    "1:00:-5",  # 음수
+    "-1:00:000",
+    "1:02:003.7",  # 소수
+    "1:+2:003",
+    "1: 2:003",
+    "",
+    "abc",
+])
+def test_parse_time_strs_invalid(value):
+    assert parse_time_strs(["1:00:000", value], errors='coerce').tolist() == [60000, -1]
+    with pytest.raises(ValueError):
+        parse_time_strs(["1:00:000", value])
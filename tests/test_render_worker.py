@@ -0,0 +1,71 @@
+import os
+import time
+
+import pytest
+
+from exporters import get_export_cache
+from metrics import get_metrics
+from render_worker import RenderPool
+
+
+# 작업이 끝나고 완료 처리(캐시 저장, 측정값 기록)까지 마칠 때까지 대기
+def wait(pool, job, timeout=120):
+    deadline = time.monotonic() + timeout
+    while not job.done() or (job.error() is None and pool.get(job.key) is job):
+        assert time.monotonic() < deadline, "렌더링 작업이 끝나지 않음"
+        time.sleep(0.05)
+
+
+@pytest.fixture
+def pool():
+    pool = RenderPool(max_workers=1)
+    yield pool
+    pool.shutdown()
+
+
+@pytest.fixture
+def board(store):
+    store.submit("kim", "A", 1, 62003, 0, 0)
+    store.submit("lee", "B", 1, 61000, 1000, 0)
+    return store
+
+
+# 폰트 파일이 없어도 HTML 은 생성되고, PDF 실패는 해당 작업의 오류로만 보고됨
+def test_html_without_font(pool, board):
+    key, job = pool.request(board, 'html', "no font")
+    wait(pool, job)
+    assert job.error() is None
+    assert b"kim" in get_export_cache().peek(key)
+
+    _, job = pool.request(board, 'pdf', "no font")
+    wait(pool, job)
+    assert job.error() is not None
+
+    key, job = pool.request(board, 'html', "no font again")
+    wait(pool, job)
+    assert job.error() is None
+
+
+# 작업 프로세스가 비정상 종료되어 깨진 풀은 다시 만들어짐
+def test_broken_pool_is_replaced(pool, board):
+    pool._ensure_executor()
+    broken = pool._executor
+    with pytest.raises(Exception):
+        broken.submit(os._exit, 1).result(timeout=60)
+
+    key, job = pool.request(board, 'html', "after crash")
+    wait(pool, job)
+    assert job.error() is None
+    assert pool._executor is not broken
+    assert get_export_cache().peek(key) is not None
+
+
+# 작업 프로세스에서 만든 내보내기의 소요 시간/행 수는 부모 프로세스의 측정기에 기록됨
+def test_metrics_recorded_in_parent(pool, board):
+    metrics = get_metrics()
+    metrics.reset()
+    _, job = pool.request(board, 'html', "metrics")
+    wait(pool, job)
+    snapshot = metrics.snapshot()
+    assert snapshot['spans']['export_html']['count'] == 1
+    assert snapshot['counters']['rows_exported'] == len(board)
@@ -0,0 +1,62 @@
+import json
+import random
+import sys
+
+import pandas as pd
+from pandas.testing import assert_frame_equal
+
+import storage
+from api import bests_body, standings_body
+from const import BONUS_TIME_FILE, CAR_CLASSES, KEY_BONUS_TIME, KEY_NAME
+from journal import Journal
+from storage import CsvStorage, SqliteStorage
+from store import LeaderboardStore
+
+
+def fill(store, seed=1):
+    rnd = random.Random(seed)
+    for i in range(300):
+        # 같은 합계 시간이 자주 나오도록 시간 범위를 좁게
+        store.submit(f"d{rnd.randint(0, 20)}", rnd.choice(CAR_CLASSES), rnd.randint(1, 4), rnd.randint(60_000, 60_050), 0, 0)
+        if i % 9 == 0:
+            store.delete_at(rnd.randrange(len(store)))
+
+
+# SQLite 저장소의 SQL 조회 결과가 메모리(CSV 저장소)에서 계산한 결과와 같음
+def test_sqlite_queries_match_memory(workdir):
+    sqlite_store = LeaderboardStore(SqliteStorage())
+    sqlite_store.refresh(force=True)
+    csv_store = LeaderboardStore(CsvStorage(journal=Journal()))
+    csv_store.refresh(force=True)
+    fill(sqlite_store)
+    fill(csv_store)
+
+    for n in (1, 3):
+        assert_frame_equal(sqlite_store.top_n_per_class(n), csv_store.top_n_per_class(n), check_dtype=False)
+        for class_name in CAR_CLASSES:
+            assert_frame_equal(sqlite_store.top_n_per_class(n, class_name), csv_store.top_n_per_class(n, class_name), check_dtype=False)
+    for class_name in [None] + CAR_CLASSES:
+        assert_frame_equal(sqlite_store.personal_bests(class_name), csv_store.personal_bests(class_name), check_dtype=False)
+        for limit in (None, 2):
+            assert standings_body(sqlite_store, class_name, limit)[1] == standings_body(csv_store, class_name, limit)[1]
+        assert bests_body(sqlite_store, class_name)[1] == bests_body(csv_store, class_name)[1]
+    body = json.loads(standings_body(sqlite_store, None, None, per_class=2)[1])
+    assert body['rows'] and all(row['rank'] <= 2 for row in body['rows'])
+    sqlite_store.storage.close()
+    csv_store.storage.close()
+
+
+# 내보내기 명령은 SQLite 저장소의 가산초 표를 비우지 않음
+def test_export_command_keeps_bonus_times(workdir, monkeypatch):
+    pd.DataFrame({KEY_NAME: ["kim"], KEY_BONUS_TIME: [1.5]}).to_csv(BONUS_TIME_FILE, index=False)
+    store = LeaderboardStore(SqliteStorage())
+    store.refresh(force=True)
+    store.submit("kim", "A", 1, 60_000, 0, 0)
+    store.storage.close()
+
+    monkeypatch.setattr(sys, 'argv', ['storage.py', 'export', 'out.csv', '--backend', 'sqlite'])
+    storage.main()
+
+    sqlite = SqliteStorage()
+    assert sqlite._conn.execute("SELECT name, bonus_ms FROM bonus_times").fetchall() == [("kim", 1500)]
+    sqlite.close()
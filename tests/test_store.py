@@ -0,0 +1,85 @@
+import pandas as pd
+import pytest
+
+from const import BONUS_TIME_FILE, KEY_BONUS_TIME, KEY_NAME
+from journal import Journal
+from metrics import get_metrics
+from storage import CsvStorage, SqliteStorage
+from store import LeaderboardStore
+
+
+def open_store(backend):
+    store = LeaderboardStore(CsvStorage(journal=Journal()) if backend == 'csv' else SqliteStorage())
+    store.refresh(force=True)
+    return store
+
+
+# 따라잡는 도중 다른 프로세스가 쓴 기록도 다음 refresh 에서 반영됨
+@pytest.mark.parametrize('backend', ['csv', 'sqlite'])
+def test_commit_during_catch_up_is_not_lost(workdir, monkeypatch, backend):
+    reader = open_store(backend)
+    writer = open_store(backend)
+    writer.submit("kim", "A", 1, 60_000, 0, 0)
+
+    catch_up = reader.storage.catch_up
+
+    def catch_up_then_commit(engine, bonus_index):
+        events = catch_up(engine, bonus_index)
+        monkeypatch.setattr(reader.storage, 'catch_up', catch_up)
+        writer.submit("lee", "A", 1, 61_000, 0, 0)
+        return events
+
+    monkeypatch.setattr(reader.storage, 'catch_up', catch_up_then_commit)
+    reader.refresh()
+    assert reader.engine.exists("A", "kim", 1)
+    reader.refresh()
+    assert reader.engine.exists("A", "lee", 1)
+
+    fresh = open_store(backend)
+    assert len(fresh) == 2
+    for store in (reader, writer, fresh):
+        store.storage.close()
+
+
+# 앞부분만 만든 표는 전체 표의 앞부분과 같음 (동점 순위, 시간 차이, 최고 기록만의 표 포함)
+def test_display_page_matches_full_table(store):
+    for index in range(30):
+        store.submit(f"driver{index % 7}", "AB"[index % 2], index, 60_000 + (index % 5) * 100, 0, 0)
+    for class_name in (None, "A", "B", "C"):
+        for best_only in (False, True):
+            full = store.display_best(class_name) if best_only else store.display(class_name)
+            for limit in (1, 4, 50):
+                page, total = store.display_page(class_name, limit, best_only)
+                assert total == len(full)
+                assert page.equals(full.head(limit))
+
+    page, total = store.display_page("A", 4)
+    store.submit("new", "A", 1, 1_000, 0, 0)
+    page, total = store.display_page("A", 4)
+    assert total == 16 and page.iloc[0].tolist() == store.display("A").iloc[0].tolist()
+
+
+# 가산초 파일에 등록된 선수는 어떤 경로로 제출해도 같은 가산초가 적용되고 다시 읽어도 같음
+@pytest.mark.parametrize('backend', ['csv', 'sqlite'])
+def test_bonus_index_applied_on_submit(workdir, backend):
+    pd.DataFrame({KEY_NAME: ["kim"], KEY_BONUS_TIME: [3.0]}).to_csv(BONUS_TIME_FILE, index=False)
+    store = open_store(backend)
+    store.submit("kim", "A", 1, 60_000, 1_000, 0)
+    store.submit_many([("kim", "A", 2, 60_000, 0, 0), ("lee", "A", 1, 60_000, 1_000, 0)])
+    expected = {("A", "kim", 1): 3_000, ("A", "kim", 2): 3_000, ("A", "lee", 1): 1_000}
+
+    fresh = open_store(backend)
+    for engine in (store.engine, fresh.engine):
+        assert {key: engine._entries[key][1] for key in expected} == expected
+    for each in (store, fresh):
+        each.storage.close()
+
+
+# 가산초 파일 읽기는 저장소를 다시 읽을 때만 load_bonus_times 구간으로 측정됨 (바뀌지 않았으면 측정되지 않음)
+def test_bonus_read_is_timed_inside_load(store):
+    metrics = get_metrics()
+    metrics.reset()
+    store.refresh()
+    assert 'load_bonus_times' not in metrics.snapshot()['spans']
+    store.refresh(force=True)
+    assert metrics.snapshot()['spans']['load_bonus_times']['count'] == 1